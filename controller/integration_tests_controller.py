@@ -1,38 +1,73 @@
 import logging
+import sqlite3
+import time
 
-import requests
 from PyQt5.QtCore import QThread, pyqtSignal, QObject
 
-from services.exporters import python_requests, node_axios, java_restassured
+from services.assertion_evaluator import evaluate_test
+from services.execution_history import ExecutionHistoryService
 from services.integration_tests_service import IntegrationTestsService
+from services.project_export import ProjectExporter, controller_code, endpoint_code
+from services.request_timing import measure, timed_session
+from services.response_reader import read_response
 from utils.requests import join_url
 
+logger = logging.getLogger(__name__)
+
 
 class RequestWorker(QThread):
     on_success = pyqtSignal(dict)
     on_error = pyqtSignal(str)
 
-    def __init__(self, method, url, headers=None, params=None, data=None, parent=None):
+    def __init__(self, method, url, headers=None, params=None, data=None, test=None, memory_cap=None,
+                 context=None, history=None, parent=None):
         super().__init__(parent)
         self.method = method
         self.url = url
         self.headers = headers or {}
         self.params = params or {}
         self.data = data or ""
+        self.test = test or {}
+        self.memory_cap = memory_cap
+        self.context = context or {}
+        self.history = history
         self.response = None
 
+    def _record_history(self, data=None, error=None):
+        if self.history is None:
+            return
+        request = {"method": self.method, "url": self.url, "headers": self.headers,
+                   "params": self.params, "body": self.data}
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        self.history.record_result(self.context, request, data, error, self._started_at, duration_ms)
+
     def run(self):
         logger = logging.getLogger(__name__)
+        self._started_at = time.time()
+        self._started = time.perf_counter()
 
         try:
             logger.info(
                 f"Enviando requisição: {self.method} {self.url} headers={self.headers} params={self.params} data={self.data}")
-            self.response = requests.request(self.method, self.url, headers=self.headers, params=self.params, data=self.data)
-            self.on_success.emit({
-                "status": self.response.status_code,
-                "body": self.response.text,
-                "headers": dict(self.response.headers),
-            })
+            with measure() as timings, timed_session() as session:
+                self.response = session.request(self.method, self.url, headers=self.headers, params=self.params,
+                                                data=self.data, stream=True)
+                body = read_response(self.response, self.memory_cap)
+            try:
+                data_out = {
+                    "status": self.response.status_code,
+                    "headers": dict(self.response.headers),
+                    "timings": timings.to_dict(),
+                    **body.summary(),
+                }
+                try:
+                    data_out["evaluation"] = evaluate_test(self.test, data_out, body)
+                except Exception as e:
+                    logger.error(f"Erro ao avaliar verificações: {e}", exc_info=True)
+                self._record_history(data_out)
+                self.on_success.emit(data_out)
+            finally:
+                body.release()
             if self.response:
                 logger.info(f"Resposta recebida: status={self.response.status_code}")
             else:
@@ -40,6 +75,7 @@ class RequestWorker(QThread):
                 self.on_error.emit("Erro ao executar requisição")
         except Exception as e:
             logger.error(f"Erro ao executar requisição: {e}")
+            self._record_history(error=str(e))
             self.on_error.emit(str(e))
 
 
@@ -47,6 +83,12 @@ class IntegrationTestsController(QObject):
     def __init__(self):
         super().__init__()
         self.service = IntegrationTestsService()
+        try:
+            self.history = ExecutionHistoryService()
+        except sqlite3.Error as e:
+            # banco bloqueado ou somente leitura: a tela abre e os testes rodam sem histórico
+            logger.error(f"[IntegrationTestsController] Histórico de execuções indisponível: {e}", exc_info=True)
+            self.history = None
 
     def get_projects(self):
         return self.service.load()
@@ -120,6 +162,9 @@ class IntegrationTestsController(QObject):
             headers=headers,
             params=params,
             data=body,
+            test=test,
+            context={"project": project, "controller": controller, "endpoint": endpoint, "name": test_name},
+            history=self.history,
             parent=self
         )
 
@@ -129,6 +174,16 @@ class IntegrationTestsController(QObject):
             worker.on_error.connect(on_error)
         worker.start()
 
+    def get_test_history(self, project, controller, endpoint, test_name, limit=50):
+        if self.history is None:
+            return []
+        return self.history.last_runs(project, controller, endpoint, test_name, limit)
+
+    def get_flaky_tests(self, project=None, days=7):
+        if self.history is None:
+            return []
+        return self.history.flaky_tests(days=days, project=project)
+
     def update_test(self, project, controller, endpoint, test_name, new_config):
         self.service.update_test(project, controller, endpoint, test_name, new_config)
 
@@ -158,6 +213,12 @@ class IntegrationTestsController(QObject):
                 "headers": cfg.get("headers", {}),
                 "query_params": cfg.get("query_params", {}),
                 "body": cfg.get("body", ""),
+                "expected_status": cfg.get("expected_status", 200),
+                "expected_body": cfg.get("expected_body", ""),
+                "assertions": cfg.get("assertions", []),
+                "json_schema": cfg.get("json_schema", ""),
+                "diff_ignore_paths": cfg.get("diff_ignore_paths", []),
+                "diff_unordered_arrays": cfg.get("diff_unordered_arrays", False),
             })
         return result
 
@@ -166,19 +227,7 @@ class IntegrationTestsController(QObject):
         proj = data.get(project, {})
         ctrl = proj.get("controllers", {}).get(controller, {})
         ep = ctrl.get("endpoints", {}).get(endpoint, {})
-        tests = ep.get("tests", {})
-
-        base_url = proj.get("base_url", "")
-        ctrl_path = ctrl.get("path", "")
-        ep_path = ep.get("path", "")
-
-        if language == "python":
-            return python_requests(tests, base_url, ctrl_path, ep_path)
-        if language == "node":
-            return node_axios(tests, base_url, ctrl_path, ep_path)
-        if language == "java":
-            return java_restassured(tests, base_url, ctrl_path, ep_path)
-        raise ValueError(f"Linguagem desconhecida: {language}")
+        return endpoint_code(proj, ctrl, ep, language)
 
     def export_controller_tests(self, project, controller, language):
         """
@@ -187,12 +236,7 @@ class IntegrationTestsController(QObject):
         data = self.service.load()
         proj = data.get(project, {})
         ctrl = proj.get("controllers", {}).get(controller, {})
-
-        snippets = []
-        for ep_name, ep_data in ctrl.get("endpoints", {}).items():
-            code = self.export_tests(project, controller, ep_name, language)
-            snippets.append(code)
-        return "\n\n".join(snippets)
+        return controller_code(proj, ctrl, language)
 
     def export_project_tests(self, project, language):
         """
@@ -201,11 +245,19 @@ class IntegrationTestsController(QObject):
         """
         data = self.service.load()
         proj = data.get(project, {})
-        result = {}
-        for ctrl_name in proj.get("controllers", {}):
-            code = self.export_controller_tests(project, ctrl_name, language)
-            result[ctrl_name] = code
-        return result
+        return {
+            ctrl_name: controller_code(proj, ctrl, language)
+            for ctrl_name, ctrl in proj.get("controllers", {}).items()
+        }
+
+    def export_project_to_folder(self, project, languages, folder, on_progress=None):
+        """
+        Exporta o projeto inteiro para `folder`, um arquivo por controlador
+        e linguagem (uma linguagem ou uma lista delas), a partir de uma
+        única leitura da sessão. Retorna os caminhos gravados.
+        """
+        proj = self.service.load().get(project, {})
+        return ProjectExporter(proj, languages, folder, on_progress).run()
 
     def export_postman_collection(self, project, controller, endpoint):
         """
@@ -1,10 +1,75 @@
+import logging
+import threading
 from typing import List
 
 from services.pattern_learner import LocalRequestPatternLearner
 
+logger = logging.getLogger(__name__)
+
+
 class RequestsAssistantController:
-    def __init__(self):
-        self.local_learner = LocalRequestPatternLearner()
+    """
+    Fachada do learner de padrões de requisição.
+
+    Use instance() para obter a instância compartilhada pelo processo: o
+    learner é carregado do disco uma única vez, em background a partir de
+    load_in_background(), e os widgets/delegates só aguardam a carga se
+    pedirem sugestões antes de ela terminar.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, learner: LocalRequestPatternLearner = None):
+        self._learner = learner
+        self._loaded = threading.Event()
+        self._load_lock = threading.Lock()
+        self._loading = False
+        if learner is not None:
+            self._loaded.set()
+
+    @classmethod
+    def instance(cls) -> "RequestsAssistantController":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def load_in_background(self):
+        with self._load_lock:
+            if self._loading or self._loaded.is_set():
+                return
+            self._loading = True
+        threading.Thread(target=self._load, name="pattern-learner-load", daemon=True).start()
+
+    def _load(self):
+        try:
+            self._learner = LocalRequestPatternLearner()
+        except Exception as e:
+            logger.error(f"[RequestsAssistantController] Falha ao carregar padrões: {e}", exc_info=True)
+            # um learner vazio ligado aos arquivos substituiria o snapshot na
+            # próxima compactação; segue só em memória até reiniciar
+            logger.warning("[RequestsAssistantController] Persistência de padrões desativada nesta sessão")
+            self._learner = LocalRequestPatternLearner(autoload=False, persist=False)
+        finally:
+            self._loaded.set()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    @property
+    def revision(self) -> int:
+        """Revisão dos padrões aprendidos (-1 enquanto não carregados)."""
+        if not self._loaded.is_set():
+            return -1
+        return self._learner.revision
+
+    @property
+    def local_learner(self) -> LocalRequestPatternLearner:
+        if not self._loaded.is_set():
+            self.load_in_background()
+            self._loaded.wait()
+        return self._learner
 
     def register_request(self, method, url, headers, params, body):
         self.local_learner.register_request(method, url, headers, params, body)
@@ -32,8 +97,9 @@ class RequestsAssistantController:
     def get_body_values(self, method: str, url: str, key: str) -> list[str]:
         return self.local_learner.get_body_values(method, url, key)
 
-    def suggest_body_keys(self, method: str, url: str, prefix: str, count: int = 1) -> list[str]:
-        return self.local_learner.suggest_body_keys(method, url, prefix, count)
+    def suggest_body_keys(self, method: str, url: str, prefix: str, count: int = 1,
+                          parent: str = "") -> list[str]:
+        return self.local_learner.suggest_body_keys(method, url, prefix, count, parent)
 
     def suggest_header_keys(self, method: str, url: str, prefix: str, count: int = 1) -> list[str]:
         return self.local_learner.suggest_header_keys(method, url, prefix, count)
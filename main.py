@@ -5,6 +5,7 @@ from PyQt5.QtCore import QObject, Qt
 from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction
 import qtawesome as qta
 
+from controller.request_assistant_controller import RequestsAssistantController
 from presentation.components.integration_screen import IntegrationTestsScreen
 from services.notification_manager import NotificationManager
 from utils.utilities import get_style_sheet
@@ -25,6 +26,7 @@ class ApplicationManager(QObject):
         self.app.setStyleSheet(get_style_sheet())
 
         self.screen_window = None
+        RequestsAssistantController.instance().load_in_background()
 
         self.tray_icon = QSystemTrayIcon(self.app)
         self.tray_icon.setIcon(qta.icon('fa5s.bell', color='white'))
@@ -1,25 +1,25 @@
-import difflib
 import json
 import logging
-import os
-import re
 from datetime import datetime
 
 from PyQt5 import QtCore
 from PyQt5.QtGui import QColor, QBrush, QKeySequence
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTreeWidget, QTreeWidgetItem,
-    QLabel, QFileDialog, QMessageBox, QInputDialog, QSplitter, QMenu, QScrollArea, QPlainTextEdit, QShortcut,
+    QLabel, QFileDialog, QMessageBox, QInputDialog, QSplitter, QMenu, QScrollArea, QShortcut,
     QHeaderView, QComboBox, QToolButton
 )
 from PyQt5.QtCore import Qt, QPoint, QThreadPool
 import qtawesome as qta
-from jsonschema import validate, ValidationError
 
 from controller.integration_tests_controller import IntegrationTestsController
+from presentation.components.log_view import LogBatcher, LogListModel, LogView
 from presentation.components.performance_component import PerformanceWidget
 from presentation.components.test_widget import CollapsibleTestWidget
 from services.integration_tests_service import JavaImportWorker
+from services.project_export import ProjectExportWorker
+from services.request_timing import format_timings
+from services.response_reader import format_body_for_log
 from services.test_worker import TestRunnable
 from utils.requests import join_url
 
@@ -27,17 +27,22 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 class IntegrationTestsScreen(QWidget):
+    MAX_POOLED_WIDGETS = 200
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.import_worker = None
+        self.export_worker = None
         self.performance_window = None
         self.setWindowTitle("Testes Integrados (Beta)")
         self.current_project = None
         self.current_controller = None
         self.current_endpoint = None
-        self.logs = []
+        self.log_model = LogListModel(parent=self)
+        self.log_batcher = LogBatcher(self.log_model, parent=self)
         self._running_all = False
         self._pending_tests = 0
+        self._widget_pool = []
 
         self.thread_pool = QThreadPool.globalInstance()
         self.thread_pool.setMaxThreadCount(5)
@@ -178,8 +183,7 @@ class IntegrationTestsScreen(QWidget):
 
         main_layout.addLayout(filter_layout)
 
-        self.log_view = QPlainTextEdit()
-        self.log_view.setReadOnly(True)
+        self.log_view = LogView(self.log_model)
         self.log_view.setPlaceholderText("Aqui aparecem os logs de execução…")
         self.log_view.setContextMenuPolicy(Qt.CustomContextMenu)
         self.log_view.customContextMenuRequested.connect(self.open_log_context_menu)
@@ -193,21 +197,60 @@ class IntegrationTestsScreen(QWidget):
         layout.addWidget(splitter)
 
     def open_log_context_menu(self, pos):
-        menu = self.log_view.createStandardContextMenu()
+        menu = QMenu(self.log_view)
+        act_copy = menu.addAction("Copiar", self.log_view.copy_selection)
+        act_copy.setEnabled(self.log_view.selectionModel().hasSelection())
+        menu.addAction("Copiar tudo", self.log_view.copy_all)
         menu.addSeparator()
         menu.addAction("Limpar Log", self.clear_logs)
+        menu.addSeparator()
+        selected = self.log_filter_combo.currentText()
+        act_history = menu.addAction("Histórico do teste selecionado", lambda: self.show_test_history(selected))
+        act_history.setEnabled(bool(self.current_endpoint) and selected not in ("", "Todos"))
+        menu.addAction("Testes instáveis (7 dias)", self.show_flaky_tests)
         menu.exec_(self.log_view.mapToGlobal(pos))
 
+    def show_test_history(self, test_name):
+        runs = self.controller.get_test_history(
+            self.current_project, self.current_controller, self.current_endpoint, test_name, limit=20
+        )
+        if not runs:
+            QMessageBox.information(self, "Histórico", f"Nenhuma execução registrada para '{test_name}'.")
+            return
+        lines = []
+        for run in runs:
+            ts = datetime.fromtimestamp(run["started_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            result = "PASSOU" if run["passed"] else "FALHOU"
+            status = run["status_code"] if run["status_code"] is not None else "-"
+            duration = f"{run['duration_ms']:.0f} ms" if run["duration_ms"] is not None else "-"
+            line = f"{ts}  {result}  status={status}  {duration}"
+            if run["error"]:
+                line += f"  erro: {run['error']}"
+            lines.append(line)
+        QMessageBox.information(self, f"Histórico – {test_name}", "\n".join(lines))
+
+    def show_flaky_tests(self):
+        flaky = self.controller.get_flaky_tests(self.current_project)
+        if not flaky:
+            QMessageBox.information(self, "Testes instáveis", "Nenhum teste instável nos últimos 7 dias.")
+            return
+        lines = [
+            f"{t['controller']} › {t['endpoint']} › {t['name']}: "
+            f"{t['failures']} falha(s) / {t['passes'] + t['failures']} execuções ({t['failure_rate']:.0%})"
+            for t in flaky
+        ]
+        QMessageBox.information(self, "Testes instáveis (7 dias)", "\n".join(lines))
+
     def clear_logs(self):
-        self.logs.clear()
-        self.log_view.clear()
+        self.log_batcher.clear()
+        self.log_model.clear()
 
     def refresh_log_view(self):
         selected = self.log_filter_combo.currentText()
-        self.log_view.clear()
-        for test_name, entry in self.logs:
-            if selected == "Todos" or test_name == selected:
-                self.log_view.appendPlainText(entry)
+        if not self.log_filter_combo.isEnabled() or selected in ("", "Todos"):
+            self.log_model.set_filter(None)
+        else:
+            self.log_model.set_filter(selected)
 
     def append_log(self, message, test_name=None):
         ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -215,9 +258,7 @@ class IntegrationTestsScreen(QWidget):
             entry = f"{ts} [{test_name}] – {message}"
         else:
             entry = f"{ts} – {message}"
-        self.logs.append((test_name, entry))
-        if not self.log_filter_combo.isEnabled() or self.log_filter_combo.currentText() == "Todos" or test_name == self.log_filter_combo.currentText():
-            self.log_view.appendPlainText(entry)
+        self.log_batcher.put(test_name, entry)
 
     def load_projects(self):
         self.tree.setUpdatesEnabled(False)
@@ -608,13 +649,22 @@ class IntegrationTestsScreen(QWidget):
         while self.tests_layout.count():
             item = self.tests_layout.takeAt(0)
             widget = item.widget()
-            if widget is not None:
+            if widget is None:
+                continue
+            if isinstance(widget, CollapsibleTestWidget) and len(self._widget_pool) < self.MAX_POOLED_WIDGETS:
+                widget.hide()
+                self._widget_pool.append(widget)
+            else:
                 widget.deleteLater()
 
+    def _acquire_test_widget(self) -> CollapsibleTestWidget:
+        if self._widget_pool:
+            return self._widget_pool.pop()
+        return CollapsibleTestWidget("", None, None, None, None, parent=self.tests_area)
+
     def load_tests(self, project, controller, endpoint):
         self.clear_tests()
-        self.logs.clear()
-        self.log_view.clear()
+        self.clear_logs()
         tests = self.controller.get_projects()[project]["controllers"][controller]["endpoints"][endpoint].get("tests",{})
         self.log_filter_combo.clear()
         self.log_filter_combo.addItem("Todos")
@@ -631,67 +681,21 @@ class IntegrationTestsScreen(QWidget):
         full_url = join_url(base_url, ctrl_path, ep_path)
         ep_method = ep_info.get("method", "GET").upper()
 
-        for i in reversed(range(self.tests_layout.count() - 1)):
-            w = self.tests_layout.takeAt(i).widget()
-            w.deleteLater()
         tests = self.controller.get_projects()[project]["controllers"][controller]["endpoints"].get(endpoint, {}).get(
             "tests", {})
         for test_name, cfg in tests.items():
-            def mk_cb(name): return lambda: self.on_rename_test(project, controller, endpoint, name)
-            def mk_dup(name): return lambda: self.on_duplicate_test(project, controller, endpoint, name)
-            def mk_del(name): return lambda: self.on_remove_test(project, controller, endpoint, name)
-            def mk_run(name, widget): return lambda: self.on_run_test(project, controller, endpoint, name, widget)
-
-            w = CollapsibleTestWidget(
-                test_name,
-                on_rename=mk_cb(test_name),
-                on_duplicate=mk_dup(test_name),
-                on_delete=mk_del(test_name),
-                on_run = mk_run(test_name, None)
+            w = self._acquire_test_widget()
+            w.bind(
+                test_name, cfg, ep_info, ep_method, full_url,
+                on_rename=lambda n=test_name: self.on_rename_test(project, controller, endpoint, n),
+                on_duplicate=lambda n=test_name: self.on_duplicate_test(project, controller, endpoint, n),
+                on_delete=lambda n=test_name: self.on_remove_test(project, controller, endpoint, n),
+                on_run=lambda n=test_name, wi=w: self.on_run_test(project, controller, endpoint, n, wi),
+                on_collapsed=lambda n=test_name, wi=w:
+                    self.save_test_config_if_collapsed(False, project, controller, endpoint, n, wi),
             )
-            w.method_combo.setCurrentText(ep_method)
-            w.url_input.setText(full_url)
-
-            param_defs = {p['name']: p for p in ep_info.get("query_params", [])}
-            test_qparams = cfg.get("query_params", {})
-            for p in ep_info.get("query_params", []):
-                name = p['name']
-                is_required = p.get('required', False)
-                value = test_qparams.get(name, "")
-                w.add_param_row(w.query_table, name, value, is_required)
-
-            header_defs = {p['name']: p for p in ep_info.get("headers", [])}
-            test_pvars = cfg.get("headers", {})
-            for p in ep_info.get("headers", []):
-                name = p['name']
-                is_required = p.get('required', False)
-                value = test_pvars.get(name, "")
-                w.add_param_row(w.headers_table, name, value, is_required)
-
-            w.body_edit.setPlainText(cfg.get("body", ""))
-            if ep_info.get("body_required", False):
-                w.body_edit.setStyleSheet("border: 2px solid #e57373;")
-                w.body_edit.setToolTip("Body obrigatório para este endpoint")
-            else:
-                w.body_edit.setStyleSheet("")
-                w.body_edit.setToolTip("")
-            w.expected_status.setCurrentText(str(cfg.get("expected_status", 200)))
-            w.expected_body.setPlainText(cfg.get("expected_body", ""))
-
-            w.load_assertions(cfg.get("assertions", []))
-            w.load_schema(cfg.get("json_schema", ""))
-            w.toggle_btn.toggled.connect(lambda expanded, wi=w, tn=test_name:
-                                         self.save_test_config_if_collapsed(expanded, project, controller, endpoint, tn,
-                                                                            wi)
-                                         )
-
-            w.run_btn.clicked.disconnect()
-            w.run_btn.clicked.connect(mk_run(test_name, w))
-
-            w.method_combo.setEnabled(False)
-            w.url_input.setEnabled(False)
-
             self.tests_layout.addWidget(w)
+            w.show()
         self.btn_new.clicked.connect(lambda: self.on_new_test(project, controller, endpoint))
         self.btn_new.setEnabled(True)
 
@@ -761,7 +765,8 @@ class IntegrationTestsScreen(QWidget):
 
                 try:
                     def make_on_success(w):
-                        return lambda td, data: self._handle_test_success(td, data, w)
+                        binding = w.binding
+                        return lambda td, data: self._handle_test_success(td, data, w if w.binding == binding else None)
 
                     def make_on_error():
                         return lambda td, err: self._handle_test_error(td, err)
@@ -818,7 +823,8 @@ class IntegrationTestsScreen(QWidget):
             self.append_log("*" * self.total_line_breaker, test_name)
             self.controller.run_test(
                 project, controller, endpoint, test_name,
-                on_success=lambda data, w=widget, n=test_name: self.on_success(data, w, n),
+                on_success=lambda data, w=widget, n=test_name, b=widget.binding:
+                    self.on_success(data, w if w.binding == b else None, n),
                 on_error=lambda data, n=test_name: self.on_error(data, n)
             )
         except Exception as e:
@@ -827,23 +833,20 @@ class IntegrationTestsScreen(QWidget):
 
     @staticmethod
     def validate_required(widget, ep_info):
-        param_defs = {p['name']: p for p in ep_info.get("query_params", [])}
-        for r in range(widget.query_table.rowCount()):
-            name = widget.query_table.item(r, 1).text().replace(" *", "")
-            is_required = param_defs.get(name, {}).get('required', False)
-            value = widget.query_table.item(r, 2).text().strip()
-            if is_required and not value:
+        values = widget.request_values()
+        query_values = {k.replace(" *", ""): v for k, v in values["query_params"].items()}
+        for p in ep_info.get("query_params", []):
+            name = p['name']
+            if p.get('required', False) and not query_values.get(name, "").strip():
                 return False, f"Preencha o parâmetro obrigatório: {name}"
 
-        path_defs = {p['name']: p for p in ep_info.get("path_variables", [])}
-        for r in range(widget.headers_table.rowCount()):
-            name = widget.headers_table.item(r, 1).text().replace(" *", "")
-            is_required = path_defs.get(name, {}).get('required', False)
-            value = widget.headers_table.item(r, 2).text().strip()
-            if is_required and not value:
+        header_values = {k.replace(" *", ""): v for k, v in values["headers"].items()}
+        for p in ep_info.get("path_variables", []):
+            name = p['name']
+            if name in header_values and p.get('required', False) and not header_values[name].strip():
                 return False, f"Preencha a variável de caminho obrigatória: {name}"
 
-        if ep_info.get('body_required', False) and not widget.body_edit.toPlainText().strip():
+        if ep_info.get('body_required', False) and not values["body"].strip():
             return False, "O body é obrigatório para este endpoint."
 
         return True, ""
@@ -897,99 +900,35 @@ class IntegrationTestsScreen(QWidget):
                 break
 
     def on_success(self, data: dict, widget: CollapsibleTestWidget, test_name):
-        logging.info(f"[IntegrationTestsScreen] Teste executado com sucesso: {data}")
+        logging.info(f"[IntegrationTestsScreen] Teste executado com sucesso: status={data.get('status', 0)}")
         if not widget:
             logging.warning("[IntegrationTestsScreen] Widget não fornecido para exibir o resultado do teste.")
             return
 
         current_status = data.get("status", 0)
-        current_body = data.get("body", "")
         current_headers = data.get("headers", {})
 
         self.append_log(f"Teste '{test_name}' executado!", test_name)
         self.append_log(f"Status da execução: {current_status}", test_name)
+        if data.get("timings"):
+            self.append_log(f"Tempos: {format_timings(data['timings'])}", test_name)
         self.append_log(f"Headers da resposta: {current_headers}", test_name)
-        self.append_log(f"Body da resposta:\n{current_body.strip()}", test_name)
+        self.append_log(f"Body da resposta:\n{format_body_for_log(data)}", test_name)
         self.append_log("*" * self.total_line_breaker, test_name)
 
-        expected_status = widget.get_expected_status()
-        expected_body = widget.get_expected_body().strip()
-
-        status_passed = (current_status == expected_status)
-
-        body_passed = True
-        diff_text = ""
-        if expected_body:
-            try:
-                exp_json = json.loads(expected_body)
-                curr_json = json.loads(current_body)
-                body_passed = (exp_json == curr_json)
-                if not body_passed:
-                    exp_lines = json.dumps(exp_json, indent=2).splitlines()
-                    curr_lines = json.dumps(curr_json, indent=2).splitlines()
-                    diff = difflib.unified_diff(exp_lines, curr_lines, lineterm="")
-                    diff_text = "\n".join(diff)
-            except json.JSONDecodeError:
-                body_passed = (expected_body in current_body)
-                if not body_passed:
-                    exp_lines = expected_body.splitlines()
-                    curr_lines = current_body.splitlines()
-                    diff = difflib.unified_diff(exp_lines, curr_lines, lineterm="")
-                    diff_text = "\n".join(diff)
-
-        assertion_errors = []
-        try:
-            curr_json = json.loads(current_body)
-        except:
-            curr_json = None
-
-        for a in widget.get_assertions():
-            typ = a["type"]
-            target = a["target"]
-            exp_val = a["expected"]
-            ok = True
-
-            if typ == "HTTP Status Equals":
-                ok = (current_status == int(exp_val))
-
-            elif typ == "Body Contains":
-                ok = (exp_val in current_body)
-
-            elif typ == "Body Equals":
-                ok = (current_body.strip() == exp_val.strip())
-
-            elif typ == "Header Equals":
-                ok = (current_headers.get(target, "") == exp_val)
-
-            elif typ == "JSON Path Equals" and curr_json is not None:
-                val = curr_json
-                for key in target.split("."):
-                    val = val.get(key, None) if isinstance(val, dict) else val[int(key)] if isinstance(val, list) and key.isdigit() else None
-                ok = (val == exp_val)
-
-            elif typ == "Regex Matches":
-                ok = (re.search(exp_val, current_body) is not None)
-
-            if not ok:
-                assertion_errors.append(f"{typ}: esperado '{exp_val}' em '{target}'")
-
-        schema_str = widget.get_schema()
-        if schema_str:
-            try:
-                schema = json.loads(schema_str)
-                curr_json = json.loads(current_body)
-                try:
-                    validate(instance=curr_json, schema=schema)
-                    self.append_log("✅ JSON Schema validado com sucesso", test_name)
-                except ValidationError as ve:
-                    assertion_errors.append(f"JSON Schema Falhou: {ve.message}")
-                    self.append_log(f"✖ Falha JSON Schema: {ve.message}", test_name)
-            except json.JSONDecodeError as je:
-                self.append_log(f"✖ JSON Schema inválido: {je}", test_name)
+        evaluation = data.get("evaluation")
+        if evaluation is None:
+            self.append_log("✖ Não foi possível avaliar as verificações do teste", test_name)
+            widget.status_lbl.setStyleSheet("color: red;")
+            widget.status_lbl.setText("❌ Teste falhou")
+            self.append_log("*" * self.total_line_breaker, test_name)
+            return
 
-        passed = status_passed and body_passed and not assertion_errors
+        for message in evaluation.get("messages", []):
+            self.append_log(message, test_name)
 
-        if passed:
+        expected_status = evaluation.get("expected_status")
+        if evaluation.get("passed"):
             self.append_log(f"✔ Teste '{test_name}' passou (status={current_status})", test_name)
             widget.status_lbl.setStyleSheet("color: green;")
             widget.status_lbl.setText("✅ Teste passou")
@@ -998,11 +937,11 @@ class IntegrationTestsScreen(QWidget):
             widget.status_lbl.setText("❌ Teste falhou")
 
             details = []
-            if not status_passed:
+            if not evaluation.get("status_passed"):
                 details.append(f"Status esperado: {expected_status}, obtido: {current_status}")
-            if expected_body and not body_passed:
-                details.append("Diferença no body:\n" + (diff_text or "<nenhum diff gerado>"))
-            for err in assertion_errors:
+            if evaluation.get("has_expected_body") and not evaluation.get("body_passed"):
+                details.append("Diferença no body:\n" + (evaluation.get("diff") or "<nenhum diff gerado>"))
+            for err in evaluation.get("assertion_errors", []):
                 details.append("Verificação: " + err)
             self.append_log(f"✖ Teste '{test_name}' falhou: status esperado {expected_status}, obtido {current_status}", test_name)
             self.append_log("Falha no teste:\n" + "\n\n".join(details), test_name)
@@ -1113,35 +1052,10 @@ class IntegrationTestsScreen(QWidget):
                 QMessageBox.warning(self, "Erro", str(e))
 
     def save_test_config_if_collapsed(self, expanded, project, controller, endpoint, test_name, widget):
-        if expanded:
+        if expanded or not widget.is_loaded:
             return
 
-        headers = {}
-        for r in range(widget.headers_table.rowCount()):
-            cb = widget.headers_table.cellWidget(r, 0)
-            k = widget.headers_table.item(r, 1)
-            v = widget.headers_table.item(r, 2)
-            if cb and cb.isChecked() and k and k.text():
-                headers[k.text()] = v.text() if v else ""
-
-        query_params = {}
-        for r in range(widget.query_table.rowCount()):
-            cb = widget.query_table.cellWidget(r, 0)
-            k = widget.query_table.item(r, 1)
-            v = widget.query_table.item(r, 2)
-            if cb and cb.isChecked() and k and k.text():
-                query_params[k.text()] = v.text() if v else ""
-
-        body = widget.body_edit.toPlainText()
-        expected_status = widget.get_expected_status()
-        expected_body = widget.get_expected_body()
-        assertions = widget.get_assertions()
-
-        new_cfg = {"description": "", "headers": headers, "query_params": query_params, "body": body,
-                   "expected_status": expected_status, "expected_body": expected_body, "assertions": assertions,
-                   "json_schema": widget.get_schema()}
-
-        self.controller.update_test(project, controller, endpoint, test_name, new_cfg)
+        self.controller.update_test(project, controller, endpoint, test_name, widget.collect_config())
 
     def on_export_endpoint(self, item):
         project, ctrl, ep = item.data(0, Qt.UserRole)[1:]
@@ -1171,27 +1085,50 @@ class IntegrationTestsScreen(QWidget):
 
     def on_export_project(self, item):
         project = item.text(0)
-        lang = self._ask_language()
-        codes = self.controller.export_project_tests(project, lang)
+        lang = self._ask_language(allow_all=True)
+        if not lang:
+            return
         folder = QFileDialog.getExistingDirectory(self, "Selecione pasta para exportar o projeto")
         if not folder:
             return
-        for ctrl, code in codes.items():
-            ext = {"python": ".py", "node": ".js", "java": ".java"}[lang]
-            path = os.path.join(folder, f"{ctrl}{ext}")
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(code)
+
+        self.setEnabled(False)
+        self.info_label.setText(f"Exportando projeto '{project}'...")
+
+        self.export_worker = ProjectExportWorker(self.controller, project, lang, folder)
+        self.export_worker.progress.connect(self._on_export_progress)
+        self.export_worker.finished.connect(lambda paths: self._on_export_finished(project, folder, paths))
+        self.export_worker.error.connect(self._on_export_error)
+        self.export_worker.start()
+
+    def _on_export_progress(self, done, total, controller):
+        self.info_label.setText(f"Exportando projeto... {done}/{total} ({controller})")
+
+    def _on_export_finished(self, project, folder, paths):
+        self.setEnabled(True)
+        self.info_label.setText(f"Exportação concluída: {len(paths)} arquivos.")
         QMessageBox.information(self, "Exportação", f"Projeto '{project}' exportado em {folder}")
 
-    def _ask_language(self):
+    def _on_export_error(self, error_msg):
+        logger.error(f"[IntegrationTestsScreen] Erro ao exportar projeto: {error_msg}")
+        self.setEnabled(True)
+        QMessageBox.warning(self, "Erro na Exportação", error_msg)
+        self.info_label.setText("Falha ao exportar projeto.")
+
+    def _ask_language(self, allow_all=False):
         langs = ["python", "node", "java"]
         labels = {"python": "Python", "node": "Node.js", "java": "Java"}
+        options = [labels[l] for l in langs]
+        if allow_all:
+            options.append("Todas")
         lang, ok = QInputDialog.getItem(
             self, "Escolha a linguagem", "Linguagem:",
-            [labels[l] for l in langs], 0, False
+            options, 0, False
         )
         if not ok:
             return None
+        if lang == "Todas":
+            return langs
         # converte rótulo de volta para a chave
         return next(k for k, v in labels.items() if v == lang)
 
@@ -0,0 +1,314 @@
+import re
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextBlockUserData
+
+# o que o parser espera a seguir
+START = "start"                  # documento vazio até aqui
+VALUE = "value"                  # após ':' ou ',' em array
+VALUE_OR_CLOSE = "value_or_close"  # após '['
+KEY = "key"                      # após ',' em objeto
+KEY_OR_CLOSE = "key_or_close"    # após '{'
+COLON = "colon"
+AFTER_VALUE = "after_value"      # ',' ou fechamento
+DONE = "done"                    # valor de topo completo
+
+_VALUE_EXPECTED = (START, VALUE, VALUE_OR_CLOSE)
+_KEY_EXPECTED = (KEY, KEY_OR_CLOSE)
+_VALUE_TOKENS = ("s", "v", "{", "[")
+_CLOSING = {"{": "}", "[": "]"}
+
+# mesmas mensagens do módulo json
+_MESSAGES = {
+    START: "Expecting value",
+    VALUE: "Expecting value",
+    VALUE_OR_CLOSE: "Expecting value",
+    KEY: "Expecting property name enclosed in double quotes",
+    KEY_OR_CLOSE: "Expecting property name enclosed in double quotes",
+    COLON: "Expecting ':' delimiter",
+    AFTER_VALUE: "Expecting ',' delimiter",
+    DONE: "Extra data",
+}
+
+# espaço em branco + um token; o último grupo pega qualquer caractere inválido
+_TOKEN = re.compile(r'''
+    [ \t\r]*
+    (?:
+        ("(?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*")
+      | (-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null)
+      | ([{}\[\]:,])
+      | ([^ \t\r])
+    )
+''', re.VERBOSE)
+_LOOSE_STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+
+class JsonBlockData(QTextBlockUserData):
+    """Resultado da análise de um bloco: primeiro erro (coluna, mensagem) ou None."""
+
+    def __init__(self):
+        super().__init__()
+        self.block = None
+        self.error = None
+
+
+def scan_line(text: str, stack: str, expect: str):
+    """
+    Avança o parser pelos tokens de uma linha a partir de (pilha, esperado).
+    Retorna (pilha, esperado, erro). Em caso de erro o token é ignorado e a
+    análise continua, para que o estado dos blocos seguintes não mude só
+    porque um token desta linha é inválido.
+    """
+    error = None
+    pos = 0
+    while True:
+        for match in _TOKEN.finditer(text, pos):
+            group = match.lastindex
+            start = match.start(group)
+            restart = False
+            if group == 1:
+                token = "s"
+            elif group == 2:
+                token = "v"
+            elif group == 3:
+                token = match.group(3)
+            elif text[start] == '"':
+                # string malformada: conta como string para manter o estado
+                loose = _LOOSE_STRING.match(text, start)
+                if error is None:
+                    error = (start, "Invalid control character or \\escape" if loose else "Unterminated string")
+                token, restart = "s", True
+                pos = loose.end() if loose else len(text)
+            else:
+                if error is None:
+                    error = (start, _MESSAGES[expect])
+                continue
+
+            if token == "s" and expect in _KEY_EXPECTED:
+                expect = COLON
+            elif expect in _VALUE_EXPECTED and token in _VALUE_TOKENS:
+                if token == "{":
+                    stack += token
+                    expect = KEY_OR_CLOSE
+                elif token == "[":
+                    stack += token
+                    expect = VALUE_OR_CLOSE
+                else:
+                    expect = _after_value(stack)
+            elif token == "," and expect == AFTER_VALUE:
+                expect = KEY if stack[-1] == "{" else VALUE
+            elif token == ":" and expect == COLON:
+                expect = VALUE
+            elif token == _CLOSING.get(stack[-1:]) and expect in (AFTER_VALUE, KEY_OR_CLOSE, VALUE_OR_CLOSE):
+                stack = stack[:-1]
+                expect = _after_value(stack)
+            elif error is None:
+                error = (start, _MESSAGES[expect])
+            if restart:
+                break
+        else:
+            return stack, expect, error
+
+
+def _after_value(stack: str) -> str:
+    return AFTER_VALUE if stack else DONE
+
+
+class JsonBlockValidator(QObject):
+    """
+    Validação incremental de JSON por QTextBlock.
+
+    Cada bloco guarda em userState() o estado do parser no fim da linha
+    (pilha de aberturas + o que se espera a seguir), internado como int.
+    Edições só marcam os blocos alterados como sujos; first_error() reanalisa
+    a partir de cada bloco sujo e para assim que um bloco não editado
+    terminar no mesmo estado de antes, como faz o QSyntaxHighlighter. O custo
+    acompanha a edição e não o tamanho do documento. Strings e tokens JSON
+    não atravessam linhas, então o estado por linha é suficiente.
+
+    A análise pendente também roda sozinha no event loop, em lotes de
+    CHUNK_BLOCKS blocos, para que colar ou abrir um documento grande não
+    trave a UI; `scanned` é emitido quando não há mais nada pendente.
+    """
+    LINE_CACHE_SIZE = 50_000
+    # linhas longas (JSON minificado) mudam a cada tecla e não se repetem
+    LINE_CACHE_CHARS = 1_000_000
+    CACHED_LINE_CHARS = 1_000
+    CHUNK_BLOCKS = 2000
+
+    scanned = pyqtSignal()
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self._document = document
+        self._states = {}
+        self._state_list = []
+        self._errors = set()
+        # números dos blocos a partir dos quais reanalisar
+        self._dirty = []
+        self._block_count = document.blockCount()
+        # linhas repetidas ("{", "},", chaves iguais) são comuns em JSON formatado
+        self._line_cache = {}
+        self._line_cache_chars = 0
+        self._suspended = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._scan_chunk)
+        document.contentsChange.connect(self._on_contents_change)
+        self._on_contents_change(0, 0, document.characterCount())
+
+    def _state_id(self, state: tuple) -> int:
+        sid = self._states.get(state)
+        if sid is None:
+            sid = self._states[state] = len(self._state_list)
+            self._state_list.append(state)
+        return sid
+
+    def _state(self, block) -> tuple:
+        sid = block.userState() if block.isValid() else -1
+        if 0 <= sid < len(self._state_list):
+            return self._state_list[sid]
+        return "", START
+
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        block = self._document.findBlock(position)
+        last = self._document.findBlock(position + added)
+        if not last.isValid():
+            last = self._document.lastBlock()
+        # QTextBlock de blocos removidos fica inválido; por isso guardamos
+        # números, deslocados pela variação de blocos desta edição
+        first = block.blockNumber()
+        shift = self._document.blockCount() - self._block_count
+        self._block_count = self._document.blockCount()
+        old_last = last.blockNumber() - shift
+        dirty = {first}
+        for number in self._dirty:
+            if number < first:
+                dirty.add(number)
+            elif number > old_last:
+                dirty.add(number + shift)
+        if len(dirty) > 64:
+            # muitas edições pendentes: basta reanalisar a partir da primeira
+            dirty = {min(dirty)}
+        self._dirty = sorted(dirty)
+        while block.isValid():
+            block.setUserState(-1)
+            if block == last:
+                break
+            block = block.next()
+        self._timer.start()
+
+    def suspend(self):
+        """Para de acompanhar o documento (edição de documentos enormes)."""
+        if self._suspended:
+            return
+        self._suspended = True
+        self._document.contentsChange.disconnect(self._on_contents_change)
+        self._timer.stop()
+        self._dirty = []
+        self._line_cache.clear()
+        self._line_cache_chars = 0
+
+    def resume(self):
+        """Volta a acompanhar o documento, reanalisando-o inteiro em background."""
+        if not self._suspended:
+            return
+        self._suspended = False
+        self._document.contentsChange.connect(self._on_contents_change)
+        # estados gravados antes da suspensão não valem mais
+        block = self._document.firstBlock()
+        while block.isValid():
+            block.setUserState(-1)
+            block = block.next()
+        self._block_count = self._document.blockCount()
+        self._dirty = [0]
+        self._timer.start()
+
+    def is_pending(self) -> bool:
+        return bool(self._dirty)
+
+    def _scan_chunk(self):
+        if self._scan_pending(self.CHUNK_BLOCKS):
+            self._timer.stop()
+            self.scanned.emit()
+
+    def _scan_pending(self, budget: int = None) -> bool:
+        """Reanalisa os blocos sujos (até `budget` blocos); True se não restou nada."""
+        dirty = self._dirty
+        self._dirty = []
+        scanned_until = -1
+        for index, number in enumerate(dirty):
+            block = self._document.findBlockByNumber(number)
+            if number <= scanned_until or not block.isValid():
+                continue
+            state = self._state(block.previous())
+            while block.isValid():
+                if budget is not None:
+                    if budget <= 0:
+                        # continua deste bloco no próximo lote
+                        self._dirty = [block.blockNumber()] + dirty[index + 1:]
+                        return False
+                    budget -= 1
+                old = block.userState()
+                sid, error = self._scan_line(block.text(), state)
+                state = self._state_list[sid]
+                block.setUserState(sid)
+                if error is not None or block.userData() is not None:
+                    self._set_error(block, error)
+                if old == sid:
+                    break
+                block = block.next()
+            scanned_until = block.blockNumber() if block.isValid() else float("inf")
+        return True
+
+    def _scan_line(self, text: str, state: tuple) -> tuple:
+        """(id do estado no fim da linha, erro), com cache para linhas curtas."""
+        if len(text) > self.CACHED_LINE_CHARS:
+            stack, expect, error = scan_line(text, *state)
+            return self._state_id((stack, expect)), error
+        key = (text, state)
+        result = self._line_cache.get(key)
+        if result is None:
+            if len(self._line_cache) >= self.LINE_CACHE_SIZE or self._line_cache_chars >= self.LINE_CACHE_CHARS:
+                self._line_cache.clear()
+                self._line_cache_chars = 0
+            stack, expect, error = scan_line(text, *state)
+            result = self._line_cache[key] = (self._state_id((stack, expect)), error)
+            self._line_cache_chars += len(text)
+        return result
+
+    def _set_error(self, block, error):
+        data = block.userData()
+        if error is None:
+            if data is not None:
+                data.error = None
+                self._errors.discard(data)
+            return
+        if data is None:
+            data = JsonBlockData()
+            block.setUserData(data)
+        data.block = block
+        data.error = error
+        self._errors.add(data)
+
+    def first_error(self):
+        """(posição no documento, mensagem) do primeiro erro, ou None se válido."""
+        self._scan_pending()
+        first = None
+        for data in list(self._errors):
+            if sip.isdeleted(data) or data.error is None or not data.block.isValid():
+                self._errors.discard(data)
+                continue
+            number = data.block.blockNumber()
+            if first is None or number < first[0]:
+                first = (number, data)
+        if first is not None:
+            _, data = first
+            column, msg = data.error
+            return data.block.position() + column, msg
+
+        stack, expect = self._state(self._document.lastBlock())
+        if expect in (DONE, START) and not stack:
+            return None
+        return self._document.characterCount() - 1, _MESSAGES[expect]
@@ -0,0 +1,330 @@
+import re
+from bisect import bisect_right
+from itertools import accumulate
+
+from PyQt5.QtCore import QObject
+
+# string (fechada ou não) ou um delimitador fora de string
+_STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*("?)|[\[\]{}()]')
+_OPENING = {"{": "}", "[": "]", "(": ")"}
+_CLOSING = {v: k for k, v in _OPENING.items()}
+_INF = float("inf")
+
+
+def scan_structure(text: str) -> tuple:
+    """
+    Estrutura de uma linha: (colunas dos delimitadores, caracteres,
+    profundidade relativa antes de cada um, spans de strings, saldo,
+    menor profundidade antes de um delimitador, menor depois).
+
+    Spans são pares [início, fim) das aspas; uma string não fechada vai
+    até depois do fim da linha. Strings JSON não atravessam linhas, então
+    a linha sozinha determina o que está dentro de string.
+    """
+    cols, chars, before, spans = [], [], [], []
+    depth = 0
+    min_before = min_after = _INF
+    for match in _STRUCTURE.finditer(text):
+        start = match.start()
+        ch = text[start]
+        if ch == '"':
+            end = match.end() if match.group(1) else len(text) + 1
+            spans.append((start, end))
+            continue
+        cols.append(start)
+        chars.append(ch)
+        before.append(depth)
+        min_before = min(min_before, depth)
+        depth += 1 if ch in _OPENING else -1
+        min_after = min(min_after, depth)
+    return tuple(cols), "".join(chars), tuple(before), tuple(spans), depth, min_before, min_after
+
+
+class JsonBracketIndex(QObject):
+    """
+    Índice estrutural do documento para casar delimitadores e saber se uma
+    posição está dentro de string sem percorrer o texto inteiro.
+
+    Cada bloco guarda a estrutura da sua linha (scan_structure), refeita só
+    para os blocos editados. As linhas ficam em faixas de ~CHUNK_BLOCKS
+    blocos, cada uma com seu resumo (quantidade de blocos, saldo e menor
+    profundidade alcançada, relativos ao início da faixa). Uma edição refaz
+    só as faixas tocadas; o primeiro bloco e a profundidade inicial de cada
+    faixa são somas acumuladas recalculadas em lote a partir da faixa
+    editada. Achar o par de um delimitador em outra linha pula faixas
+    inteiras que não chegam à profundidade procurada.
+    """
+    CHUNK_BLOCKS = 128
+    LINE_CACHE_SIZE = 50_000
+    # linhas longas (JSON minificado) mudam a cada tecla e não se repetem
+    LINE_CACHE_CHARS = 1_000_000
+    CACHED_LINE_CHARS = 1_000
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self._document = document
+        self._count = 0
+        self._chunks = []
+        self._chunk_sizes = []
+        self._chunk_deltas = []
+        self._chunk_min_before = []
+        self._chunk_min_after = []
+        # primeiro bloco e profundidade inicial de cada faixa, válidos até _stale_from
+        self._chunk_first = []
+        self._chunk_starts = []
+        self._stale_from = 0
+        self._line_cache = {}
+        self._line_cache_chars = 0
+        self._suspended = False
+        document.contentsChange.connect(self._on_contents_change)
+        self._on_contents_change(0, 0, document.characterCount())
+
+    def _structure(self, text: str) -> tuple:
+        if len(text) > self.CACHED_LINE_CHARS:
+            return scan_structure(text)
+        info = self._line_cache.get(text)
+        if info is None:
+            if len(self._line_cache) >= self.LINE_CACHE_SIZE or self._line_cache_chars >= self.LINE_CACHE_CHARS:
+                self._line_cache.clear()
+                self._line_cache_chars = 0
+            info = self._line_cache[text] = scan_structure(text)
+            self._line_cache_chars += len(text)
+        return info
+
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        document = self._document
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(position + added)
+        last = (last if last.isValid() else document.lastBlock()).blockNumber()
+        # blocos antigos [first, old_last] viraram os novos [first, last]
+        old_last = last - (document.blockCount() - self._count)
+        if self._count and first <= old_last:
+            texts = self._block_texts(first, last)
+            self._splice(first, old_last + 1, [self._structure(text) for text in texts])
+        if self._count != document.blockCount():
+            self.reset()
+
+    def suspend(self):
+        """Para de acompanhar o documento e libera o índice (edição de documentos enormes)."""
+        if self._suspended:
+            return
+        self._suspended = True
+        self._document.contentsChange.disconnect(self._on_contents_change)
+        self._count = 0
+        self._chunks, self._chunk_sizes, self._chunk_deltas = [], [], []
+        self._chunk_min_before, self._chunk_min_after = [], []
+        self._chunk_first, self._chunk_starts = [], []
+        self._line_cache.clear()
+        self._line_cache_chars = 0
+
+    def resume(self):
+        """Volta a acompanhar o documento, reconstruindo o índice."""
+        if not self._suspended:
+            return
+        self._suspended = False
+        self._document.contentsChange.connect(self._on_contents_change)
+        self.reset()
+
+    def reset(self):
+        """Reconstrói o índice do documento inteiro."""
+        document = self._document
+        self._count = 0
+        self._chunks, self._chunk_sizes, self._chunk_deltas = [], [], []
+        self._chunk_min_before, self._chunk_min_after = [], []
+        self._chunk_first, self._chunk_starts = [], []
+        self._stale_from = 0
+        texts = self._block_texts(0, document.blockCount() - 1)
+        self._splice(0, 0, [self._structure(text) for text in texts])
+
+    def _block_texts(self, first: int, last: int) -> list:
+        document = self._document
+        if last - first > self.CHUNK_BLOCKS:
+            texts = document.toPlainText().split("\n")
+            # separadores de linha dentro de um bloco também viram "\n"
+            if len(texts) == document.blockCount():
+                return texts[first:last + 1]
+        texts = []
+        block = document.findBlockByNumber(first)
+        for _ in range(first, last + 1):
+            texts.append(block.text())
+            block = block.next()
+        return texts
+
+    @staticmethod
+    def _summary(lines: list) -> tuple:
+        """(saldo, menor profundidade antes, menor depois) de uma faixa, relativos ao início dela."""
+        depth = 0
+        min_before = min_after = _INF
+        for info in lines:
+            min_before = min(min_before, depth + info[5])
+            min_after = min(min_after, depth + info[6])
+            depth += info[4]
+        return depth, min_before, min_after
+
+    def _splice(self, start: int, stop: int, lines: list):
+        """Troca os blocos [start, stop) por `lines`, refazendo só as faixas tocadas."""
+        size = self.CHUNK_BLOCKS
+        first_chunk = last_chunk = 0
+        merged = lines
+        if self._chunks:
+            first_chunk, first_offset = self._locate(start)
+            last_chunk, last_offset = self._locate(stop - 1)
+            merged = self._chunks[first_chunk][:first_offset] + lines + self._chunks[last_chunk][last_offset + 1:]
+            last_chunk += 1
+            # faixas pequenas demais se juntam a uma vizinha
+            if len(merged) < size // 2 and last_chunk < len(self._chunks):
+                merged += self._chunks[last_chunk]
+                last_chunk += 1
+            elif len(merged) < size // 2 and first_chunk > 0:
+                first_chunk -= 1
+                merged = self._chunks[first_chunk] + merged
+        if len(merged) <= 2 * size:
+            chunks = [merged] if merged else []
+        else:
+            chunks = [merged[i:i + size] for i in range(0, len(merged), size)]
+            if len(chunks[-1]) < size // 2:
+                tail = chunks.pop()
+                chunks[-1] += tail
+        sizes = [len(chunk) for chunk in chunks]
+        summaries = [self._summary(chunk) for chunk in chunks]
+        deltas = [summary[0] for summary in summaries]
+        span = slice(first_chunk, last_chunk)
+        if self._chunk_sizes[span] != sizes or self._chunk_deltas[span] != deltas:
+            # blocos ou profundidade mudaram: as faixas seguintes deslocam
+            self._stale_from = min(self._stale_from, first_chunk)
+        self._chunks[span] = chunks
+        self._chunk_sizes[span] = sizes
+        self._chunk_deltas[span] = deltas
+        self._chunk_min_before[span] = [summary[1] for summary in summaries]
+        self._chunk_min_after[span] = [summary[2] for summary in summaries]
+        self._count += len(lines) - (stop - start)
+
+    def _refresh(self):
+        """Recalcula início e profundidade inicial das faixas a partir da primeira alterada."""
+        start = self._stale_from
+        if start >= len(self._chunks):
+            del self._chunk_first[len(self._chunks):]
+            del self._chunk_starts[len(self._chunks):]
+            return
+        first = depth = 0
+        if start:
+            first = self._chunk_first[start - 1] + self._chunk_sizes[start - 1]
+            depth = self._chunk_starts[start - 1] + self._chunk_deltas[start - 1]
+        self._chunk_first[start:] = accumulate(self._chunk_sizes[start:-1], initial=first)
+        self._chunk_starts[start:] = accumulate(self._chunk_deltas[start:-1], initial=depth)
+        self._stale_from = len(self._chunks)
+
+    def _locate(self, number: int) -> tuple:
+        """(faixa, posição na faixa) do bloco `number`."""
+        self._refresh()
+        chunk = bisect_right(self._chunk_first, number) - 1
+        return chunk, number - self._chunk_first[chunk]
+
+    def _line_start(self, chunk: int, offset: int) -> int:
+        """Profundidade no início de um bloco."""
+        return self._chunk_starts[chunk] + sum(info[4] for info in self._chunks[chunk][:offset])
+
+    def is_inside_string(self, position: int) -> bool:
+        block = self._document.findBlock(position)
+        if not block.isValid() or block.blockNumber() >= self._count:
+            return False
+        chunk, offset = self._locate(block.blockNumber())
+        column = position - block.position()
+        for start, end in self._chunks[chunk][offset][3]:
+            if start >= column:
+                break
+            if column < end:
+                return True
+        return False
+
+    def match(self, position: int):
+        """Posição do delimitador que casa com o que está em `position`, ou None."""
+        block = self._document.findBlock(position)
+        if not block.isValid() or block.blockNumber() >= self._count:
+            return None
+        chunk, offset = self._locate(block.blockNumber())
+        cols, chars, before = self._chunks[chunk][offset][:3]
+        column = position - block.position()
+        try:
+            i = cols.index(column)
+        except ValueError:
+            return None
+        start = self._line_start(chunk, offset)
+        ch = chars[i]
+        if ch in _OPENING:
+            found = self._find_close(chunk, offset, i, start, start + before[i])
+            expected = _OPENING[ch]
+        else:
+            found = self._find_open(chunk, offset, i, start, start + before[i] - 1)
+            expected = _CLOSING[ch]
+        if found is None:
+            return None
+        chunk, offset, i = found
+        cols, chars = self._chunks[chunk][offset][:2]
+        if chars[i] != expected:
+            return None
+        number = self._chunk_first[chunk] + offset
+        return self._document.findBlockByNumber(number).position() + cols[i]
+
+    def _find_close(self, chunk: int, offset: int, index: int, start: int, depth: int):
+        """Primeiro delimitador depois de (faixa, bloco, índice) que volta a `depth`."""
+        lines = self._chunks[chunk]
+        info = lines[offset]
+        if start + info[6] <= depth:
+            found = self._scan_after(info, start, index + 1, depth)
+            if found is not None:
+                return chunk, offset, found
+        start += info[4]
+        for n in range(offset + 1, len(lines)):
+            info = lines[n]
+            if start + info[6] <= depth:
+                return chunk, n, self._scan_after(info, start, 0, depth)
+            start += info[4]
+        for chunk in range(chunk + 1, len(self._chunks)):
+            start = self._chunk_starts[chunk]
+            if start + self._chunk_min_after[chunk] <= depth:
+                for n, info in enumerate(self._chunks[chunk]):
+                    if start + info[6] <= depth:
+                        return chunk, n, self._scan_after(info, start, 0, depth)
+                    start += info[4]
+        return None
+
+    @staticmethod
+    def _scan_after(info: tuple, start: int, index: int, depth: int):
+        chars, before = info[1:3]
+        for i in range(index, len(chars)):
+            if chars[i] not in _OPENING and start + before[i] - 1 <= depth:
+                return i
+        return None
+
+    def _find_open(self, chunk: int, offset: int, index: int, start: int, depth: int):
+        """Último delimitador antes de (faixa, bloco, índice) aberto em `depth`."""
+        lines = self._chunks[chunk]
+        info = lines[offset]
+        if start + info[5] <= depth:
+            found = self._scan_before(info, start, index - 1, depth)
+            if found is not None:
+                return chunk, offset, found
+        for n in range(offset - 1, -1, -1):
+            info = lines[n]
+            start -= info[4]
+            if start + info[5] <= depth:
+                return chunk, n, self._scan_before(info, start, len(info[1]) - 1, depth)
+        for chunk in range(chunk - 1, -1, -1):
+            if self._chunk_starts[chunk] + self._chunk_min_before[chunk] <= depth:
+                lines = self._chunks[chunk]
+                start = self._chunk_starts[chunk] + self._chunk_deltas[chunk]
+                for n in range(len(lines) - 1, -1, -1):
+                    info = lines[n]
+                    start -= info[4]
+                    if start + info[5] <= depth:
+                        return chunk, n, self._scan_before(info, start, len(info[1]) - 1, depth)
+        return None
+
+    @staticmethod
+    def _scan_before(info: tuple, start: int, index: int, depth: int):
+        chars, before = info[1:3]
+        for i in range(index, -1, -1):
+            if start + before[i] <= depth:
+                return i
+        return None
@@ -1,9 +1,121 @@
 import json
+import logging
 import re
 from PyQt5.QtGui import QTextCursor, QTextCharFormat, QColor, QTextFormat, QPainter
-from PyQt5.QtCore import Qt, QSize, QRect, pyqtSignal, QPoint
+from PyQt5.QtCore import Qt, QSize, QRect, pyqtSignal, QPoint, QObject, QRunnable, QThreadPool, QTimer
 from PyQt5.QtWidgets import QWidget, QPlainTextEdit, QLabel, QTextEdit
 
+from presentation.components.json_block_validator import JsonBlockValidator
+from presentation.components.json_bracket_index import JsonBracketIndex
+from presentation.components.large_document import LargeTextGuard
+from services.json_diff import escape_pointer_token
+
+logger = logging.getLogger(__name__)
+
+
+def key_context(text: str):
+    """
+    Analisa o JSON (possivelmente incompleto) até o fim de `text`. Se o fim
+    estiver dentro de uma chave sendo digitada, retorna (prefixo da chave,
+    JSON pointer do objeto que a contém); senão None. Itens de array
+    aparecem como "*" no pointer, como no learner.
+    """
+    stack = []  # [abertura, chave atual do objeto]
+    in_string = escaped = is_key = expect_key = False
+    start = 0
+    last_string = None
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                last_string = _unescape(text[start:i])
+            continue
+        if ch == '"':
+            in_string, start = True, i + 1
+            is_key = expect_key and bool(stack) and stack[-1][0] == '{'
+        elif ch == ':':
+            if stack and stack[-1][0] == '{':
+                stack[-1][1] = last_string
+            expect_key = False
+        elif ch == ',':
+            expect_key = bool(stack) and stack[-1][0] == '{'
+        elif ch in '{[':
+            stack.append([ch, None])
+            expect_key = ch == '{'
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+            expect_key = False
+
+    if not (in_string and is_key):
+        return None
+    segments = [
+        "*" if opening == '[' else escape_pointer_token(key or "")
+        for opening, key in stack[:-1]
+    ]
+    pointer = "".join("/" + seg for seg in segments)
+    return _unescape(text[start:]), pointer
+
+
+def _unescape(raw: str) -> str:
+    try:
+        return json.loads(f'"{raw}"')
+    except json.JSONDecodeError:
+        return raw
+
+
+class SuggestionSignals(QObject):
+    ready = pyqtSignal(int, int, str)  # args: geração, posição do cursor, sugestão
+
+
+class SuggestionRunnable(QRunnable):
+    """
+    Calcula a sugestão de chave fora da thread da UI: analisa o texto até o
+    cursor e consulta o provider. A cada edição o editor incrementa a
+    geração; um job de geração antiga desiste antes de cada etapa cara e
+    nunca entrega o resultado.
+    """
+
+    def __init__(self, generation: int, position: int, text: str, provider, is_current, signals):
+        super().__init__()
+        self.generation = generation
+        self.position = position
+        self.text = text
+        self.provider = provider
+        self.is_current = is_current
+        self.signals = signals
+
+    def run(self):
+        if not self.is_current(self.generation):
+            return
+        context = key_context(self.text)
+        if context is None or not self.is_current(self.generation):
+            return
+        prefix, pointer = context
+        try:
+            full = self.provider(prefix, pointer)
+        except Exception as e:
+            logger.error(f"[SuggestionRunnable] Falha ao consultar sugestões: {e}", exc_info=True)
+            return
+        if full and full.startswith(prefix) and self.is_current(self.generation):
+            self.signals.ready.emit(self.generation, self.position, full[len(prefix):])
+
+
+_suggestion_pool = None
+
+
+def suggestion_pool() -> QThreadPool:
+    """Pool próprio de uma thread, para não disputar com a execução de testes."""
+    global _suggestion_pool
+    if _suggestion_pool is None:
+        _suggestion_pool = QThreadPool()
+        _suggestion_pool.setMaxThreadCount(1)
+    return _suggestion_pool
+
 
 class LineNumberArea(QWidget):
     def __init__(self, editor):
@@ -17,13 +129,29 @@ class LineNumberArea(QWidget):
         self.editor.lineNumberAreaPaintEvent(event)
 
 
-class JSONTextEdit(QPlainTextEdit):
+class JSONTextEdit(LargeTextGuard, QPlainTextEdit):
+    """
+    Editor de JSON com validação, auto-indentação e sugestão inline de
+    chaves: suggestionProvider(prefixo, pointer do objeto) deve retornar a
+    chave completa (ou "") e é consultado enquanto uma chave é digitada.
+
+    Sugestão e validação rodam SUGGEST_DELAY_MS / VALIDATE_DELAY_MS depois
+    da última tecla; a sugestão é calculada em background (o provider é
+    chamado fora da thread da UI) e descartada se o texto mudou nesse meio
+    tempo.
+    """
     jsonValidityChanged = pyqtSignal(bool)
     BRACKET_PAIRS = {'(': ')', '[': ']', '{': '}'}
+    SUGGEST_DELAY_MS = 120
+    VALIDATE_DELAY_MS = 300
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.suggestionProvider = None
+        self._large_document = False
+        self._error_selections = []
+        self._validator = JsonBlockValidator(self.document(), self)
+        self._brackets = JsonBracketIndex(self.document(), self)
 
         self.lineNumberArea = LineNumberArea(self)
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
@@ -37,27 +165,91 @@ class JSONTextEdit(QPlainTextEdit):
         self.notification_label.hide()
 
         self._suggestion = ""
-        self.textChanged.connect(self._updateSuggestion)
+        self._suggest_generation = 0
+        self._suggestion_signals = SuggestionSignals()
+        self._suggestion_signals.ready.connect(self._on_suggestion_ready)
+        self._suggest_timer = QTimer(self)
+        self._suggest_timer.setSingleShot(True)
+        self._suggest_timer.setInterval(self.SUGGEST_DELAY_MS)
+        self._suggest_timer.timeout.connect(self._updateSuggestion)
+        self._validate_timer = QTimer(self)
+        self._validate_timer.setSingleShot(True)
+        self._validate_timer.setInterval(self.VALIDATE_DELAY_MS)
+        self._validate_timer.timeout.connect(self.validate_json)
+        self._validator.scanned.connect(self._validate_timer.start)
+        self.textChanged.connect(self._on_text_changed)
+        self._suggestion_position = -1
+        self.cursorPositionChanged.connect(self._on_cursor_moved)
 
         self._last_valid_state = None
         self.jsonValidityChanged.connect(self._on_json_validity_changed)
         self.validate_json()
 
-    def _updateSuggestion(self):
-        self.validate_json()
-        if callable(self.suggestionProvider):
-            tc = self.textCursor()
-            tc.select(QTextCursor.WordUnderCursor)
-            prefix = tc.selectedText()
-            full = self.suggestionProvider(prefix)
-            if full and full.startswith(prefix):
-                self._suggestion = full[len(prefix):]
-            else:
-                self._suggestion = ""
+    def _on_text_changed(self):
+        self._cancel_suggestion()
+        self._validate_timer.start()
+        if callable(self.suggestionProvider) and not self._large_document:
+            self._suggest_timer.start()
+
+    def set_large_document_mode(self, enabled: bool):
+        """
+        Além do que LargeTextGuard desliga, suspende as sugestões de chave, a
+        validação, o índice de delimitadores e o destaque de pares, que
+        acompanham o documento a cada tecla; ao sair do modo eles são
+        reconstruídos a partir do texto atual.
+        """
+        super().set_large_document_mode(enabled)
+        if enabled == self._large_document:
+            return
+        self._large_document = enabled
+        if enabled:
+            self._cancel_suggestion()
+            self._validate_timer.stop()
+            self._validator.suspend()
+            self._brackets.suspend()
+            self._error_selections = []
+            self._last_valid_state = None
+            self.setToolTip("")
+            self.notification_label.hide()
+            self.highlightCurrentLine()
         else:
+            self._brackets.resume()
+            self._validator.resume()
+
+    def _cancel_suggestion(self):
+        self._suggest_generation += 1
+        self._suggest_timer.stop()
+        if self._suggestion:
             self._suggestion = ""
+            self.viewport().update()
+
+    def _is_current_suggestion(self, generation: int) -> bool:
+        return generation == self._suggest_generation
+
+    def _updateSuggestion(self):
+        """Agenda em background o cálculo da sugestão para a posição atual."""
+        self._cancel_suggestion()
+        if not callable(self.suggestionProvider):
+            return
+        position = self.textCursor().position()
+        job = SuggestionRunnable(
+            self._suggest_generation, position, self.toPlainText()[:position],
+            self.suggestionProvider, self._is_current_suggestion, self._suggestion_signals
+        )
+        suggestion_pool().start(job)
+
+    def _on_suggestion_ready(self, generation: int, position: int, suggestion: str):
+        if generation != self._suggest_generation or position != self.textCursor().position():
+            return
+        self._suggestion = suggestion
+        self._suggestion_position = position
         self.viewport().update()
 
+    def _on_cursor_moved(self):
+        if self._suggestion and self.textCursor().position() != self._suggestion_position:
+            self._suggestion = ""
+            self.viewport().update()
+
     def paintEvent(self, event):
         super().paintEvent(event)
         if self._suggestion:
@@ -81,6 +273,10 @@ class JSONTextEdit(QPlainTextEdit):
         self.setTextCursor(cursor)
 
     def keyPressEvent(self, event):
+        if self._large_document:
+            # sem índice de strings, não dá para fechar delimitadores com segurança
+            super().keyPressEvent(event)
+            return
         cursor = self.textCursor()
         text = event.text()
         tab = '    '
@@ -98,7 +294,7 @@ class JSONTextEdit(QPlainTextEdit):
             new_cursor.setPosition(pos)
             self.setTextCursor(new_cursor)
             self.blockSignals(False)
-            self._updateSuggestion()
+            self._on_text_changed()
             return
 
         if event.key() == Qt.Key_Tab and self._suggestion:
@@ -146,27 +342,30 @@ class JSONTextEdit(QPlainTextEdit):
             self.notification_label.hide()
 
     def validate_json(self):
-        text = self.toPlainText()
-        self.setExtraSelections([])
-        valid, tip = True, ""
-        if text.strip():
-            try:
-                json.loads(text)
-            except json.JSONDecodeError as e:
-                valid = False
-                block = self.document().findBlockByNumber(e.lineno - 1)
-                if block.isValid():
-                    pos = block.position() + e.colno - 1
-                    c = QTextCursor(self.document())
-                    c.setPosition(pos)
-                    c.movePosition(QTextCursor.NextCharacter, QTextCursor.KeepAnchor)
-                    fmt = QTextCharFormat()
-                    fmt.setUnderlineColor(QColor("red"))
-                    fmt.setUnderlineStyle(QTextCharFormat.SpellCheckUnderline)
-                    sel = QTextEdit.ExtraSelection()
-                    sel.cursor, sel.format = c, fmt
-                    self.setExtraSelections([sel])
-                tip = f"JSON inválido: {e.msg}"
+        """
+        Atualiza o estado de validade. O JsonBlockValidator reanalisa só os
+        blocos editados desde a última chamada; enquanto ele ainda analisa
+        um documento grande em background, a validação fica para o fim.
+        """
+        if self._large_document or self._validator.is_pending():
+            return
+        error = self._validator.first_error()
+        valid, tip = error is None, ""
+        self._error_selections = []
+        if error is not None:
+            pos, msg = error
+            if pos < self.document().characterCount() - 1:
+                c = QTextCursor(self.document())
+                c.setPosition(pos)
+                c.movePosition(QTextCursor.NextCharacter, QTextCursor.KeepAnchor)
+                fmt = QTextCharFormat()
+                fmt.setUnderlineColor(QColor("red"))
+                fmt.setUnderlineStyle(QTextCharFormat.SpellCheckUnderline)
+                sel = QTextEdit.ExtraSelection()
+                sel.cursor, sel.format = c, fmt
+                self._error_selections = [sel]
+            tip = f"JSON inválido: {msg}"
+        self.highlightCurrentLine()
         self.setToolTip(tip)
         if self._last_valid_state is None or self._last_valid_state != valid:
             self._last_valid_state = valid
@@ -234,20 +433,23 @@ class JSONTextEdit(QPlainTextEdit):
         brace = self._bracket_highlight()
         if brace:
             sels.extend(brace)
+        sels.extend(self._error_selections)
         self.setExtraSelections(sels)
 
     def _bracket_highlight(self):
-        text = self.toPlainText()
+        if self._large_document:
+            return None
+        document = self.document()
         pos = self.textCursor().position()
         for idx in (pos-1, pos):
-            if 0 <= idx < len(text):
-                ch = text[idx]
+            if 0 <= idx < document.characterCount() - 1:
+                ch = document.characterAt(idx)
                 if ch in self.BRACKET_PAIRS or ch in self.BRACKET_PAIRS.values():
-                    match = self._find_matching(text, idx, ch)
+                    match = self._find_matching(idx)
                     if match is not None:
                         out = []
                         for p in (idx, match):
-                            c = QTextCursor(self.document())
+                            c = QTextCursor(document)
                             c.setPosition(p)
                             c.movePosition(QTextCursor.NextCharacter,
                                            QTextCursor.KeepAnchor)
@@ -259,42 +461,19 @@ class JSONTextEdit(QPlainTextEdit):
                         return out
         return None
 
-    def _find_matching(self, text, index, ch):
-        opens = '([{'
-        closes = ')]}'
-        pairs = self.BRACKET_PAIRS
-        rev = {v: k for k, v in pairs.items()}
-        if ch in opens:
-            stack, match = 1, pairs[ch]
-            for i in range(index+1, len(text)):
-                if text[i] == ch: stack += 1
-                if text[i] == match: stack -= 1
-                if stack == 0: return i
-        elif ch in closes:
-            stack, open_ch = 1, rev[ch]
-            for i in range(index-1, -1, -1):
-                if text[i] == ch: stack += 1
-                if text[i] == open_ch: stack -= 1
-                if stack == 0: return i
-        return None
+    def _find_matching(self, index):
+        """Par do delimitador em `index` pelo índice estrutural (ignora strings)."""
+        if self._large_document:
+            return None
+        return self._brackets.match(index)
 
     def _is_inside_string(self, pos=None) -> bool:
         """
         Retorna True se a posição estiver dentro de um literal de string JSON.
-        Conta aspas não-escapadas até pos.
+        Consulta só os spans de string da linha no índice estrutural.
         """
         if pos is None:
             pos = self.textCursor().position()
-        txt = self.toPlainText()[:pos]
-        count = 0
-        escaped = False
-        for ch in txt:
-            if ch == '\\' and not escaped:
-                escaped = True
-                continue
-            if ch == '"' and not escaped:
-                count += 1
-            escaped = False
-        return (count % 2) == 1
-
-
+        if self._large_document:
+            return False
+        return self._brackets.is_inside_string(pos)
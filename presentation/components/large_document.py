@@ -0,0 +1,329 @@
+import json
+import logging
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtWidgets import QHBoxLayout, QLabel, QPlainTextEdit, QPushButton, QStackedWidget, QTreeView, \
+    QVBoxLayout, QWidget
+
+logger = logging.getLogger(__name__)
+
+
+class LargeTextGuard:
+    """
+    Mixin para editores de texto: colagens e drops passam por pasteFilter
+    (editor, texto colado) -> bool antes de chegar ao documento; se ele
+    retornar True, o texto não é inserido no editor.
+    """
+    pasteFilter = None
+
+    def insertFromMimeData(self, source):
+        paste_filter = self.pasteFilter
+        if callable(paste_filter) and source.hasText() and paste_filter(self, source.text()):
+            return
+        super().insertFromMimeData(source)
+
+    def set_large_document_mode(self, enabled: bool):
+        """Sem quebra de linha nem pilha de undo, que custam caro em textos enormes."""
+        self.setLineWrapMode(QPlainTextEdit.NoWrap if enabled else QPlainTextEdit.WidgetWidth)
+        self.setUndoRedoEnabled(not enabled)
+
+
+class PlainTextEdit(LargeTextGuard, QPlainTextEdit):
+    """QPlainTextEdit com a proteção contra colagens grandes."""
+
+
+def _utf16_splice(text: str, start: int, end: int, insert: str) -> str:
+    """Substitui text[start:end] usando posições em unidades UTF-16, como as do Qt."""
+    if text.isascii():
+        return text[:start] + insert + text[end:]
+    data = text.encode("utf-16-le")
+    return data[:start * 2].decode("utf-16-le") + insert + data[end * 2:].decode("utf-16-le")
+
+
+class _JsonNode:
+    __slots__ = ("key", "value", "parent", "row", "children", "_items")
+
+    def __init__(self, key, value, parent=None, row=0):
+        self.key = key
+        self.value = value
+        self.parent = parent
+        self.row = row
+        self.children = []
+        self._items = None
+
+    @property
+    def items(self) -> list:
+        if self._items is None:
+            if isinstance(self.value, dict):
+                self._items = list(self.value.items())
+            elif isinstance(self.value, list):
+                self._items = list(enumerate(self.value))
+            else:
+                self._items = []
+        return self._items
+
+    def has_children(self) -> bool:
+        return isinstance(self.value, (dict, list)) and bool(self.value)
+
+
+class JsonTreeModel(QAbstractItemModel):
+    """
+    Árvore somente leitura de um JSON já decodificado. Os nós são criados
+    sob demanda (canFetchMore/fetchMore), FETCH_BATCH filhos por vez, então
+    abrir um array com milhares de itens não cria milhares de linhas.
+    """
+    FETCH_BATCH = 200
+    PREVIEW_CHARS = 200
+    HEADERS = ("Chave", "Valor")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = _JsonNode(None, None)
+
+    def set_document(self, value):
+        self.beginResetModel()
+        self._root = _JsonNode(None, {"": value})
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._root = _JsonNode(None, None)
+        self.endResetModel()
+
+    def _node(self, index: QModelIndex) -> _JsonNode:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if 0 <= row < len(node.children) and 0 <= column < len(self.HEADERS):
+            return self.createIndex(row, column, node.children[row])
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        return node is self._root or node.has_children()
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return len(node.children) < len(node.items)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        start = len(node.children)
+        batch = node.items[start:start + self.FETCH_BATCH]
+        if not batch:
+            return
+        self.beginInsertRows(parent, start, start + len(batch) - 1)
+        for row, (key, value) in enumerate(batch, start):
+            node.children.append(_JsonNode(key, value, node, row))
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        node = index.internalPointer()
+        if index.column() == 0:
+            return "(raiz)" if node.parent is self._root else str(node.key)
+        value = node.value
+        if isinstance(value, dict):
+            return f"{{{len(value)} chaves}}"
+        if isinstance(value, list):
+            return f"[{len(value)} itens]"
+        text = json.dumps(value, ensure_ascii=False)
+        if len(text) > self.PREVIEW_CHARS:
+            text = text[:self.PREVIEW_CHARS] + "…"
+        return text
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+
+class JsonParseSignals(QObject):
+    parsed = pyqtSignal(int, object)  # args: geração, valor decodificado
+    failed = pyqtSignal(int, str)     # args: geração, mensagem
+
+
+class JsonParseRunnable(QRunnable):
+    """Decodifica o documento fora da thread da UI para a árvore."""
+
+    def __init__(self, generation: int, text: str, signals: JsonParseSignals):
+        super().__init__()
+        self.generation = generation
+        self.text = text
+        self.signals = signals
+
+    def run(self):
+        try:
+            value = json.loads(self.text)
+        except ValueError as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        except Exception as e:
+            logger.error(f"[JsonParseRunnable] Falha ao decodificar documento: {e}", exc_info=True)
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.parsed.emit(self.generation, value)
+
+
+_document_pool = None
+
+
+def document_pool() -> QThreadPool:
+    """Pool próprio de uma thread, para não disputar com a execução de testes."""
+    global _document_pool
+    if _document_pool is None:
+        _document_pool = QThreadPool()
+        _document_pool.setMaxThreadCount(1)
+    return _document_pool
+
+
+class LargeDocumentField(QStackedWidget):
+    """
+    Envolve um editor de texto e troca para o modo de documento grande
+    quando o conteúdo passa de LARGE_DOCUMENT_CHARS caracteres ou tem uma
+    linha com mais de LARGE_LINE_CHARS (JSON minificado, que o Qt diagrama
+    de uma vez a cada tecla), ao carregar ou ao colar. Nesse modo o texto fica só em memória: o editor não o
+    recebe, e no lugar dele aparece uma árvore JSON navegável, decodificada
+    em background só quando é exibida e com nós criados sob demanda.
+
+    "Editar mesmo assim" carrega o texto no editor com os recursos caros
+    por tecla desligados (set_large_document_mode). Use text()/setText()
+    em vez de acessar o editor diretamente.
+    """
+    LARGE_DOCUMENT_CHARS = 1_000_000
+    LARGE_LINE_CHARS = 200_000
+
+    def __init__(self, editor, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self._large_text = None
+        self._parse_generation = 0
+        self._parsed_generation = -1
+        self._parse_signals = JsonParseSignals()
+        self._parse_signals.parsed.connect(self._on_parsed)
+        self._parse_signals.failed.connect(self._on_parse_failed)
+        editor.pasteFilter = self._filter_paste
+
+        self.setMinimumHeight(editor.minimumHeight())
+        self.addWidget(editor)
+
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        layout.setContentsMargins(0, 0, 0, 0)
+        bar = QHBoxLayout()
+        self.info_label = QLabel()
+        self.info_label.setStyleSheet("color: #e3a35c;")
+        bar.addWidget(self.info_label)
+        bar.addStretch()
+        edit_btn = QPushButton("Editar mesmo assim")
+        edit_btn.setToolTip("Carrega o texto no editor sem sugestões, quebra de linha e undo (pode demorar)")
+        edit_btn.clicked.connect(self._edit_anyway)
+        bar.addWidget(edit_btn)
+        layout.addLayout(bar)
+        self.tree_model = JsonTreeModel(self)
+        self.tree = QTreeView()
+        self.tree.setModel(self.tree_model)
+        self.tree.setUniformRowHeights(True)
+        layout.addWidget(self.tree)
+        self.addWidget(panel)
+        self._panel = panel
+
+    @property
+    def is_large(self) -> bool:
+        return self._large_text is not None
+
+    @classmethod
+    def is_large_text(cls, text: str) -> bool:
+        if len(text) >= cls.LARGE_DOCUMENT_CHARS:
+            return True
+        return len(text) > cls.LARGE_LINE_CHARS and max(map(len, text.splitlines())) > cls.LARGE_LINE_CHARS
+
+    def text(self) -> str:
+        if self._large_text is not None:
+            return self._large_text
+        return self.editor.toPlainText()
+
+    def setText(self, text: str):
+        text = text or ""
+        if self.is_large_text(text):
+            self._enter_large_mode(text)
+            return
+        self._large_text = None
+        # troca o texto antes de sair do modo grande: a reconstrução dos
+        # índices do editor já é feita sobre o texto novo
+        self.editor.setPlainText(text)
+        self._set_editor_large(False)
+        self.setCurrentWidget(self.editor)
+
+    def _filter_paste(self, editor, pasted: str) -> bool:
+        if not self.is_large_text(pasted):
+            return False
+        cursor = editor.textCursor()
+        self._enter_large_mode(
+            _utf16_splice(editor.toPlainText(), cursor.selectionStart(), cursor.selectionEnd(), pasted)
+        )
+        return True
+
+    def _enter_large_mode(self, text: str):
+        self._large_text = text
+        self._parse_generation += 1
+        self.tree_model.clear()
+        self.editor.clear()
+        self.info_label.setText(
+            f"Documento grande ({len(text) / 1_000_000:.1f} M caracteres): exibido como árvore, edição desativada."
+        )
+        self.setCurrentWidget(self._panel)
+        if self.isVisible():
+            self._parse()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._parse()
+
+    def _parse(self):
+        """Decodifica em background, uma vez por texto, quando a árvore aparece."""
+        if self._large_text is None or self._parsed_generation == self._parse_generation:
+            return
+        self._parsed_generation = self._parse_generation
+        document_pool().start(JsonParseRunnable(self._parse_generation, self._large_text, self._parse_signals))
+
+    def _on_parsed(self, generation: int, value):
+        if generation != self._parse_generation or self._large_text is None:
+            return
+        self.tree_model.set_document(value)
+        self.tree.expandToDepth(0)
+
+    def _on_parse_failed(self, generation: int, message: str):
+        if generation != self._parse_generation or self._large_text is None:
+            return
+        self.info_label.setText(f"{self.info_label.text()} JSON inválido: {message}")
+
+    def _edit_anyway(self):
+        text, self._large_text = self._large_text, None
+        self._parse_generation += 1
+        self.tree_model.clear()
+        self._set_editor_large(True)
+        self.editor.setPlainText(text or "")
+        self.setCurrentWidget(self.editor)
+
+    def _set_editor_large(self, enabled: bool):
+        if hasattr(self.editor, "set_large_document_mode"):
+            self.editor.set_large_document_mode(enabled)
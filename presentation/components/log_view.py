@@ -0,0 +1,310 @@
+import threading
+from collections import deque
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, QPoint, QTimer, pyqtSignal
+from PyQt5.QtGui import QFontDatabase, QKeySequence, QPainter, QPalette
+from PyQt5.QtWidgets import QListView, QAbstractItemView, QApplication, QStyledItemDelegate
+
+
+class LogListModel(QAbstractListModel):
+    """
+    Log de execução em um buffer circular de linhas com índice por teste.
+
+    Cada linha recebe um número de sequência crescente e ocupa o slot
+    `seq % max_lines`; ao atingir o limite, as linhas mais antigas são
+    descartadas. O índice por teste guarda as sequências das linhas de cada
+    teste, então trocar o filtro é O(1) e a view só consulta as linhas
+    visíveis.
+    """
+    MAX_LINES = 200_000
+
+    def __init__(self, max_lines: int = None, parent=None):
+        super().__init__(parent)
+        self.max_lines = max_lines or self.MAX_LINES
+        self._texts = [None] * self.max_lines
+        self._tests = [None] * self.max_lines
+        self._first = 0
+        self._next = 0
+        self._index = {}
+        self._heads = {}
+        self._filter = None
+
+    # ---- buffer -------------------------------------------------------
+
+    def __len__(self):
+        return self._next - self._first
+
+    def _visible(self, test_name) -> bool:
+        return self._filter is None or test_name == self._filter
+
+    def append(self, records):
+        """
+        Adiciona entradas (test_name, texto). Entradas com várias linhas
+        viram uma linha por row, mantendo altura uniforme na view.
+        """
+        lines = [(test, line) for test, text in records for line in str(text).split("\n")]
+        if not lines:
+            return
+        if len(lines) > self.max_lines:
+            lines = lines[-self.max_lines:]
+
+        overflow = len(self) + len(lines) - self.max_lines
+        if overflow > 0:
+            self._evict(overflow)
+
+        added = sum(1 for test, _ in lines if self._visible(test))
+        if added:
+            rows = self.rowCount()
+            self.beginInsertRows(QModelIndex(), rows, rows + added - 1)
+        for test, text in lines:
+            seq = self._next
+            slot = seq % self.max_lines
+            self._texts[slot] = text
+            self._tests[slot] = test
+            self._index.setdefault(test, []).append(seq)
+            self._heads.setdefault(test, 0)
+            self._next += 1
+        if added:
+            self.endInsertRows()
+
+    def _evict(self, count: int):
+        evicted = [self._tests[seq % self.max_lines] for seq in range(self._first, self._first + count)]
+        removed = sum(1 for test in evicted if self._visible(test))
+        if removed:
+            self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+        for seq in range(self._first, self._first + count):
+            slot = seq % self.max_lines
+            self._texts[slot] = None
+            self._tests[slot] = None
+        for test in evicted:
+            self._heads[test] += 1
+        for test in set(evicted):
+            self._compact(test)
+        self._first += count
+        if removed:
+            self.endRemoveRows()
+
+    def _compact(self, test):
+        head = self._heads[test]
+        seqs = self._index[test]
+        if head == len(seqs):
+            del self._index[test]
+            del self._heads[test]
+        elif head > len(seqs) // 2:
+            del seqs[:head]
+            self._heads[test] = 0
+
+    def clear(self):
+        self.beginResetModel()
+        self._texts = [None] * self.max_lines
+        self._tests = [None] * self.max_lines
+        self._first = self._next = 0
+        self._index.clear()
+        self._heads.clear()
+        self.endResetModel()
+
+    def set_filter(self, test_name=None):
+        """Mostra só as linhas do teste informado (None = todas)."""
+        if test_name == self._filter:
+            return
+        self.beginResetModel()
+        self._filter = test_name
+        self.endResetModel()
+
+    def line(self, row: int) -> str:
+        if self._filter is None:
+            seq = self._first + row
+        else:
+            seq = self._index[self._filter][self._heads[self._filter] + row]
+        return self._texts[seq % self.max_lines]
+
+    def lines(self):
+        """Linhas visíveis com o filtro atual."""
+        return [self.line(row) for row in range(self.rowCount())]
+
+    # ---- QAbstractListModel -------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self._filter is None:
+            return len(self)
+        if self._filter not in self._index:
+            return 0
+        return len(self._index[self._filter]) - self._heads[self._filter]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            text = self.line(index.row())
+            if role == Qt.ToolTipRole and len(text) < 120:
+                return None
+            return text
+        return None
+
+
+class LogBatcher(QObject):
+    """
+    Fila thread-safe entre quem gera o log e o modelo.
+
+    put() pode ser chamado de qualquer thread: apenas enfileira a entrada e,
+    se ainda não houver entrega agendada, agenda uma na thread da UI. A
+    cada INTERVAL_MS a fila é drenada (até MAX_BATCH entradas) e entregue
+    ao modelo em um único append, ou seja, uma inserção de rows e um
+    repaint por lote em vez de um por linha.
+    """
+    INTERVAL_MS = 50
+    MAX_BATCH = 5000
+
+    _wake = pyqtSignal()
+
+    def __init__(self, model: LogListModel, interval_ms: int = None, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms or self.INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._schedule, Qt.QueuedConnection)
+
+    def put(self, test_name, text):
+        with self._lock:
+            self._queue.append((test_name, text))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake.emit()
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """Entrega ao modelo as entradas pendentes (chamado na thread da UI)."""
+        with self._lock:
+            batch = []
+            while self._queue and len(batch) < self.MAX_BATCH:
+                batch.append(self._queue.popleft())
+            more = bool(self._queue)
+            if not more:
+                self._scheduled = False
+        if batch:
+            self.model.append(batch)
+        if more:
+            self._timer.start()
+
+    def clear(self):
+        """Descarta as entradas ainda não entregues."""
+        with self._lock:
+            self._queue.clear()
+
+
+class _RowDelegate(QStyledItemDelegate):
+    """Delegate que estende a largura das linhas até a maior já exibida."""
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        size.setWidth(max(size.width(), self.parent().row_width))
+        return size
+
+
+class LogView(QListView):
+    """
+    View do log: linhas de altura uniforme (layout e pintura proporcionais
+    às linhas visíveis), rolagem automática quando já está no fim e cópia
+    das linhas selecionadas com Ctrl+C.
+
+    As linhas não são cortadas: a largura rolável acompanha a maior linha
+    que já apareceu na tela (medida só nas rows visíveis) e volta a zero
+    quando o modelo é reiniciado.
+    """
+
+    def __init__(self, model: LogListModel, parent=None):
+        super().__init__(parent)
+        self.row_width = 0
+        self._placeholder = ""
+        self.setModel(model)
+        self.setItemDelegate(_RowDelegate(self))
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setTextElideMode(Qt.ElideNone)
+        self.setWordWrap(False)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self._follow = True
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.modelReset.connect(self._reset_row_width)
+
+    def setPlaceholderText(self, text: str):
+        self._placeholder = text
+        self.viewport().update()
+
+    def placeholderText(self) -> str:
+        return self._placeholder
+
+    def _visible_rows(self):
+        rows = self.model().rowCount()
+        if not rows:
+            return range(0)
+        first = self.indexAt(QPoint(0, 0)).row()
+        last = self.indexAt(QPoint(0, self.viewport().height() - 1)).row()
+        return range(max(first, 0), (last if last >= 0 else rows - 1) + 1)
+
+    def _fit_row_width(self):
+        """Alarga as linhas se alguma row visível não couber na largura atual."""
+        option = self.viewOptions()
+        delegate = self.itemDelegate()
+        model = self.model()
+        width = max((QStyledItemDelegate.sizeHint(delegate, option, model.index(row)).width()
+                     for row in self._visible_rows()), default=0)
+        if width > self.row_width:
+            self.row_width = width
+            self.scheduleDelayedItemsLayout()
+
+    def _reset_row_width(self):
+        self.row_width = 0
+
+    def updateGeometries(self):
+        super().updateGeometries()
+        self._fit_row_width()
+
+    def _on_scrolled(self, value):
+        self._follow = value >= self.verticalScrollBar().maximum()
+        self._fit_row_width()
+
+    def _on_rows_inserted(self, *args):
+        if self._follow:
+            self.scrollToBottom()
+
+    def selected_text(self) -> str:
+        rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+        return "\n".join(self.model().line(row) for row in rows)
+
+    def copy_selection(self):
+        text = self.selected_text()
+        if text:
+            QApplication.clipboard().setText(text)
+
+    def copy_all(self):
+        QApplication.clipboard().setText("\n".join(self.model().lines()))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._placeholder and not self.model().rowCount():
+            painter = QPainter(self.viewport())
+            painter.setPen(self.palette().color(QPalette.PlaceholderText))
+            rect = self.viewport().rect().adjusted(4, 4, -4, -4)
+            painter.drawText(rect, Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap, self._placeholder)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy_selection()
+            return
+        super().keyPressEvent(event)
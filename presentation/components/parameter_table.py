@@ -1,15 +1,132 @@
+import logging
+import threading
+from collections import OrderedDict
+
 from PyQt5.QtWidgets import QTableWidget, QCheckBox, QHeaderView, QStyledItemDelegate, QLineEdit, QCompleter
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QObject, QRunnable, QStringListModel
 from PyQt5.QtWidgets import QTableWidgetItem, QAbstractItemView
 
+from presentation.components.json_text_edit import suggestion_pool
+
+logger = logging.getLogger(__name__)
+
+
+class CompleterModelCache(QObject):
+    """
+    Modelos dos completers das tabelas de parâmetros, por (tipo, método,
+    URL, chave). As listas vêm do assistente e valem enquanto a revisão dos
+    padrões aprendidos não mudar; numa revisão nova o modelo já entregue é
+    atualizado no lugar (setStringList), então editores abertos continuam
+    válidos. items() pode ser chamado de qualquer thread (prewarm);
+    model() só da thread da UI.
+    """
+    CACHE_SIZE = 256
+    PARAM_KEYS = "param_keys"
+    HEADER_KEYS = "header_keys"
+    PARAM_VALUES = "param_values"
+    HEADER_VALUES = "header_values"
+
+    def __init__(self, assist, parent=None):
+        super().__init__(parent)
+        self.assist = assist
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._models = OrderedDict()
+
+    def _fetch(self, kind: str, method: str, url: str, key: str) -> list:
+        if kind == self.PARAM_KEYS:
+            return self.assist.get_param_keys(method, url)
+        if kind == self.HEADER_KEYS:
+            return self.assist.get_header_keys(method, url)
+        if kind == self.PARAM_VALUES:
+            return self.assist.get_param_values(method, url, key)
+        return self.assist.get_header_values(method, url, key)
+
+    def items(self, kind: str, method: str, url: str, key: str = None) -> list:
+        cache_key = (kind, method, url, key)
+        revision = self.assist.revision
+        with self._lock:
+            cached = self._items.get(cache_key)
+            if cached is not None and cached[0] == revision:
+                self._items.move_to_end(cache_key)
+                return cached[1]
+        items = list(self._fetch(kind, method, url, key))
+        with self._lock:
+            self._items[cache_key] = (revision, items)
+            self._items.move_to_end(cache_key)
+            while len(self._items) > self.CACHE_SIZE:
+                self._items.popitem(last=False)
+        return items
+
+    def model(self, kind: str, method: str, url: str, key: str = None) -> QStringListModel:
+        cache_key = (kind, method, url, key)
+        items = self.items(kind, method, url, key)
+        cached = self._models.get(cache_key)
+        if cached is None:
+            model = QStringListModel(items, self)
+        else:
+            model = cached[1]
+            if cached[0] is not items:
+                model.setStringList(items)
+            self._models.move_to_end(cache_key)
+        self._models[cache_key] = (items, model)
+        while len(self._models) > self.CACHE_SIZE:
+            _, (_, evicted) = self._models.popitem(last=False)
+            evicted.deleteLater()
+        return model
+
+    def prewarm(self, method: str, url: str, param_keys: list, header_keys: list):
+        """Consulta em background as listas que as tabelas vão pedir."""
+        if not self.assist.is_loaded:
+            return
+        suggestion_pool().start(CompleterPrewarmRunnable(self, method, url, list(param_keys), list(header_keys)))
+
+
+class CompleterPrewarmRunnable(QRunnable):
+    """Preenche o CompleterModelCache fora da thread da UI."""
+
+    def __init__(self, cache: CompleterModelCache, method: str, url: str, param_keys: list, header_keys: list):
+        super().__init__()
+        self.cache = cache
+        self.method = method
+        self.url = url
+        self.param_keys = param_keys
+        self.header_keys = header_keys
+
+    def run(self):
+        cache = self.cache
+        try:
+            cache.items(cache.PARAM_KEYS, self.method, self.url)
+            cache.items(cache.HEADER_KEYS, self.method, self.url)
+            for key in self.param_keys:
+                cache.items(cache.PARAM_VALUES, self.method, self.url, key)
+            for key in self.header_keys:
+                cache.items(cache.HEADER_VALUES, self.method, self.url, key)
+        except Exception as e:
+            logger.error(f"[CompleterPrewarmRunnable] Falha ao antecipar sugestões: {e}", exc_info=True)
+
+
+_completer_models = None
+
+
+def completer_models(assist) -> CompleterModelCache:
+    """Cache compartilhado por todos os cards (o assistente é único no processo)."""
+    global _completer_models
+    if _completer_models is None or _completer_models.assist is not assist:
+        _completer_models = CompleterModelCache(assist)
+    return _completer_models
+
+
 class CompleterDelegate(QStyledItemDelegate):
     def __init__(self, items: list[str], parent=None):
         super().__init__(parent)
         self.items = items
+        self.model = QStringListModel(items, self)
 
     def createEditor(self, parent, option, index):
         editor = QLineEdit(parent)
-        completer = QCompleter(self.items, editor)
+        completer = QCompleter(editor)
+        completer.setModel(self.model)
         completer.setCaseSensitivity(Qt.CaseInsensitive)
         completer.setCompletionMode(QCompleter.PopupCompletion)
         completer.setWidget(editor)
@@ -22,16 +139,15 @@ class DynamicCompleterDelegate(QStyledItemDelegate):
         self.screen = screen
         self.for_params = for_params
         self.assist_ctrl = screen.assist_ctrl
+        self.models = completer_models(screen.assist_ctrl)
 
     def createEditor(self, parent, option, index):
         editor = QLineEdit(parent)
         method = self.screen.method_combo.currentText()
         url    = self.screen.url_input.text().strip()
-        if self.for_params:
-            items = self.assist_ctrl.get_param_keys(method, url)
-        else:
-            items = self.assist_ctrl.get_header_keys(method, url)
-        completer = QCompleter(items, editor)
+        kind = CompleterModelCache.PARAM_KEYS if self.for_params else CompleterModelCache.HEADER_KEYS
+        completer = QCompleter(editor)
+        completer.setModel(self.models.model(kind, method, url))
         completer.setCaseSensitivity(Qt.CaseInsensitive)
         completer.setCompletionMode(QCompleter.PopupCompletion)
         editor.setCompleter(completer)
@@ -44,6 +160,7 @@ class DynamicValueDelegate(QStyledItemDelegate):
         self.screen = screen
         self.for_params = for_params
         self.assist = screen.assist_ctrl
+        self.models = completer_models(screen.assist_ctrl)
 
     def createEditor(self, parent, option, index):
         editor = QLineEdit(parent)
@@ -56,12 +173,9 @@ class DynamicValueDelegate(QStyledItemDelegate):
                 self.screen.headers_table.item(row, 1).text()
               )
 
-        if self.for_params:
-            items = self.assist.get_param_values(method, url, key)
-        else:
-            items = self.assist.get_header_values(method, url, key)
-
-        completer = QCompleter(items, editor)
+        kind = CompleterModelCache.PARAM_VALUES if self.for_params else CompleterModelCache.HEADER_VALUES
+        completer = QCompleter(editor)
+        completer.setModel(self.models.model(kind, method, url, key))
         completer.setCaseSensitivity(Qt.CaseInsensitive)
         completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
         editor.setCompleter(completer)
@@ -1,6 +1,5 @@
 import statistics
 import time
-import requests
 from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
 from PyQt5.QtWidgets import (
@@ -11,6 +10,7 @@ from PyQt5.QtWidgets import (
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+from services.request_timing import PHASES, PHASE_LABELS, measure, summarize_timings, timed_session
 from utils.requests import join_url
 
 
@@ -84,7 +84,9 @@ class PerformanceWidget(QMainWindow):
             "<b>Latência máxima</b>: maior tempo de resposta.<br>"
             "<b>Mediana (p50)</b>: 50% das requisições estão abaixo desse valor.<br>"
             "<b>Percentil 90 (p90)</b>: 90% das requisições estão abaixo desse valor.<br>"
-            "<b>Throughput</b>: média de requisições por segundo."
+            "<b>Throughput</b>: média de requisições por segundo.<br>"
+            "<b>Fases</b>: média e p90 de DNS, conexão TCP, handshake TLS, tempo até o primeiro byte (TTFB) "
+            "e download do body. DNS/conexão/TLS só ocorrem em conexões novas."
         )
         metrics_layout.addWidget(self.metrics_label)
 
@@ -99,7 +101,9 @@ class PerformanceWidget(QMainWindow):
             "<b>Latência máxima</b>: maior tempo de resposta.<br>"
             "<b>Mediana (p50)</b>: 50% das requisições ficam abaixo desse valor.<br>"
             "<b>Percentil 90 (p90)</b>: 90% das requisições ficam abaixo desse valor.<br>"
-            "<b>Throughput</b>: média de requisições por segundo."
+            "<b>Throughput</b>: média de requisições por segundo.<br>"
+            "<b>Fases</b>: média e p90 de DNS, conexão TCP, handshake TLS, tempo até o primeiro byte (TTFB) "
+            "e download do body. DNS/conexão/TLS só ocorrem em conexões novas."
         )
         info_btn.setToolTip(info_text)
         info_btn.clicked.connect(lambda: QMessageBox.information(self, "Ajuda: Métricas de Performance", info_text))
@@ -137,7 +141,7 @@ class PerformanceWidget(QMainWindow):
         self.worker.finished.connect(self.on_finished)
         self.worker.start()
 
-    def on_finished(self, latencies: list[float]):
+    def on_finished(self, latencies: list[float], timings: list[dict]):
         # Reabilita controles
         self.progress.setVisible(False)
         self.start_btn.setEnabled(True)
@@ -174,11 +178,20 @@ class PerformanceWidget(QMainWindow):
             f"<b>Desvio-padrão:</b> {stddev:.3f}s<br>"
             f"<b>Throughput:</b> {throughput:.1f} req/s"
         )
+
+        summary = summarize_timings(timings)
+        if summary:
+            new_conns = sum(1 for t in timings if not t.get("reused"))
+            metrics += f"<br><br><b>Fases (média / p90):</b> {new_conns} conexão(ões) nova(s)<br>"
+            metrics += "<br>".join(
+                f"<b>{PHASE_LABELS[phase]}:</b> {summary[phase]['avg']:.1f} ms / {summary[phase]['p90']:.1f} ms"
+                for phase in PHASES if phase in summary
+            )
         self.metrics_label.setText(metrics)
 
 
 class PerformanceWorker(QThread):
-    finished = pyqtSignal(list)
+    finished = pyqtSignal(list, list)
 
     def __init__(self, method, url, headers, params, data, threads, ramp_up, duration):
         super().__init__()
@@ -186,24 +199,26 @@ class PerformanceWorker(QThread):
         self.threads, self.ramp_up, self.duration = threads, ramp_up, duration
 
     def run(self):
-        session = requests.Session()
+        session = timed_session()
         latencies: list[float] = []
-        end_time = time.time() + self.duration
+        timings: list[dict] = []
+        end_time = time.monotonic() + self.duration
 
         def worker_loop():
             if self.ramp_up and self.threads:
                 time.sleep(self.ramp_up / self.threads)
-            while time.time() < end_time:
-                start = time.time()
+            while time.monotonic() < end_time:
                 try:
-                    session.request(
-                        self.method, self.url,
-                        headers=self.headers,
-                        params=self.params,
-                        data=self.data,
-                        timeout=10
-                    )
-                    latencies.append(time.time() - start)
+                    with measure() as t:
+                        session.request(
+                            self.method, self.url,
+                            headers=self.headers,
+                            params=self.params,
+                            data=self.data,
+                            timeout=10
+                        )
+                    latencies.append(t.total)
+                    timings.append(t.to_dict())
                 except:
                     pass
 
@@ -214,12 +229,13 @@ class PerformanceWorker(QThread):
                     f.result()
                 except:
                     pass
-        self.finished.emit(latencies)
+        session.close()
+        self.finished.emit(latencies, timings)
 
     def _do_request(self, session):
-        start = time.time()
-        session.request(self.method, self.url,
-                        headers=self.headers,
-                        params=self.params,
-                        data=self.data)
-        return time.time() - start
+        with measure() as t:
+            session.request(self.method, self.url,
+                            headers=self.headers,
+                            params=self.params,
+                            data=self.data)
+        return t.total
@@ -1,8 +1,9 @@
+import copy
 import json
 
 from PyQt5.QtCore import Qt, QLine, QEvent
 from PyQt5.QtGui import QGuiApplication, QKeySequence, QColor, QPen, QFont
-from PyQt5.QtWidgets import QPushButton, QHBoxLayout, QWidget, QVBoxLayout, QLabel, QComboBox, QTextEdit, QCheckBox, \
+from PyQt5.QtWidgets import QPushButton, QHBoxLayout, QWidget, QVBoxLayout, QLabel, QComboBox, QCheckBox, \
     QTableWidgetItem, QLineEdit, QTableWidget, QHeaderView, QShortcut, QMessageBox, QStyledItemDelegate
 
 import qtawesome as qta
@@ -11,17 +12,43 @@ import genson
 
 from controller.request_assistant_controller import RequestsAssistantController
 from presentation.components.json_text_edit import JSONTextEdit
-from presentation.components.parameter_table import DynamicCompleterDelegate, ParameterTableWidget, DynamicValueDelegate
+from presentation.components.large_document import LargeDocumentField, PlainTextEdit
+from presentation.components.parameter_table import DynamicCompleterDelegate, ParameterTableWidget, DynamicValueDelegate, \
+    completer_models
 
 
 class CollapsibleTestWidget(QWidget):
+    """
+    Card de um teste. O cabeçalho (nome, status e ações) é criado no
+    construtor; tabelas e editores só são montados na primeira expansão e
+    preenchidos a partir da configuração vinculada por bind(). A tela
+    reaproveita as instâncias entre endpoints chamando bind() de novo.
+
+    Body, body esperado e schema ficam dentro de LargeDocumentField: o
+    texto é lido e escrito pelos campos (*_field.text()/setText()), que
+    mostram documentos muito grandes como árvore em vez de editá-los.
+    """
+
     def __init__(self, title, on_rename, on_duplicate, on_delete, on_run, parent=None):
         super().__init__(parent)
 
         main = QVBoxLayout(self)
         main.setAlignment(Qt.AlignTop)
 
-        self.assist_ctrl = RequestsAssistantController()
+        self.assist_ctrl = None
+        self.binding = 0
+        self._cfg = {}
+        self._request_target = ("GET", "")
+        self._ep_info = {}
+        self._built = False
+        self._loaded = False
+        self._callbacks = {
+            "rename": on_rename,
+            "duplicate": on_duplicate,
+            "delete": on_delete,
+            "run": on_run,
+            "collapsed": None,
+        }
 
         self.toggle_btn = QPushButton(title)
         self.toggle_btn.setCheckable(True)
@@ -30,7 +57,7 @@ class CollapsibleTestWidget(QWidget):
         self.run_btn = QPushButton(qta.icon("fa5s.play", color="green"), "")
         self.run_btn.setToolTip("Executar Teste")
         self.run_btn.setFixedSize(30, 30)
-        self.run_btn.clicked.connect(on_run)
+        self.run_btn.clicked.connect(lambda: self._callback("run"))
 
         self.status_lbl = QLabel()
 
@@ -59,15 +86,15 @@ class CollapsibleTestWidget(QWidget):
 
         header_bar = QHBoxLayout()
         header_bar.addWidget(self.toggle_btn)
-        for icon, tip, cb in (
-            ("fa5s.pencil-alt", "Renomear", on_rename),
-            ("fa5s.copy",        "Duplicar", on_duplicate),
-            ("fa5s.trash",       "Remover",  on_delete),
+        for icon, tip, key in (
+            ("fa5s.pencil-alt", "Renomear", "rename"),
+            ("fa5s.copy",        "Duplicar", "duplicate"),
+            ("fa5s.trash",       "Remover",  "delete"),
         ):
             btn = QPushButton(qta.icon(icon, color="gray"), "")
             btn.setToolTip(tip)
             btn.setFixedSize(24, 24)
-            btn.clicked.connect(cb)
+            btn.clicked.connect(lambda _=False, k=key: self._callback(k))
             header_bar.addWidget(btn)
         header_bar.addStretch(1)
 
@@ -75,6 +102,58 @@ class CollapsibleTestWidget(QWidget):
         self.content_layout = QVBoxLayout(self.content)
         self.content.setVisible(False)
 
+        main.addLayout(header_bar)
+        main.addWidget(self.content)
+
+    def bind(self, title, cfg: dict, ep_info: dict, method: str, url: str,
+             on_rename=None, on_duplicate=None, on_delete=None, on_run=None, on_collapsed=None):
+        """
+        Vincula o card a um teste. Os editores (se já montados) só são
+        repreenchidos quando o card for expandido.
+        """
+        self.binding += 1
+        self._cfg = copy.deepcopy(cfg or {})
+        self._ep_info = ep_info or {}
+        self._loaded = False
+        self._callbacks.update({
+            "rename": on_rename,
+            "duplicate": on_duplicate,
+            "delete": on_delete,
+            "run": on_run,
+            "collapsed": on_collapsed,
+        })
+
+        self.toggle_btn.blockSignals(True)
+        self.toggle_btn.setChecked(False)
+        self.toggle_btn.blockSignals(False)
+        self.toggle_btn.setText(title)
+        self.content.setVisible(False)
+        self.status_lbl.clear()
+        self.status_lbl.setStyleSheet("")
+        self.method_combo.setCurrentText(method)
+        self.url_input.setText(url)
+        # lido pelas sugestões do body, que rodam fora da thread da UI
+        self._request_target = (method, (url or "").strip())
+
+    def _callback(self, key):
+        callback = self._callbacks.get(key)
+        if callback:
+            callback()
+
+    @property
+    def is_loaded(self) -> bool:
+        """True quando os editores refletem o teste vinculado."""
+        return self._loaded
+
+    def ensure_content(self):
+        if not self._built:
+            self._build_content()
+        if not self._loaded:
+            self._load_content()
+
+    def _build_content(self):
+        self.assist_ctrl = RequestsAssistantController.instance()
+
         # 1) Query Parameters
         self.query_table = ParameterTableWidget(minimumHeight=300)
         self.query_table.setItemDelegateForColumn(1, DynamicCompleterDelegate(self, True, self.query_table))
@@ -99,8 +178,10 @@ class CollapsibleTestWidget(QWidget):
         self.body_edit = JSONTextEdit()
         self.body_edit.setPlaceholderText("Digite o corpo do teste aqui…")
         self.body_edit.setMinimumHeight(300)
+        self.body_edit.suggestionProvider = self._suggest_body_key
+        self.body_field = LargeDocumentField(self.body_edit)
         self.content_layout.addWidget(QLabel("Body:"))
-        self.content_layout.addWidget(self.body_edit)
+        self.content_layout.addWidget(self.body_field)
 
         exp_bar = QHBoxLayout()
         exp_bar.addWidget(QLabel("Status esperado:"))
@@ -109,15 +190,30 @@ class CollapsibleTestWidget(QWidget):
         exp_bar.addWidget(self.expected_status)
         self.content_layout.addLayout(exp_bar)
 
-        self.expected_body = QTextEdit()
+        self.expected_body = PlainTextEdit()
         self.expected_body.setPlaceholderText("Corpo de resposta esperado…")
         self.expected_body.setMinimumHeight(300)
+        self.expected_body_field = LargeDocumentField(self.expected_body)
         self.content_layout.addWidget(QLabel("Body esperado:"))
-        self.content_layout.addWidget(self.expected_body)
+        self.content_layout.addWidget(self.expected_body_field)
+
+        diff_bar = QHBoxLayout()
+        diff_bar.addWidget(QLabel("Ignorar no diff:"))
+        self.diff_ignore_input = QLineEdit()
+        self.diff_ignore_input.setPlaceholderText("/id, /items/*/updatedAt")
+        self.diff_ignore_input.setToolTip("Caminhos (JSON Pointer, '*' como curinga) ignorados na comparação do body")
+        diff_bar.addWidget(self.diff_ignore_input)
+        self.diff_unordered_cb = QCheckBox("Arrays sem ordem")
+        self.diff_unordered_cb.setToolTip("Compara arrays do body ignorando a ordem dos elementos")
+        diff_bar.addWidget(self.diff_unordered_cb)
+        self.content_layout.addLayout(diff_bar)
 
         self.assertions_table = ParameterTableWidget(minimumHeight=300)
         self.assertions_table.setColumnCount(3)
         self.assertions_table.setHorizontalHeaderLabels(["Tipo", "Campo/JSON Path", "Valor Esperado"])
+        self.assertions_table.horizontalHeaderItem(1).setToolTip(
+            "JSON Path em sintaxe JMESPath: items[*].id, items[?price > `10`].name, items[0:3]"
+        )
         self.assertions_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.content_layout.addWidget(QLabel("Verificações:"))
         self.content_layout.addWidget(self.assertions_table)
@@ -127,26 +223,98 @@ class CollapsibleTestWidget(QWidget):
         self.content_layout.addWidget(add_assert_btn, alignment=Qt.AlignRight)
 
         self.content_layout.addWidget(QLabel("JSON Schema:"))
-        self.schema_edit = QTextEdit()
+        self.schema_edit = PlainTextEdit()
         self.schema_edit.setPlaceholderText("Cole ou gere aqui o JSON Schema para validação…")
         self.schema_edit.setMinimumHeight(200)
-        self.content_layout.addWidget(self.schema_edit)
+        self.schema_field = LargeDocumentField(self.schema_edit)
+        self.content_layout.addWidget(self.schema_field)
 
         btn_gen_schema = QPushButton("🧬 Gerar Schema")
         btn_gen_schema.setToolTip("Gera um JSON Schema a partir do corpo do teste")
         btn_gen_schema.clicked.connect(self.generate_schema)
         self.content_layout.addWidget(btn_gen_schema, alignment=Qt.AlignRight)
 
-        main.addLayout(header_bar)
-        main.addWidget(self.content)
-
         for tbl in (self.query_table, self.headers_table, self.assertions_table):
             tbl.viewport().installEventFilter(self)
 
         self._register_shortcuts()
+        self._built = True
+
+    def _load_content(self):
+        cfg, ep_info = self._cfg, self._ep_info
+
+        self.query_table.setRowCount(0)
+        test_qparams = cfg.get("query_params", {})
+        for p in ep_info.get("query_params", []):
+            name = p['name']
+            self.add_param_row(self.query_table, name, test_qparams.get(name, ""), p.get('required', False))
+
+        self.headers_table.setRowCount(0)
+        test_headers = cfg.get("headers", {})
+        for p in ep_info.get("headers", []):
+            name = p['name']
+            self.add_param_row(self.headers_table, name, test_headers.get(name, ""), p.get('required', False))
+
+        self.body_field.setText(cfg.get("body", ""))
+        if ep_info.get("body_required", False):
+            self.body_edit.setStyleSheet("border: 2px solid #e57373;")
+            self.body_edit.setToolTip("Body obrigatório para este endpoint")
+        else:
+            self.body_edit.setStyleSheet("")
+            self.body_edit.setToolTip("")
+        self.expected_status.setCurrentText(str(cfg.get("expected_status", 200)))
+        self.expected_body_field.setText(cfg.get("expected_body", ""))
+        self.load_diff_options(cfg.get("diff_ignore_paths", []), cfg.get("diff_unordered_arrays", False))
+        self.load_assertions(cfg.get("assertions", []))
+        self.load_schema(cfg.get("json_schema", ""))
+        self._loaded = True
+
+    def collect_config(self) -> dict:
+        """Configuração do teste a partir dos editores (ou a vinculada, se nunca expandido)."""
+        if not self._loaded:
+            return copy.deepcopy(self._cfg)
+        return {
+            "description": "",
+            "headers": self._table_values(self.headers_table, only_enabled=True),
+            "query_params": self._table_values(self.query_table, only_enabled=True),
+            "body": self.body_field.text(),
+            "expected_status": self.get_expected_status(),
+            "expected_body": self.get_expected_body(),
+            "assertions": self.get_assertions(),
+            "json_schema": self.get_schema(),
+            "diff_ignore_paths": self.get_diff_ignore_paths(),
+            "diff_unordered_arrays": self.get_diff_unordered(),
+        }
+
+    def request_values(self) -> dict:
+        """Valores de query params, headers e body usados na validação de obrigatórios."""
+        if not self._loaded:
+            return {
+                "query_params": dict(self._cfg.get("query_params", {})),
+                "headers": dict(self._cfg.get("headers", {})),
+                "body": self._cfg.get("body", ""),
+            }
+        return {
+            "query_params": self._table_values(self.query_table),
+            "headers": self._table_values(self.headers_table),
+            "body": self.body_field.text(),
+        }
+
+    @staticmethod
+    def _table_values(table, only_enabled: bool = False) -> dict:
+        values = {}
+        for r in range(table.rowCount()):
+            cb = table.cellWidget(r, 0)
+            k = table.item(r, 1)
+            v = table.item(r, 2)
+            if only_enabled and not (cb and cb.isChecked()):
+                continue
+            if k and k.text():
+                values[k.text()] = v.text() if v else ""
+        return values
 
     def eventFilter(self, obj, event):
-        if event.type() == QEvent.MouseButtonDblClick:
+        if self._built and event.type() == QEvent.MouseButtonDblClick:
             for tbl in (self.query_table, self.headers_table, self.assertions_table):
                 if obj is tbl.viewport():
                     pos = event.pos()
@@ -156,8 +324,29 @@ class CollapsibleTestWidget(QWidget):
                         return True
         return super().eventFilter(obj, event)
 
+    def _suggest_body_key(self, prefix: str, parent: str) -> str:
+        # chamado em background pelo JSONTextEdit: não acessa widgets
+        if not self.assist_ctrl.is_loaded:
+            return ""
+        method, url = self._request_target
+        keys = self.assist_ctrl.suggest_body_keys(method, url, prefix, 1, parent)
+        return keys[0] if keys else ""
+
     def _toggle(self):
-        self.content.setVisible(self.toggle_btn.isChecked())
+        expanded = self.toggle_btn.isChecked()
+        if expanded:
+            self.ensure_content()
+            self._prewarm_completers()
+        self.content.setVisible(expanded)
+        if not expanded:
+            self._callback("collapsed")
+
+    def _prewarm_completers(self):
+        """Antecipa em background as listas dos completers das tabelas."""
+        method, url = self._request_target
+        completer_models(self.assist_ctrl).prewarm(
+            method, url, self._table_values(self.query_table), self._table_values(self.headers_table)
+        )
 
     def _add_row(self, table):
         """Adiciona uma nova linha na tabela especificada."""
@@ -176,7 +365,17 @@ class CollapsibleTestWidget(QWidget):
         return int(self.expected_status.currentText())
 
     def get_expected_body(self):
-        return self.expected_body.toPlainText().strip()
+        return self.expected_body_field.text().strip()
+
+    def load_diff_options(self, ignore_paths: list, unordered: bool):
+        self.diff_ignore_input.setText(", ".join(ignore_paths or []))
+        self.diff_unordered_cb.setChecked(bool(unordered))
+
+    def get_diff_ignore_paths(self) -> list[str]:
+        return [p.strip() for p in self.diff_ignore_input.text().split(",") if p.strip()]
+
+    def get_diff_unordered(self) -> bool:
+        return self.diff_unordered_cb.isChecked()
 
     def add_param_row(self, table, name, value, is_required):
         r = table.rowCount()
@@ -209,6 +408,8 @@ class CollapsibleTestWidget(QWidget):
             "Body Equals",
             "Header Equals",
             "JSON Path Equals",
+            "JSON Path Exists",
+            "JSON Path Count",
             "Regex Matches"
         ])
         self.assertions_table.setCellWidget(row, 0, combo)
@@ -293,9 +494,9 @@ class CollapsibleTestWidget(QWidget):
             table.removeRow(idx.row())
 
     def generate_schema(self):
-        """Gera um JSON Schema com base no conteúdo atual do body_edit."""
+        """Gera um JSON Schema com base no conteúdo atual do body."""
         try:
-            body_text = self.body_edit.toPlainText().strip() or "{}"
+            body_text = self.body_field.text().strip() or "{}"
             data = json.loads(body_text)
         except json.JSONDecodeError as e:
             QMessageBox.warning(self, "Erro de JSON", f"Corpo inválido:\n{e}")
@@ -304,12 +505,12 @@ class CollapsibleTestWidget(QWidget):
         builder = genson.SchemaBuilder()
         builder.add_object(data)
         schema = builder.to_schema()
-        self.schema_edit.setPlainText(json.dumps(schema, indent=2))
+        self.schema_field.setText(json.dumps(schema, indent=2))
 
     def load_schema(self, schema_str: str):
         """Carrega o schema salvo na configuração do teste."""
-        self.schema_edit.setPlainText(schema_str or "")
+        self.schema_field.setText(schema_str or "")
 
     def get_schema(self) -> str:
         """Retorna o JSON Schema atual como string."""
-        return self.schema_edit.toPlainText().strip()
\ No newline at end of file
+        return self.schema_field.text().strip()
\ No newline at end of file
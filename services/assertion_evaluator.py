@@ -0,0 +1,339 @@
+import difflib
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+from jsonschema.exceptions import SchemaError, best_match
+from jsonschema.validators import validator_for
+
+from services.json_diff import JsonDiff, format_diff
+from services.json_path import compile_path, parse_expected, values_equal, exists
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ResponseDocument:
+    """
+    Response de uma execução com o parse JSON do body feito uma única vez
+    e compartilhado entre comparação de body, verificações e schema.
+    Quando recebe o ResponseBody lido em streaming, o conteúdo completo só
+    é carregado se alguma verificação precisar dele.
+    """
+
+    def __init__(self, data: dict, body=None):
+        self.status = data.get("status", 0)
+        self.headers = data.get("headers", {}) or {}
+        self._source = body
+        self._body = None if body is not None else (data.get("body", "") or "")
+        self._json = _MISSING
+        self.json_error = None
+
+    @property
+    def body(self) -> str:
+        if self._body is None:
+            self._body = self._source.text()
+        return self._body
+
+    @property
+    def json(self):
+        if self._json is _MISSING:
+            try:
+                self._json = json.loads(self.body)
+            except (json.JSONDecodeError, TypeError) as e:
+                self._json = None
+                self.json_error = e
+        return self._json
+
+    @property
+    def has_json(self) -> bool:
+        """True se o body é um JSON válido (força o parse, se necessário)."""
+        self.json
+        return self.json_error is None
+
+
+class SchemaValidatorCache:
+    """Cache de validators Draft* por hash do schema."""
+    MAX_ENTRIES = 128
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._validators = OrderedDict()
+
+    def get(self, schema_str: str):
+        """
+        Retorna (validator, erro). O validator é construído e checado
+        uma única vez por schema.
+        """
+        key = hashlib.sha1(schema_str.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._validators.get(key)
+            if cached is not None:
+                self._validators.move_to_end(key)
+                return cached
+
+        try:
+            schema = json.loads(schema_str)
+            cls = validator_for(schema)
+            cls.check_schema(schema)
+            cached = (cls(schema), None)
+        except json.JSONDecodeError as je:
+            cached = (None, f"✖ JSON Schema inválido: {je}")
+        except SchemaError as se:
+            cached = (None, f"✖ JSON Schema inválido: {se.message}")
+
+        with self._lock:
+            self._validators[key] = cached
+            while len(self._validators) > self.MAX_ENTRIES:
+                self._validators.popitem(last=False)
+        return cached
+
+
+_schema_validators = SchemaValidatorCache()
+
+
+class CompiledAssertion:
+    def __init__(self, typ: str, target: str, expected):
+        self.type = typ
+        self.target = target
+        self.expected = expected
+        self._check = self._compile()
+
+    def _compile(self):
+        typ, target, exp_val = self.type, self.target, self.expected
+
+        if typ == "HTTP Status Equals":
+            expected_status = int(exp_val)
+            return lambda doc: doc.status == expected_status
+
+        if typ == "Body Contains":
+            needle = str(exp_val)
+            return lambda doc: needle in doc.body
+
+        if typ == "Body Equals":
+            expected_body = str(exp_val).strip()
+            return lambda doc: doc.body.strip() == expected_body
+
+        if typ == "Header Equals":
+            return lambda doc: doc.headers.get(target, "") == exp_val
+
+        if typ == "JSON Path Equals":
+            path = compile_path(target)
+            expected = parse_expected(exp_val)
+
+            def check(doc):
+                if not doc.has_json:
+                    return False
+                return values_equal(path.search(doc.json), expected, exp_val)
+            return check
+
+        if typ == "JSON Path Exists":
+            path = compile_path(target)
+            return lambda doc: doc.has_json and exists(path.search(doc.json))
+
+        if typ == "JSON Path Count":
+            path = compile_path(target)
+            expected_count = int(exp_val)
+
+            def check(doc):
+                if not doc.has_json:
+                    return False
+                result = path.search(doc.json)
+                if isinstance(result, (list, dict)):
+                    return len(result) == expected_count
+                return (0 if result is None else 1) == expected_count
+            return check
+
+        if typ == "Regex Matches":
+            pattern = re.compile(exp_val)
+            return lambda doc: pattern.search(doc.body) is not None
+
+        return lambda doc: True
+
+    def check(self, doc: ResponseDocument) -> bool:
+        return self._check(doc)
+
+
+class _InvalidAssertion:
+    def __init__(self, typ, target, expected, error):
+        self.type = typ
+        self.target = target
+        self.expected = expected
+        self.error = error
+
+    def check(self, doc):
+        return False
+
+
+class AssertionPlan:
+    """
+    Plano de verificações compilado a partir da configuração de um teste:
+    status e body esperados já normalizados, regexes pré-compiladas e
+    validator do JSON Schema reaproveitado entre execuções.
+    """
+
+    def __init__(self, test: dict):
+        try:
+            self.expected_status = int(test.get("expected_status", 200))
+        except (TypeError, ValueError):
+            self.expected_status = 200
+
+        self.expected_body = (test.get("expected_body", "") or "").strip()
+        self._expected_json = _MISSING
+        if self.expected_body:
+            try:
+                self._expected_json = json.loads(self.expected_body)
+            except json.JSONDecodeError:
+                pass
+
+        self.assertions = []
+        for a in test.get("assertions", []) or []:
+            typ = a.get("type", "")
+            target = a.get("target", "")
+            exp_val = a.get("expected", "")
+            try:
+                self.assertions.append(CompiledAssertion(typ, target, exp_val))
+            except Exception as e:
+                logger.warning(f"[AssertionPlan] Verificação '{typ}' inválida: {e}")
+                self.assertions.append(_InvalidAssertion(typ, target, exp_val, e))
+
+        self.schema_str = (test.get("json_schema", "") or "").strip()
+        self.differ = JsonDiff(
+            test.get("diff_ignore_paths", []),
+            bool(test.get("diff_unordered_arrays", False))
+        )
+
+    def evaluate(self, data: dict, body=None) -> dict:
+        """
+        Avalia o resultado de uma execução contra o plano e devolve o
+        resultado compacto enviado à UI:
+          - passed: bool geral
+          - status / expected_status / status_passed
+          - body_passed / diff: diferença entre body esperado e obtido
+          - assertion_errors: lista de falhas das verificações
+          - messages: mensagens informativas para o log (ex: schema validado)
+        """
+        doc = ResponseDocument(data, body)
+        status_passed = (doc.status == self.expected_status)
+        body_passed, diff_text = self._compare_body(doc)
+
+        assertion_errors = []
+        messages = []
+        for a in self.assertions:
+            try:
+                ok = a.check(doc)
+            except Exception as e:
+                logger.warning(f"[AssertionPlan] Erro ao avaliar verificação '{a.type}': {e}")
+                ok = False
+            if not ok:
+                assertion_errors.append(f"{a.type}: esperado '{a.expected}' em '{a.target}'")
+
+        if self.schema_str:
+            validator, schema_error = _schema_validators.get(self.schema_str)
+            if schema_error:
+                messages.append(schema_error)
+            else:
+                if not doc.has_json:
+                    messages.append(f"✖ JSON Schema inválido: {doc.json_error}")
+                else:
+                    error = best_match(validator.iter_errors(doc.json))
+                    if error is None:
+                        messages.append("✅ JSON Schema validado com sucesso")
+                    else:
+                        assertion_errors.append(f"JSON Schema Falhou: {error.message}")
+                        messages.append(f"✖ Falha JSON Schema: {error.message}")
+
+        return {
+            "passed": status_passed and body_passed and not assertion_errors,
+            "status": doc.status,
+            "expected_status": self.expected_status,
+            "status_passed": status_passed,
+            "has_expected_body": bool(self.expected_body),
+            "body_passed": body_passed,
+            "diff": diff_text,
+            "assertion_errors": assertion_errors,
+            "messages": messages,
+        }
+
+    def _compare_body(self, doc: ResponseDocument):
+        if not self.expected_body:
+            return True, ""
+
+        if self._expected_json is not _MISSING and doc.has_json:
+            if self._expected_json == doc.json:
+                return True, ""
+            changes = self.differ.compare(self._expected_json, doc.json)
+            if not changes:
+                return True, ""
+            return False, format_diff(changes)
+
+        if self.expected_body in doc.body:
+            return True, ""
+        exp_lines = self.expected_body.splitlines()
+        curr_lines = doc.body.splitlines()
+        return False, "\n".join(difflib.unified_diff(exp_lines, curr_lines, lineterm=""))
+
+
+class AssertionPlanCache:
+    """
+    Cache de planos compilados por teste. A chave é o conteúdo das
+    expectativas, então reexecuções (e loops de execução) reaproveitam o
+    plano enquanto a configuração não muda.
+    """
+    MAX_ENTRIES = 512
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plans = OrderedDict()
+
+    @staticmethod
+    def fingerprint(test: dict) -> str:
+        spec = {
+            "expected_status": test.get("expected_status", 200),
+            "expected_body": test.get("expected_body", ""),
+            "assertions": test.get("assertions", []),
+            "json_schema": test.get("json_schema", ""),
+            "diff_ignore_paths": test.get("diff_ignore_paths", []),
+            "diff_unordered_arrays": test.get("diff_unordered_arrays", False),
+        }
+        raw = json.dumps(spec, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, test: dict) -> AssertionPlan:
+        key = self.fingerprint(test)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+
+        plan = AssertionPlan(test)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.MAX_ENTRIES:
+                self._plans.popitem(last=False)
+        return plan
+
+
+_plans = AssertionPlanCache()
+
+
+def compile_plan(test: dict) -> AssertionPlan:
+    """Retorna o plano compilado (cacheado) para a configuração do teste."""
+    return _plans.get(test)
+
+
+def evaluate_test(test: dict, data: dict, body=None) -> dict:
+    """
+    Avalia o resultado de uma execução contra as expectativas do teste
+    (status, body esperado, verificações e JSON Schema).
+
+    Executado na thread do worker que fez a requisição; a UI recebe apenas
+    o resultado compacto. `body` é o ResponseBody lido em streaming;
+    sem ele, o body é lido de data["body"].
+    """
+    return compile_plan(test).evaluate(data, body)
@@ -0,0 +1,140 @@
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from difflib import SequenceMatcher
+
+
+class BaseUrlIndex:
+    """
+    Índice das URLs base conhecidas pelo learner para achar a mais parecida
+    com uma URL sem comparar contra todas.
+
+    Candidatos vêm de duas fontes:
+      - trie de segmentos de path: bases sob o prefixo mais longo em comum
+      - índice invertido de trigramas: bases que compartilham mais
+        trigramas com a URL, contando primeiro os mais raros (mais
+        discriminantes) até um orçamento fixo de postings
+    Só os candidatos são ranqueados com SequenceMatcher, então o resultado
+    segue o mesmo critério de similaridade de antes. Resultados são
+    cacheados por URL até a próxima base nova.
+    """
+    NGRAM = 3
+    MAX_CANDIDATES = 32
+    POSTING_BUDGET = 20_000
+    MIN_TRIE_DEPTH = 3
+    CACHE_SIZE = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._order = {}
+        self._grams = defaultdict(set)
+        self._trie = {}
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, base):
+        return base in self._order
+
+    def __iter__(self):
+        """Bases na ordem em que foram adicionadas."""
+        with self._lock:
+            return iter(list(self._order))
+
+    def add(self, base: str):
+        with self._lock:
+            if base in self._order:
+                return
+            self._order[base] = len(self._order)
+            for gram in self._ngrams(base):
+                self._grams[gram].add(base)
+            node = self._trie
+            for segment in base.split("/"):
+                node = node.setdefault(segment, {})
+            node.setdefault(None, set()).add(base)
+            self._cache.clear()
+
+    def best_match(self, target: str) -> str:
+        """Base conhecida mais parecida com `target` (ou o próprio target)."""
+        with self._lock:
+            if target in self._order:
+                return target
+            cached = self._cache.get(target)
+            if cached is not None:
+                self._cache.move_to_end(target)
+                return cached
+
+            best, score, best_order = target, 0.0, None
+            matcher = SequenceMatcher(None)
+            matcher.set_seq2(target)
+            for known in self._candidates(target):
+                order = self._order[known]
+                matcher.set_seq1(known)
+                # limites superiores baratos descartam a maioria dos candidatos
+                if not self._may_beat(matcher.real_quick_ratio(), score, order, best_order):
+                    continue
+                if not self._may_beat(matcher.quick_ratio(), score, order, best_order):
+                    continue
+                r = matcher.ratio()
+                if r > 0 and self._may_beat(r, score, order, best_order):
+                    best, score, best_order = known, r, order
+
+            self._cache[target] = best
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return best
+
+    @staticmethod
+    def _may_beat(value, score, order, best_order) -> bool:
+        return value > score or (value == score and best_order is not None and order < best_order)
+
+    def _candidates(self, target: str) -> list:
+        """Candidatos, os com mais trigramas em comum primeiro."""
+        if len(self._order) <= self.MAX_CANDIDATES:
+            return list(self._order)
+
+        # trigramas mais raros primeiro, até o orçamento de postings
+        postings = sorted(
+            (p for p in (self._grams.get(g) for g in self._ngrams(target)) if p),
+            key=len
+        )
+        hits = Counter()
+        budget = self.POSTING_BUDGET
+        for posting in postings:
+            if budget <= 0:
+                break
+            hits.update(posting)
+            budget -= len(posting)
+        candidates = [base for base, _ in hits.most_common(self.MAX_CANDIDATES)]
+        seen = set(candidates)
+        candidates.extend(base for base in self._trie_candidates(target) if base not in seen)
+        return candidates
+
+    def _trie_candidates(self, target: str):
+        node, depth = self._trie, 0
+        for segment in target.split("/"):
+            child = node.get(segment)
+            if child is None:
+                break
+            node, depth = child, depth + 1
+        if depth < self.MIN_TRIE_DEPTH:
+            return []
+
+        found = []
+        frontier = [node]
+        while frontier and len(found) < self.MAX_CANDIDATES:
+            next_frontier = []
+            for current in frontier:
+                for key, child in current.items():
+                    if key is None:
+                        found.extend(child)
+                    else:
+                        next_frontier.append(child)
+            frontier = next_frontier
+        return found[:self.MAX_CANDIDATES]
+
+    def _ngrams(self, text: str) -> set:
+        n = self.NGRAM
+        if len(text) <= n:
+            return {text}
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
@@ -0,0 +1,32 @@
+from collections import Counter
+
+
+class BoundedCounter(Counter):
+    """
+    Counter com no máximo `capacity` entradas (algoritmo Space-Saving).
+
+    Com o contador cheio, um valor novo substitui o de menor contagem e
+    herda essa contagem somada ao próprio peso. Os valores frequentes
+    (heavy hitters) permanecem, e a contagem de cada um é superestimada
+    no máximo pela menor contagem do contador. Valores únicos como tokens,
+    UUIDs e timestamps disputam apenas as últimas posições.
+    """
+    CAPACITY = 32
+
+    def __init__(self, iterable=None, /, capacity: int = None, **kwds):
+        self.capacity = capacity or self.CAPACITY
+        super().__init__(iterable, **kwds)
+
+    def add(self, value, weight=1):
+        if value in self or len(self) < self.capacity:
+            self[value] = self.get(value, 0) + weight
+            return
+        victim = min(self, key=self.__getitem__)
+        floor = self.pop(victim)
+        self[value] = floor + weight
+
+    def update(self, iterable=None, /, **kwds):
+        super().update(iterable, **kwds)
+        if len(self) > self.capacity:
+            for value, _ in self.most_common()[self.capacity:]:
+                del self[value]
@@ -0,0 +1,231 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    controller TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (project, controller, endpoint, name)
+);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    started_at REAL NOT NULL,
+    duration_ms REAL,
+    status_code INTEGER,
+    passed INTEGER NOT NULL,
+    error TEXT,
+    failures TEXT,
+    request TEXT,
+    body_preview TEXT,
+    body_size INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_runs_test_time ON runs (test_id, started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_time ON runs (started_at);
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+    test_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    passes INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (test_id, day)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_daily_stats_day ON daily_stats (day);
+"""
+
+
+class ExecutionHistoryService:
+    """
+    Histórico persistente (append-only) das execuções de testes em SQLite.
+
+    Cada execução vira uma linha em `runs`; `daily_stats` mantém contadores
+    de sucesso/falha por teste e dia, atualizados na mesma transação, para
+    que consultas agregadas (ex: testes instáveis) não varram o histórico.
+    """
+    STORAGE_FILE = "execution_history.db"
+    MAX_BODY_PREVIEW = 4000
+    # valores destes headers não vão para o histórico
+    SENSITIVE_HEADERS = frozenset({"authorization", "proxy-authorization", "cookie", "x-api-key"})
+
+    def __init__(self, file_path: str = None):
+        self.file_path = file_path or self.STORAGE_FILE
+        self._lock = threading.Lock()
+        self._test_ids = {}
+        self._conn = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def _test_id(self, project, controller, endpoint, name) -> int:
+        key = (project or "", controller or "", endpoint or "", name or "")
+        test_id = self._test_ids.get(key)
+        if test_id is not None:
+            return test_id
+        self._conn.execute(
+            "INSERT OR IGNORE INTO tests (project, controller, endpoint, name) VALUES (?, ?, ?, ?)", key
+        )
+        test_id = self._conn.execute(
+            "SELECT id FROM tests WHERE project = ? AND controller = ? AND endpoint = ? AND name = ?", key
+        ).fetchone()[0]
+        self._test_ids[key] = test_id
+        return test_id
+
+    def _request_summary(self, request: dict) -> dict:
+        """Requisição como vai para o histórico: body cortado no limite do preview e credenciais mascaradas."""
+        request = dict(request or {})
+        body = request.get("body")
+        if isinstance(body, (bytes, bytearray)):
+            body = bytes(body[:self.MAX_BODY_PREVIEW * 4]).decode("utf-8", errors="replace")
+        elif body is not None and not isinstance(body, str):
+            body = json.dumps(body, ensure_ascii=False, default=str)
+        if isinstance(body, str) and len(body) > self.MAX_BODY_PREVIEW:
+            body = body[:self.MAX_BODY_PREVIEW]
+        request["body"] = body
+        headers = request.get("headers")
+        if isinstance(headers, dict):
+            request["headers"] = {
+                k: "***" if str(k).lower() in self.SENSITIVE_HEADERS else v for k, v in headers.items()
+            }
+        return request
+
+    def record_run(self, project, controller, endpoint, test_name, *, started_at=None, duration_ms=None,
+                   status_code=None, passed=False, error=None, failures=None, request=None,
+                   body_preview=None, body_size=None):
+        """Registra uma execução. Erros de escrita são apenas logados."""
+        started_at = time.time() if started_at is None else started_at
+        request = self._request_summary(request)
+        if body_preview and len(body_preview) > self.MAX_BODY_PREVIEW:
+            body_preview = body_preview[:self.MAX_BODY_PREVIEW]
+        day = int(started_at // 86400)
+
+        try:
+            with self._lock, self._conn:
+                test_id = self._test_id(project, controller, endpoint, test_name)
+                self._conn.execute(
+                    "INSERT INTO runs (test_id, started_at, duration_ms, status_code, passed, error, failures,"
+                    " request, body_preview, body_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (test_id, started_at, duration_ms, status_code, int(bool(passed)), error,
+                     json.dumps(failures or [], ensure_ascii=False),
+                     json.dumps(request, ensure_ascii=False, default=str),
+                     body_preview, body_size)
+                )
+                self._conn.execute(
+                    "INSERT INTO daily_stats (test_id, day, passes, failures) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (test_id, day) DO UPDATE SET"
+                    " passes = passes + excluded.passes, failures = failures + excluded.failures",
+                    (test_id, day, int(bool(passed)), int(not passed))
+                )
+        except sqlite3.Error as e:
+            self._test_ids.clear()
+            logger.error(f"[ExecutionHistoryService] Falha ao gravar execução de '{test_name}': {e}")
+
+    def record_result(self, context: dict, request: dict, data: dict = None, error: str = None,
+                      started_at: float = None, duration_ms: float = None):
+        """
+        Registra o resultado de um worker: `data` é o payload emitido para a
+        UI (status, preview do body e avaliação); `error` indica falha na
+        execução da requisição.
+        """
+        data = data or {}
+        evaluation = data.get("evaluation") or {}
+        failures = []
+        if data and evaluation:
+            if not evaluation.get("status_passed", True):
+                failures.append(
+                    f"Status esperado: {evaluation.get('expected_status')}, obtido: {evaluation.get('status')}"
+                )
+            if evaluation.get("has_expected_body") and not evaluation.get("body_passed", True):
+                failures.append("Diferença no body:\n" + (evaluation.get("diff") or ""))
+            failures.extend(evaluation.get("assertion_errors", []))
+        elif data:
+            failures.append("Verificações não avaliadas")
+
+        self.record_run(
+            context.get("project"), context.get("controller"), context.get("endpoint"), context.get("name"),
+            started_at=started_at,
+            duration_ms=duration_ms,
+            status_code=data.get("status"),
+            passed=bool(evaluation.get("passed")) and not error,
+            error=error,
+            failures=failures,
+            request=request,
+            body_preview=data.get("body_preview"),
+            body_size=data.get("body_size"),
+        )
+
+    def last_runs(self, project, controller, endpoint, test_name, limit: int = 50) -> list[dict]:
+        """Últimas execuções de um teste, da mais recente para a mais antiga."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM tests WHERE project = ? AND controller = ? AND endpoint = ? AND name = ?",
+                (project, controller, endpoint, test_name)
+            ).fetchone()
+            if not row:
+                return []
+            rows = self._conn.execute(
+                "SELECT started_at, duration_ms, status_code, passed, error, failures, request, body_preview,"
+                " body_size FROM runs WHERE test_id = ? ORDER BY started_at DESC LIMIT ?",
+                (row[0], limit)
+            ).fetchall()
+        return [
+            {
+                "started_at": r[0],
+                "duration_ms": r[1],
+                "status_code": r[2],
+                "passed": bool(r[3]),
+                "error": r[4],
+                "failures": json.loads(r[5] or "[]"),
+                "request": json.loads(r[6] or "{}"),
+                "body_preview": r[7],
+                "body_size": r[8],
+            }
+            for r in rows
+        ]
+
+    def flaky_tests(self, days: int = 7, project: str = None, limit: int = 50) -> list[dict]:
+        """
+        Testes que passaram e falharam no período, ordenados pela taxa de
+        falha mais próxima de 50%. Consulta apenas os agregados diários.
+        """
+        since_day = int(time.time() // 86400) - days + 1
+        sql = (
+            "SELECT t.project, t.controller, t.endpoint, t.name, SUM(s.passes), SUM(s.failures)"
+            " FROM daily_stats s JOIN tests t ON t.id = s.test_id"
+            " WHERE s.day >= ?"
+        )
+        args = [since_day]
+        if project:
+            sql += " AND t.project = ?"
+            args.append(project)
+        sql += (
+            " GROUP BY s.test_id HAVING SUM(s.passes) > 0 AND SUM(s.failures) > 0"
+            " ORDER BY ABS(0.5 - CAST(SUM(s.failures) AS REAL) / (SUM(s.passes) + SUM(s.failures))) ASC"
+            " LIMIT ?"
+        )
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [
+            {
+                "project": r[0], "controller": r[1], "endpoint": r[2], "name": r[3],
+                "passes": r[4], "failures": r[5],
+                "failure_rate": r[5] / (r[4] + r[5]),
+            }
+            for r in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,139 +1,295 @@
 import json
+from abc import ABC, abstractmethod
+from string import Template
 
-def python_requests(tests: dict, base_url: str, ctrl_path: str, ep_path: str) -> str:
-    lines = [
-        "import requests",
-        "",
-        f"BASE_URL = '{base_url}'",
-        f"ENDPOINT = '{ctrl_path}{ep_path}'",
-        "",
-    ]
-    for name, cfg in tests.items():
-        fn = name.replace(' ', '_').lower()
-        lines.append(f"def test_{fn}():")
-        # headers
-        hdrs = cfg.get("headers", {})
-        if hdrs:
-            lines.append(f"    headers = {json.dumps(hdrs)}")
-        # params
-        params = cfg.get("query_params", {})
-        if params:
-            lines.append(f"    params = {json.dumps(params)}")
-        # body
-        body = cfg.get("body", "").strip()
-        if body:
-            lines.append(f"    data = {json.dumps(json.loads(body), indent=4)}")
-        # request
-        call = "    resp = requests.{method}(\n        BASE_URL + ENDPOINT".format(
-            method=cfg.get("method","get").lower()
-        )
-        if hdrs:   call += ", headers=headers"
-        if params: call += ", params=params"
-        if body:   call += ", json=data"
-        call += "\n    )"
-        lines.append(call)
-        # assertions
-        exp_status = cfg.get("expected_status", 200)
-        lines.append(f"    assert resp.status_code == {exp_status}")
-        exp_body = cfg.get("expected_body","").strip()
-        if exp_body:
-            lines.append(f"    assert resp.text == {exp_body!r}")
-        # custom assertions
-        for a in cfg.get("assertions", []):
-            t, target, exp = a["type"], a["target"], a["expected"]
-            if t == "Body Contains":
-                lines.append(f"    assert {exp!r} in resp.text")
-            elif t == "Header Equals":
-                lines.append(f"    assert resp.headers.get({target!r}) == {exp!r}")
-            # (adicione outros casos conforme necessário)
-        lines.append("")  # linha em branco
-    return "\n".join(lines)
+from services.json_diff import JsonDiff
 
-def node_axios(tests: dict, base_url: str, ctrl_path: str, ep_path: str) -> str:
-    lines = [
-        "const axios = require('axios');",
-        "",
-        f"const BASE_URL = '{base_url}';",
-        f"const ENDPOINT = '{ctrl_path}{ep_path}';",
-        "",
-    ]
-    for name, cfg in tests.items():
-        fn = name.replace(' ', '_')
-        lines.append(f"async function test_{fn}() {{")
-        hdrs = cfg.get("headers", {})
-        if hdrs:
-            lines.append(f"  const headers = {json.dumps(hdrs)};")
-        params = cfg.get("query_params", {})
-        if params:
-            lines.append(f"  const params = {json.dumps(params)};")
-        body = cfg.get("body","").strip()
-        if body:
-            lines.append(f"  const data = {body};")
-        call = "  const resp = await axios.{method}(\n    BASE_URL + ENDPOINT".format(
-            method=cfg.get("method","get").lower()
-        )
-        if hdrs or params or body:
-            call += ", {"
-            if hdrs:   call += "\n      headers,"
-            if params: call += "\n      params,"
-            if body:   call += "\n      data,"
-            call += "\n    }"
-        call += "\n  );"
-        lines.append(call)
-        exp_status = cfg.get("expected_status",200)
-        lines.append(f"  if (resp.status !== {exp_status}) throw new Error('Status esperado {exp_status}, obtido ' + resp.status);")
-        exp_body = cfg.get("expected_body","").strip()
-        if exp_body:
-            lines.append(f"  if (resp.data !== {json.dumps(exp_body)}) throw new Error('Body diferente');")
-        for a in cfg.get("assertions", []):
-            t,target,exp = a["type"],a["target"],a["expected"]
-            if t=="Body Contains":
-                lines.append(f"  if (!resp.data.includes({json.dumps(exp)})) throw new Error('Body não contém {exp}');")
-            elif t=="Header Equals":
-                lines.append(f"  if (resp.headers['{target}'] !== {json.dumps(exp)}) throw new Error('Header {target} != {exp}');")
+PY_NORMALIZE_HELPER = """
+def _normalize(doc, ignore=(), unordered=False, path=()):
+    \"\"\"Remove caminhos ignorados e ordena arrays quando a ordem não importa.\"\"\"
+    def ignored(p):
+        return any(len(i) == len(p) and all(a == '*' or a == str(b) for a, b in zip(i, p)) for i in ignore)
+    if isinstance(doc, dict):
+        return {k: _normalize(v, ignore, unordered, path + (k,)) for k, v in doc.items() if not ignored(path + (k,))}
+    if isinstance(doc, list):
+        items = [_normalize(v, ignore, unordered, path + (i,)) for i, v in enumerate(doc) if not ignored(path + (i,))]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True)) if unordered else items
+    return doc
+"""
+
+_MISSING = object()
+
+
+class TestIR:
+    """
+    Representação intermediária de um teste, compartilhada pelos alvos: o
+    que é caro (decodificar o body e o body esperado, montar o JsonDiff) é
+    calculado na primeira vez que algum gerador precisa e reaproveitado
+    pelos demais.
+    """
+
+    def __init__(self, name: str, cfg: dict):
+        self.name = name
+        self.method = cfg.get("method", "GET")
+        self.headers = cfg.get("headers", {})
+        self.params = cfg.get("query_params", {})
+        self.body = cfg.get("body", "").strip()
+        self.expected_status = cfg.get("expected_status", 200)
+        self.expected_body = cfg.get("expected_body", "").strip()
+        self.assertions = [(a["type"], a["target"], a["expected"]) for a in cfg.get("assertions", [])]
+        self._ignore_paths = cfg.get("diff_ignore_paths", [])
+        self._unordered = bool(cfg.get("diff_unordered_arrays", False))
+        self._body_data = _MISSING
+        self._body_error = None
+        self._expected = _MISSING
+
+    @property
+    def body_data(self):
+        """Body decodificado; levanta o mesmo JSONDecodeError a cada acesso se for inválido."""
+        if self._body_data is _MISSING and self._body_error is None:
+            try:
+                self._body_data = json.loads(self.body)
+            except json.JSONDecodeError as e:
+                self._body_error = e
+        if self._body_error is not None:
+            raise self._body_error
+        return self._body_data
+
+    @property
+    def expected_json(self):
+        """(JsonDiff, documento normalizado) quando o body esperado é JSON, senão (None, None)."""
+        if self._expected is _MISSING:
+            try:
+                expected = json.loads(self.expected_body)
+            except (json.JSONDecodeError, TypeError):
+                self._expected = (None, None)
+            else:
+                differ = JsonDiff(self._ignore_paths, self._unordered)
+                self._expected = (differ, differ.normalize(expected))
+        return self._expected
+
+    @property
+    def needs_normalize(self) -> bool:
+        differ, _ = self.expected_json
+        return bool(differ and (differ.patterns or differ.unordered_arrays))
+
+
+class EndpointIR:
+    """Testes de um endpoint com a URL já resolvida, prontos para qualquer alvo."""
+
+    def __init__(self, tests: dict, base_url: str, ctrl_path: str, ep_path: str):
+        self.base_url = base_url
+        self.path = f"{ctrl_path}{ep_path}"
+        self.tests = [TestIR(name, cfg) for name, cfg in tests.items()]
+
+    @property
+    def needs_normalize(self) -> bool:
+        return any(test.needs_normalize for test in self.tests)
+
+
+class CodeGenerator(ABC):
+    """
+    Alvo de exportação. TEMPLATES são trechos string.Template compilados uma
+    vez por alvo (na criação do gerador registrado); render() só escolhe os
+    trechos e preenche com valores da IR. A instância é compartilhada entre
+    threads, então não guarda estado de uma renderização.
+    """
+    name = ""
+    extension = ""
+    TEMPLATES = {}
+
+    def __init__(self):
+        self._templates = {key: Template(text) for key, text in self.TEMPLATES.items()}
+
+    def fill(self, key: str, /, **values) -> str:
+        return self._templates[key].substitute(values)
+
+    def render(self, endpoint: EndpointIR) -> str:
+        lines = self.header(endpoint)
+        for test in endpoint.tests:
+            lines.extend(self.test(endpoint, test))
+        return "\n".join(lines)
+
+    def header(self, endpoint: EndpointIR) -> list:
+        return self.fill("header", base_url=endpoint.base_url, path=endpoint.path).split("\n")
+
+    @abstractmethod
+    def test(self, endpoint: EndpointIR, test: TestIR) -> list:
+        """Linhas do código de um teste."""
+
+
+GENERATORS = {}
+
+
+def register_generator(cls):
+    """Registra o alvo pelo nome (decorador); a instância é única por processo."""
+    GENERATORS[cls.name] = cls()
+    return cls
+
+
+def generator(language: str) -> CodeGenerator:
+    gen = GENERATORS.get(language)
+    if gen is None:
+        raise ValueError(f"Linguagem desconhecida: {language}")
+    return gen
+
+
+def render(endpoint: EndpointIR, languages) -> dict:
+    """Código de cada linguagem a partir da mesma IR: {linguagem: código}."""
+    return {language: generator(language).render(endpoint) for language in languages}
+
+
+@register_generator
+class PythonRequestsGenerator(CodeGenerator):
+    name = "python"
+    extension = ".py"
+    TEMPLATES = {
+        "header": "import json\nimport requests\n\nBASE_URL = '$base_url'\nENDPOINT = '$path'\n",
+        "def": "def test_$fn():",
+        "headers": "    headers = $headers",
+        "params": "    params = $params",
+        "data": "    data = $data",
+        "call": "    resp = requests.$method(\n        BASE_URL + ENDPOINT$args\n    )",
+        "status": "    assert resp.status_code == $status",
+        "expected": "    expected = $expected",
+        "normalized": "    assert _normalize(resp.json(), $ignore, $unordered) == expected",
+        "json_equals": "    assert resp.json() == expected",
+        "text_equals": "    assert resp.text == $body",
+        "Body Contains": "    assert $expected in resp.text",
+        "Header Equals": "    assert resp.headers.get($target) == $expected",
+    }
+
+    def header(self, endpoint: EndpointIR) -> list:
+        lines = super().header(endpoint)
+        if endpoint.needs_normalize:
+            lines.extend(PY_NORMALIZE_HELPER.strip("\n").splitlines())
+            lines.append("")
+        return lines
+
+    def test(self, endpoint: EndpointIR, test: TestIR) -> list:
+        lines = [self.fill("def", fn=test.name.replace(' ', '_').lower())]
+        args = ""
+        if test.headers:
+            lines.append(self.fill("headers", headers=json.dumps(test.headers)))
+            args += ", headers=headers"
+        if test.params:
+            lines.append(self.fill("params", params=json.dumps(test.params)))
+            args += ", params=params"
+        if test.body:
+            lines.append(self.fill("data", data=json.dumps(test.body_data, indent=4)))
+            args += ", json=data"
+        lines.append(self.fill("call", method=test.method.lower(), args=args))
+        lines.append(self.fill("status", status=test.expected_status))
+        differ, expected = test.expected_json
+        if differ:
+            # comparação estrutural, na mesma forma usada pelo diff da UI
+            lines.append(self.fill("expected", expected=repr(expected)))
+            if differ.patterns or differ.unordered_arrays:
+                ignore = [tuple(p) for p in differ.patterns]
+                lines.append(self.fill("normalized", ignore=repr(ignore), unordered=repr(differ.unordered_arrays)))
+            else:
+                lines.append(self.fill("json_equals"))
+        elif test.expected_body:
+            lines.append(self.fill("text_equals", body=repr(test.expected_body)))
+        for typ, target, exp in test.assertions:
+            if typ in ("Body Contains", "Header Equals"):
+                lines.append(self.fill(typ, target=repr(target), expected=repr(exp)))
+        lines.append("")
+        return lines
+
+
+@register_generator
+class NodeAxiosGenerator(CodeGenerator):
+    name = "node"
+    extension = ".js"
+    TEMPLATES = {
+        "header": "const axios = require('axios');\n\nconst BASE_URL = '$base_url';\nconst ENDPOINT = '$path';\n",
+        "def": "async function test_$fn() {",
+        "headers": "  const headers = $headers;",
+        "params": "  const params = $params;",
+        "data": "  const data = $data;",
+        "call": "  const resp = await axios.$method(\n    BASE_URL + ENDPOINT$options\n  );",
+        "status": "  if (resp.status !== $status) throw new Error('Status esperado $status, obtido ' + resp.status);",
+        "text_equals": "  if (resp.data !== $body) throw new Error('Body diferente');",
+        "Body Contains": "  if (!resp.data.includes($expected_json)) throw new Error('Body não contém $expected');",
+        "Header Equals": "  if (resp.headers['$target'] !== $expected_json) throw new Error('Header $target != $expected');",
+    }
+
+    def test(self, endpoint: EndpointIR, test: TestIR) -> list:
+        lines = [self.fill("def", fn=test.name.replace(' ', '_'))]
+        options = ""
+        if test.headers:
+            lines.append(self.fill("headers", headers=json.dumps(test.headers)))
+            options += "\n      headers,"
+        if test.params:
+            lines.append(self.fill("params", params=json.dumps(test.params)))
+            options += "\n      params,"
+        if test.body:
+            lines.append(self.fill("data", data=test.body))
+            options += "\n      data,"
+        if options:
+            options = ", {" + options + "\n    }"
+        lines.append(self.fill("call", method=test.method.lower(), options=options))
+        lines.append(self.fill("status", status=test.expected_status))
+        if test.expected_body:
+            lines.append(self.fill("text_equals", body=json.dumps(test.expected_body)))
+        for typ, target, exp in test.assertions:
+            if typ in ("Body Contains", "Header Equals"):
+                lines.append(self.fill(typ, target=target, expected=exp, expected_json=json.dumps(exp)))
         lines.append("}")
         lines.append("")
-    return "\n".join(lines)
+        return lines
 
-def java_restassured(tests: dict, base_url: str, ctrl_path: str, ep_path: str) -> str:
-    lines = [
-        "import io.restassured.RestAssured;",
-        "import io.restassured.response.Response;",
-        "import static org.hamcrest.MatcherAssert.assertThat;",
-        "import static org.hamcrest.Matchers.*;",
-        "",
-        f"RestAssured.baseURI = \"{base_url}\";",
-        "",
-    ]
-    for name, cfg in tests.items():
-        fn = name.replace(' ', '_')
-        lines.append(f"public void test{fn}() {{")
-        method = cfg.get("method","GET").upper()
-        url = f"\"{ctrl_path}{ep_path}\""
-        call = f"    Response resp = RestAssured.{method.lower()}({url})"
-        # headers
-        for k,v in cfg.get("headers",{}).items():
-            call += f".header(\"{k}\", \"{v}\")"
-        # params
-        for k,v in cfg.get("query_params",{}).items():
-            call += f".queryParam(\"{k}\", \"{v}\")"
-        # body
-        body = cfg.get("body","").strip()
-        if body:
-            call += f".body({json.dumps(body)})"
-        call += ".when().request();"
-        lines.append(call)
-        exp_status = cfg.get("expected_status",200)
-        lines.append(f"    assertThat(resp.getStatusCode(), equalTo({exp_status}));")
-        exp_body = cfg.get("expected_body","").strip()
-        if exp_body:
-            lines.append(f"    assertThat(resp.getBody().asString(), equalTo({json.dumps(exp_body)}));")
-        for a in cfg.get("assertions",[]):
-            t,target,exp = a["type"],a["target"],a["expected"]
-            if t=="Body Contains":
-                lines.append(f"    assertThat(resp.getBody().asString(), containsString({json.dumps(exp)}));")
-            elif t=="Header Equals":
-                lines.append(f"    assertThat(resp.getHeader(\"{target}\"), equalTo({json.dumps(exp)}));")
+
+@register_generator
+class JavaRestAssuredGenerator(CodeGenerator):
+    name = "java"
+    extension = ".java"
+    TEMPLATES = {
+        "header": (
+            "import io.restassured.RestAssured;\n"
+            "import io.restassured.response.Response;\n"
+            "import static org.hamcrest.MatcherAssert.assertThat;\n"
+            "import static org.hamcrest.Matchers.*;\n"
+            "\n"
+            "RestAssured.baseURI = \"$base_url\";\n"
+        ),
+        "def": "public void test$fn() {",
+        "call": "    Response resp = RestAssured.$method(\"$path\")$chain.when().request();",
+        "header_arg": ".header(\"$key\", \"$value\")",
+        "param_arg": ".queryParam(\"$key\", \"$value\")",
+        "body_arg": ".body($body)",
+        "status": "    assertThat(resp.getStatusCode(), equalTo($status));",
+        "text_equals": "    assertThat(resp.getBody().asString(), equalTo($body));",
+        "Body Contains": "    assertThat(resp.getBody().asString(), containsString($expected));",
+        "Header Equals": "    assertThat(resp.getHeader(\"$target\"), equalTo($expected));",
+    }
+
+    def test(self, endpoint: EndpointIR, test: TestIR) -> list:
+        lines = [self.fill("def", fn=test.name.replace(' ', '_'))]
+        chain = "".join(self.fill("header_arg", key=k, value=v) for k, v in test.headers.items())
+        chain += "".join(self.fill("param_arg", key=k, value=v) for k, v in test.params.items())
+        if test.body:
+            chain += self.fill("body_arg", body=json.dumps(test.body))
+        lines.append(self.fill("call", method=test.method.lower(), path=endpoint.path, chain=chain))
+        lines.append(self.fill("status", status=test.expected_status))
+        if test.expected_body:
+            lines.append(self.fill("text_equals", body=json.dumps(test.expected_body)))
+        for typ, target, exp in test.assertions:
+            if typ in ("Body Contains", "Header Equals"):
+                lines.append(self.fill(typ, target=target, expected=json.dumps(exp)))
         lines.append("}")
         lines.append("")
-    return "\n".join(lines)
+        return lines
+
+
+def python_requests(tests: dict, base_url: str, ctrl_path: str, ep_path: str) -> str:
+    return generator("python").render(EndpointIR(tests, base_url, ctrl_path, ep_path))
+
+
+def node_axios(tests: dict, base_url: str, ctrl_path: str, ep_path: str) -> str:
+    return generator("node").render(EndpointIR(tests, base_url, ctrl_path, ep_path))
+
+
+def java_restassured(tests: dict, base_url: str, ctrl_path: str, ep_path: str) -> str:
+    return generator("java").render(EndpointIR(tests, base_url, ctrl_path, ep_path))
@@ -0,0 +1,230 @@
+import json
+from collections import defaultdict
+
+
+def escape_pointer_token(token) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def parse_path_pattern(pattern: str) -> tuple:
+    """
+    Converte um caminho a ignorar em tupla de segmentos. Aceita JSON
+    Pointer ("/items/*/updatedAt") ou notação com pontos
+    ("items.*.updatedAt", com ou sem "$."). "*" casa qualquer segmento.
+    """
+    pattern = (pattern or "").strip()
+    if not pattern:
+        return ()
+    if pattern.startswith("/"):
+        return tuple(
+            seg.replace("~1", "/").replace("~0", "~")
+            for seg in pattern[1:].split("/")
+        )
+    if pattern.startswith("$"):
+        pattern = pattern[1:].lstrip(".")
+    return tuple(seg for seg in pattern.split(".") if seg)
+
+
+def parse_ignore_paths(raw) -> list:
+    """Aceita lista ou string separada por vírgula/linhas."""
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        raw = raw.replace("\n", ",").split(",")
+    return [p.strip() for p in raw if p and p.strip()]
+
+
+class JsonDiff:
+    """
+    Diff estrutural entre dois documentos JSON já parseados.
+
+    Percorre as duas árvores uma única vez e devolve uma lista de mudanças
+    por caminho (JSON Pointer):
+      {"op": "changed" | "added" | "removed", "path": "/items/0/id",
+       "expected": ..., "actual": ...}
+
+    - ignore_paths: caminhos (com "*" como curinga) excluídos da comparação
+    - unordered_arrays: arrays comparados como multiconjuntos, casando os
+      elementos por forma canônica (hash) em vez de posição
+    """
+    MAX_CHANGES = 1000
+
+    def __init__(self, ignore_paths=(), unordered_arrays: bool = False, max_changes: int = None):
+        self.patterns = [p for p in (parse_path_pattern(x) for x in parse_ignore_paths(ignore_paths)) if p]
+        self._patterns_by_len = defaultdict(list)
+        for p in self.patterns:
+            self._patterns_by_len[len(p)].append(p)
+        self.unordered_arrays = unordered_arrays
+        self.max_changes = self.MAX_CHANGES if max_changes is None else max_changes
+
+    def is_ignored(self, path: tuple) -> bool:
+        for pattern in self._patterns_by_len.get(len(path), ()):
+            if all(p == "*" or p == str(s) for p, s in zip(pattern, path)):
+                return True
+        return False
+
+    def compare(self, expected, actual) -> list:
+        changes = []
+        self._compare(expected, actual, (), changes)
+        return changes
+
+    def _full(self, changes) -> bool:
+        return len(changes) >= self.max_changes
+
+    def _compare(self, expected, actual, path, changes):
+        if self._full(changes):
+            return
+        if self.patterns and self.is_ignored(path):
+            return
+
+        if isinstance(expected, dict) and isinstance(actual, dict):
+            for key, exp_val in expected.items():
+                if key in actual:
+                    self._compare(exp_val, actual[key], path + (key,), changes)
+                else:
+                    self._record("removed", path + (key,), exp_val, None, changes)
+            for key, act_val in actual.items():
+                if key not in expected:
+                    self._record("added", path + (key,), None, act_val, changes)
+            return
+
+        if isinstance(expected, list) and isinstance(actual, list):
+            if self.unordered_arrays:
+                self._compare_unordered(expected, actual, path, changes)
+            else:
+                for i in range(min(len(expected), len(actual))):
+                    self._compare(expected[i], actual[i], path + (i,), changes)
+                for i in range(len(actual), len(expected)):
+                    self._record("removed", path + (i,), expected[i], None, changes)
+                for i in range(len(expected), len(actual)):
+                    self._record("added", path + (i,), None, actual[i], changes)
+            return
+
+        if not _same_scalar(expected, actual):
+            self._record("changed", path, expected, actual, changes)
+
+    def _compare_unordered(self, expected, actual, path, changes):
+        # elementos iguais na mesma posição dispensam a forma canônica
+        common = min(len(expected), len(actual))
+        unmatched = [i for i in range(common) if expected[i] != actual[i]]
+        exp_idx = unmatched + list(range(common, len(expected)))
+        act_idx = unmatched + list(range(common, len(actual)))
+
+        pending = defaultdict(list)
+        for i in reversed(act_idx):
+            pending[self._canonical(actual[i], path + (i,))].append(i)
+
+        missing = []
+        for i in exp_idx:
+            bucket = pending.get(self._canonical(expected[i], path + (i,)))
+            if bucket:
+                bucket.pop()
+            else:
+                missing.append(i)
+
+        extra = sorted(i for bucket in pending.values() for i in bucket)
+        # pares remanescentes são comparados em profundidade para um diff
+        # mais preciso; o excedente vira added/removed
+        for exp_i, act_i in zip(missing, extra):
+            self._compare(expected[exp_i], actual[act_i], path + (exp_i,), changes)
+        for exp_i in missing[len(extra):]:
+            self._record("removed", path + (exp_i,), expected[exp_i], None, changes)
+        for act_i in extra[len(missing):]:
+            self._record("added", path + (act_i,), None, actual[act_i], changes)
+
+    def _canonical(self, value, path):
+        """
+        Forma canônica hashable de um valor: objetos com chaves ordenadas
+        e, com unordered_arrays, arrays com elementos em ordem de hash.
+        """
+        if isinstance(value, dict):
+            if self.patterns:
+                return (_OBJ, tuple(
+                    (k, self._canonical(value[k], path + (k,)))
+                    for k in sorted(value)
+                    if not self.is_ignored(path + (k,))
+                ))
+            return (_OBJ, tuple(sorted((k, self._canonical(v, path)) for k, v in value.items())))
+        if isinstance(value, list):
+            items = [self._canonical(v, path + (i,) if self.patterns else path) for i, v in enumerate(value)]
+            if self.unordered_arrays:
+                items.sort(key=hash)
+            return (_ARR, tuple(items))
+        if isinstance(value, bool):
+            return (_BOOL, value)
+        return value
+
+    def _record(self, op, path, expected, actual, changes):
+        if self._full(changes):
+            return
+        if self.patterns and self.is_ignored(path):
+            return
+        changes.append({
+            "op": op,
+            "path": to_pointer(path),
+            "expected": expected,
+            "actual": actual,
+        })
+
+    def normalize(self, document, path=()):
+        """
+        Remove os caminhos ignorados e, com unordered_arrays, ordena os
+        arrays pelo JSON serializado (ordem estável entre processos). Usado
+        pelos exporters para gerar o body esperado na mesma forma que o
+        código exportado normaliza a resposta.
+        """
+        if isinstance(document, dict):
+            return {
+                k: self.normalize(v, path + (k,))
+                for k, v in document.items()
+                if not (self.patterns and self.is_ignored(path + (k,)))
+            }
+        if isinstance(document, list):
+            items = [self.normalize(v, path + (i,)) for i, v in enumerate(document)
+                     if not (self.patterns and self.is_ignored(path + (i,)))]
+            if self.unordered_arrays:
+                items.sort(key=lambda v: json.dumps(v, sort_keys=True))
+            return items
+        return document
+
+
+_OBJ, _ARR, _BOOL = "object", "array", "bool"
+
+
+def _same_scalar(a, b) -> bool:
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    return type(a) is type(b) and a == b
+
+
+def to_pointer(path: tuple) -> str:
+    if not path:
+        return "/"
+    return "/" + "/".join(escape_pointer_token(p) for p in path)
+
+
+def _render(value, limit: int = 200) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def format_diff(changes: list, limit: int = 50) -> str:
+    """Formata as mudanças em texto para o log (uma linha por caminho)."""
+    lines = []
+    for change in changes[:limit]:
+        op, path = change["op"], change["path"]
+        if op == "changed":
+            lines.append(f"~ {path}: esperado {_render(change['expected'])}, obtido {_render(change['actual'])}")
+        elif op == "removed":
+            lines.append(f"- {path}: ausente na resposta (esperado {_render(change['expected'])})")
+        else:
+            lines.append(f"+ {path}: inesperado {_render(change['actual'])}")
+    if len(changes) > limit:
+        lines.append(f"… mais {len(changes) - limit} diferença(s)")
+    return "\n".join(lines)
+
+
+def diff_json(expected, actual, ignore_paths=(), unordered_arrays: bool = False) -> list:
+    return JsonDiff(ignore_paths, unordered_arrays).compare(expected, actual)
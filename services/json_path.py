@@ -0,0 +1,98 @@
+import json
+import re
+from functools import lru_cache
+
+import jmespath
+from jmespath.exceptions import JMESPathError
+
+_SIMPLE_DOTTED = re.compile(r"^[^.\[\]?*@`'\"|&!=<>(){}]+(\.[^.\[\]?*@`'\"|&!=<>(){}]+)*$")
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class JsonPathError(ValueError):
+    pass
+
+
+class CompiledPath:
+    """
+    Expressão de caminho compilada uma única vez e avaliada contra o
+    documento JSON já parseado.
+
+    A sintaxe é JMESPath (wildcards, filtros, slicing, projeções):
+      items[*].id
+      items[?price > `10`].name
+      items[0:3]
+    O formato legado com pontos (ex: "data.items.0.id") e o prefixo "$."
+    continuam aceitos e são convertidos para JMESPath.
+    """
+
+    def __init__(self, expression: str):
+        self.source = expression
+        self.expression = to_jmespath(expression)
+        try:
+            self._compiled = jmespath.compile(self.expression)
+        except JMESPathError as e:
+            raise JsonPathError(f"Expressão inválida '{expression}': {e}") from e
+
+    def search(self, document):
+        return self._compiled.search(document)
+
+
+def to_jmespath(expression: str) -> str:
+    """Normaliza o prefixo "$" do JSONPath e a notação legada com pontos."""
+    expr = (expression or "").strip()
+    if expr == "$":
+        return "@"
+    if expr.startswith("$."):
+        expr = expr[2:]
+    elif expr.startswith("$["):
+        expr = expr[1:]
+
+    if not _SIMPLE_DOTTED.match(expr):
+        return expr
+
+    parts = []
+    for segment in expr.split("."):
+        segment = segment.strip()
+        if segment.isdigit():
+            parts.append(f"[{segment}]")
+        elif _IDENTIFIER.match(segment):
+            parts.append(("." if parts else "") + segment)
+        else:
+            parts.append(("." if parts else "") + json.dumps(segment))
+    return "".join(parts)
+
+
+@lru_cache(maxsize=1024)
+def compile_path(expression: str) -> CompiledPath:
+    return CompiledPath(expression)
+
+
+def parse_expected(raw):
+    """
+    Converte o valor esperado digitado na tabela para o tipo JSON
+    correspondente (número, bool, null, lista, objeto). Texto que não é
+    JSON válido é mantido como string.
+    """
+    if not isinstance(raw, str):
+        return raw
+    text = raw.strip()
+    if not text:
+        return raw
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return raw
+
+
+def values_equal(actual, expected, raw) -> bool:
+    """Comparação tipada, aceitando também a forma textual do valor esperado."""
+    if isinstance(actual, bool) != isinstance(expected, bool):
+        return isinstance(actual, str) and actual == raw
+    if actual == expected:
+        return True
+    return isinstance(actual, str) and actual == raw
+
+
+def exists(result) -> bool:
+    return result is not None and result != []
@@ -0,0 +1,134 @@
+import json
+
+# estruturas método -> chave -> Counter(valor)
+NESTED_KINDS = ("hdr_counts", "prm_counts", "body_value_counts", "body_path_counts")
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+
+    def id(self, text) -> int:
+        text = str(text)
+        sid = self._ids.get(text)
+        if sid is None:
+            sid = self._ids[text] = len(self.strings)
+            self.strings.append(text)
+        return sid
+
+
+def _compact_count(count):
+    """Contagens com peso de decaimento são floats; 10 dígitos bastam para ordenar."""
+    if isinstance(count, float):
+        return float(f"{count:.10g}")
+    return count
+
+
+def _pack_counter(table: _StringTable, counter, out: list):
+    out.append(len(counter))
+    for value, count in counter.items():
+        out.append(table.id(value))
+        out.append(_compact_count(count))
+
+
+def _unpack_counter(strings, data, pos):
+    size = data[pos]
+    pos += 1
+    counter = {}
+    for _ in range(size):
+        counter[strings[data[pos]]] = data[pos + 1]
+        pos += 2
+    return counter, pos
+
+
+def pack_entry(entry: dict) -> str:
+    """
+    Codifica os padrões de uma base em uma string JSON compacta: cada texto
+    (método, chave, valor) vira um índice em uma tabela de strings própria
+    da base e os contadores viram listas planas de números:
+
+      nested: [método, chave, n, valor, contagem, ... (n pares), ...]
+      body_key_counts: [método, n, chave, contagem, ... (n pares), ...]
+
+    O learner guarda a string como está até a base ser usada, então só as
+    bases consultadas são decodificadas.
+    """
+    table = _StringTable()
+    packed = {"raw": list(entry.get("raw", ()))}
+    for kind in NESTED_KINDS:
+        data = []
+        for method, keys in entry.get(kind, {}).items():
+            for key, counter in keys.items():
+                data.append(table.id(method))
+                data.append(table.id(key))
+                _pack_counter(table, counter, data)
+        packed[kind] = data
+    data = []
+    for method, counter in entry.get("body_key_counts", {}).items():
+        data.append(table.id(method))
+        _pack_counter(table, counter, data)
+    packed["body_key_counts"] = data
+    packed["s"] = table.strings
+    return json.dumps(packed, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def unpack_entry(blob: str) -> dict:
+    """Inverso de pack_entry, no formato de dicts aceito por _merge."""
+    packed = json.loads(blob)
+    strings = packed["s"]
+    entry = {"raw": packed.get("raw", [])}
+    for kind in NESTED_KINDS:
+        data = packed.get(kind, [])
+        methods = {}
+        pos = 0
+        while pos < len(data):
+            method, key = strings[data[pos]], strings[data[pos + 1]]
+            counter, pos = _unpack_counter(strings, data, pos + 2)
+            methods.setdefault(method, {})[key] = counter
+        entry[kind] = methods
+    data = packed.get("body_key_counts", [])
+    methods = {}
+    pos = 0
+    while pos < len(data):
+        method = strings[data[pos]]
+        methods[method], pos = _unpack_counter(strings, data, pos + 1)
+    entry["body_key_counts"] = methods
+    return entry
+
+
+def pack_globals(key_counts: dict, value_counts: dict) -> dict:
+    """
+    Agregados globais do learner (tipo -> chave -> contagem e
+    tipo -> chave -> Counter(valor)), com uma tabela de strings comum.
+    """
+    table = _StringTable()
+    keys = {}
+    for kind, counter in key_counts.items():
+        data = []
+        _pack_counter(table, counter, data)
+        keys[kind] = data
+    values = {}
+    for kind, per_key in value_counts.items():
+        data = []
+        for key, counter in per_key.items():
+            data.append(table.id(key))
+            _pack_counter(table, counter, data)
+        values[kind] = data
+    return {"s": table.strings, "keys": keys, "values": values}
+
+
+def unpack_globals(packed: dict):
+    strings = packed.get("s", [])
+    keys = {}
+    for kind, data in packed.get("keys", {}).items():
+        keys[kind], _ = _unpack_counter(strings, data, 0)
+    values = {}
+    for kind, data in packed.get("values", {}).items():
+        per_key = {}
+        pos = 0
+        while pos < len(data):
+            key = strings[data[pos]]
+            per_key[key], pos = _unpack_counter(strings, data, pos + 1)
+        values[kind] = per_key
+    return keys, values
@@ -2,298 +2,501 @@
 import gzip
 import json
 import os
+import threading
+import time
 from collections import Counter, defaultdict, deque
-from difflib import SequenceMatcher
 from typing import List
 
+from services.base_index import BaseUrlIndex
+from services.bounded_counter import BoundedCounter
+from services.json_diff import escape_pointer_token
+from services.pattern_codec import pack_entry, pack_globals, unpack_entry, unpack_globals
+from services.pattern_store import PatternEventLog
+from services.prefix_index import PrefixIndex
+
+_EMPTY_ENTRY = {
+    "raw": (),
+    "hdr_counts": {},
+    "prm_counts": {},
+    "body_key_counts": {},
+    "body_value_counts": {},
+    "body_path_counts": {},
+}
+
+# referência fixa dos pesos de decaimento (2024-01-01 UTC)
+DECAY_EPOCH = 1_704_067_200
+
+
+def _scaled(counts: dict, scale: float) -> dict:
+    if scale == 1:
+        return counts
+    return {value: count * scale for value, count in counts.items()}
+
 
 class LocalRequestPatternLearner:
     STORAGE_FILE = "requests_patterns.json"
+    EVENTS_FILE = "requests_patterns.events.jsonl"
     MAX_RAW_ENTRIES = 50
-
-    def __init__(self):
+    # valores distintos guardados por chave (por base/método e no agregado global)
+    VALUE_CAPACITY = 32
+    GLOBAL_VALUE_CAPACITY = 128
+    # uma observação vale metade da de agora após HALF_LIFE_DAYS
+    HALF_LIFE_DAYS = 30
+    # limites do aprendizado do body: payloads maiores são aprendidos em parte
+    MAX_BODY_CHARS = 1_000_000
+    MAX_BODY_DEPTH = 8
+    MAX_BODY_NODES = 2_000
+    MAX_ARRAY_ITEMS = 20
+
+    def __init__(self, autoload: bool = True, persist: bool = True):
+        """
+        persist=False cria um learner só em memória, que não lê nem grava os
+        arquivos de padrões (usado quando a carga falha, para não compactar
+        um estado vazio por cima do histórico).
+        """
         self.patterns = defaultdict(lambda: {
             "raw": deque(maxlen=self.MAX_RAW_ENTRIES),
-            "hdr_counts": defaultdict(lambda: defaultdict(Counter)),
-            "prm_counts": defaultdict(lambda: defaultdict(Counter)),
+            "hdr_counts": defaultdict(lambda: defaultdict(self._value_counter)),
+            "prm_counts": defaultdict(lambda: defaultdict(self._value_counter)),
             "body_key_counts": defaultdict(Counter),
-            "body_value_counts": defaultdict(lambda: defaultdict(Counter)),
+            "body_value_counts": defaultdict(lambda: defaultdict(self._value_counter)),
+            # método -> JSON pointer do objeto -> Counter(chave)
+            "body_path_counts": defaultdict(lambda: defaultdict(Counter)),
         })
-
-        gz_path = self.STORAGE_FILE + ".gz"
-        self.load(gz_path)
+        self._lock = threading.RLock()
+        self._seq = 0
+        # muda a cada observação ou carga; caches de sugestões comparam com ele
+        self._revision = 0
+        self._base_index = BaseUrlIndex()
+        # (tipo, base, método) -> PrefixIndex; (tipo, None, None) agrega tudo
+        self._key_index = {}
+        # agregados de todas as bases/métodos: tipo -> chave -> Counter(valor)
+        self._global_values = defaultdict(
+            lambda: defaultdict(lambda: BoundedCounter(capacity=self.GLOBAL_VALUE_CAPACITY))
+        )
+        self._global_key_ranking = {}
+        # base -> padrões ainda codificados (pack_entry), decodificados no primeiro uso
+        self._packed = {}
+
+        self._store = None
+        if not persist:
+            return
+        self._store = PatternEventLog.for_files(self.STORAGE_FILE + ".gz", self.EVENTS_FILE)
+        snapshot_seq, replayed = 0, 0
+        if autoload:
+            snapshot_seq, replayed = self._load_store()
+        self._store.attach(self._snapshot, snapshot_seq, replayed)
+        if replayed >= PatternEventLog.COMPACT_EVERY:
+            self._store.request_compaction()
+
+    def _load_store(self):
+        """Carrega o snapshot e reaplica os eventos registrados depois dele."""
+        snapshot_seq, version, data = self._store.read_snapshot()
+        self._load_data(version, data)
+        self._seq = snapshot_seq
+        replayed = 0
+        for event in self._store.read_events(after_seq=snapshot_seq):
+            self._apply(event.get("method", ""), event.get("url", ""), event.get("headers") or {},
+                        event.get("params") or {}, event.get("body"), event.get("ts"))
+            self._seq = max(self._seq, event.get("seq", 0))
+            replayed += 1
+        return snapshot_seq, replayed
 
     def load(self, file_path: str):
         """Carrega os padrões de requisições de um arquivo JSON."""
         if os.path.exists(file_path):
             with gzip.open(file_path, "rt", encoding="utf-8") as f:
-                data = json.load(f)
+                _, version, data = PatternEventLog.parse_snapshot(json.load(f))
+            self._load_data(version, data)
+
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    def _load_data(self, version: int, data):
+        if not data:
+            return
+        self._revision += 1
+        # formatos sem decaimento: as contagens valem como observações de agora
+        scale = 1.0 if version >= 4 else self._weight()
+        if version >= 3:
+            self._load_packed(data, scale)
+        else:
+            self._merge(data, scale=scale)
+
+    def _load_packed(self, data: dict, scale: float = 1.0):
+        """
+        Carrega só os agregados globais e o índice de bases; os padrões de
+        cada base ficam codificados até serem usados (_hydrate).
+        """
+        with self._lock:
+            key_counts, value_counts = unpack_globals(data.get("globals", {}))
+            for kind, counts in key_counts.items():
+                index = self._key_index_for((kind, None, None))
+                for key, count in counts.items():
+                    index.add(key, count * scale)
+                self._global_key_ranking.pop(kind, None)
+            for kind, per_key in value_counts.items():
+                for key, counter in per_key.items():
+                    self._global_values[kind][key].update(_scaled(counter, scale))
+
+            for base, blob in data.get("bases", {}).items():
+                if base in self.patterns or base in self._packed:
+                    self._merge({base: unpack_entry(blob)}, aggregate=False, scale=scale)
+                else:
+                    self._packed[base] = (blob, scale)
+                    self._base_index.add(base)
+
+    def _hydrate(self, base: str):
+        if base not in self._packed:
+            return
+        with self._lock:
+            packed = self._packed.pop(base, None)
+            if packed is not None:
+                blob, scale = packed
+                self._merge({base: unpack_entry(blob)}, aggregate=False, scale=scale)
+
+    def _merge(self, data: dict, aggregate: bool = True, scale: float = 1.0):
+        """
+        Soma os padrões de `data` aos da memória, com as contagens
+        multiplicadas por `scale`. aggregate=False quando os agregados
+        globais já incluem esses padrões (bases vindas do snapshot).
+        """
+        with self._lock:
             for base, entry in data.items():
+                self._hydrate(base)
                 patt = self.patterns[base]
+                self._base_index.add(base)
                 patt["raw"].extend(entry.get("raw", []))
                 for method, hdrs in entry.get("hdr_counts", {}).items():
                     for key, counts in hdrs.items():
+                        counts = _scaled(counts, scale)
                         patt["hdr_counts"][method][key].update(counts)
+                        if aggregate:
+                            self._global_values["hdr_counts"][key].update(counts)
+                        self._index_key("hdr_counts", base, method, key, sum(counts.values()), aggregate)
                 for method, prms in entry.get("prm_counts", {}).items():
                     for key, counts in prms.items():
+                        counts = _scaled(counts, scale)
                         patt["prm_counts"][method][key].update(counts)
+                        if aggregate:
+                            self._global_values["prm_counts"][key].update(counts)
+                        self._index_key("prm_counts", base, method, key, sum(counts.values()), aggregate)
                 for method, counts in entry.get("body_key_counts", {}).items():
-                    self.patterns[base]["body_key_counts"][method].update(counts)
+                    counts = _scaled(counts, scale)
+                    patt["body_key_counts"][method].update(counts)
+                    for key, count in counts.items():
+                        self._index_key("body_key_counts", base, method, key, count, aggregate)
                 for method, values in entry.get("body_value_counts", {}).items():
                     for key, cnts in values.items():
+                        cnts = _scaled(cnts, scale)
                         patt["body_value_counts"][method][key].update(cnts)
-    def save(self):
-        serial = {}
-        for base, entry in self.patterns.items():
-            serial[base] = {
-                "raw": list(entry["raw"]),
-                "hdr_counts": {
-                    method: {key: dict(cnt) for key, cnt in keys.items()}
-                    for method, keys in entry["hdr_counts"].items()
-                },
-                "prm_counts": {
-                    method: {key: dict(cnt) for key, cnt in keys.items()}
-                    for method, keys in entry["prm_counts"].items()
-                },
-                "body_key_counts": {
-                    method: dict(cnt)
-                    for method, cnt in entry["body_key_counts"].items()
-                },
-                "body_value_counts": {
-                    method: {key: dict(cnt) for key, cnt in keys.items()}
-                    for method, keys in entry["body_value_counts"].items()
-                }
+                        if aggregate:
+                            self._global_values["body_value_counts"][key].update(cnts)
+                for method, parents in entry.get("body_path_counts", {}).items():
+                    for parent, counts in parents.items():
+                        counts = _scaled(counts, scale)
+                        patt["body_path_counts"][method][parent].update(counts)
+                        for key, count in counts.items():
+                            self._index_key(self._path_kind(parent), base, method, key, count, aggregate)
+
+    def _snapshot(self):
+        """(último seq aplicado, dados serializáveis), chamado pela thread de escrita."""
+        with self._lock:
+            bases = {}
+            for base in self._base_index:
+                packed = self._packed.get(base)
+                if packed is not None and packed[1] == 1:
+                    bases[base] = packed[0]
+                else:
+                    self._hydrate(base)
+                    bases[base] = pack_entry(self.patterns[base])
+            key_counts = {
+                kind: index.counts
+                for (kind, base, _), index in self._key_index.items()
+                if base is None
             }
+            return self._seq, {"bases": bases, "globals": pack_globals(key_counts, self._global_values),
+                               "decay_epoch": DECAY_EPOCH, "half_life_days": self.HALF_LIFE_DAYS}
 
-        with gzip.open(self.STORAGE_FILE + ".gz", "wt", encoding="utf-8") as f:
-            json.dump(serial, f, indent=2)
-
+    def save(self):
+        """Compacta imediatamente o log de eventos no snapshot e aguarda a gravação."""
+        if self._store is None:
+            return
+        self._store.request_compaction()
+        self._store.flush()
 
     def register_request(self, method: str, url: str, headers: dict, params: dict, body: str):
+        """
+        Atualiza os padrões em memória e envia a observação ao log de
+        eventos; a gravação acontece em background.
+        """
+        ts = time.time()
+        with self._lock:
+            learned_body = self._apply(method, url, headers, params, body, ts)
+            self._seq += 1
+            # o replay só aproveita bodies JSON dentro de MAX_BODY_CHARS; os
+            # demais não vão para o disco
+            event = {"seq": self._seq, "ts": ts, "method": method, "url": url,
+                     "headers": headers, "params": params, "body": body if learned_body else None}
+        if self._store is not None:
+            self._store.append(event)
+
+    def _value_counter(self) -> BoundedCounter:
+        return BoundedCounter(capacity=self.VALUE_CAPACITY)
+
+    def _weight(self, ts: float = None) -> float:
+        """
+        Peso de uma observação feita em `ts`. Cresce 2x a cada
+        HALF_LIFE_DAYS, o que equivale a decair as contagens antigas sem
+        reescrevê-las: as contagens só aumentam, então os índices de
+        prefixo continuam exatos.
+        """
+        if ts is None:
+            ts = time.time()
+        return 2.0 ** ((ts - DECAY_EPOCH) / (self.HALF_LIFE_DAYS * 86400))
+
+    def _apply(self, method: str, url: str, headers: dict, params: dict, body: str, ts: float = None) -> bool:
+        """Aplica uma observação; retorna True se o body foi aprendido."""
+        self._revision += 1
+        weight = self._weight(ts)
         base = self.extract_base_url(url)
+        self._hydrate(base)
         patt = self.patterns[base]
+        self._base_index.add(base)
 
         patt["raw"].append({ "method": method, "headers": headers, "params": params })
 
         for key, val in headers.items():
-            patt["hdr_counts"][method][key][val] += 1
+            patt["hdr_counts"][method][key].add(val, weight)
+            self._global_values["hdr_counts"][key].add(val, weight)
+            self._index_key("hdr_counts", base, method, key, weight)
         for key, val in params.items():
-            patt["prm_counts"][method][key][val] += 1
-
+            patt["prm_counts"][method][key].add(val, weight)
+            self._global_values["prm_counts"][key].add(val, weight)
+            self._index_key("prm_counts", base, method, key, weight)
+
+        obj = self._parse_body(body)
+        if not isinstance(obj, (dict, list)):
+            return False
+        self._learn_body(patt, base, method, obj, weight)
+        return True
+
+    @classmethod
+    def _parse_body(cls, body):
+        if not body or not isinstance(body, str) or len(body) > cls.MAX_BODY_CHARS:
+            return None
         try:
-            obj = json.loads(body) if body and isinstance(body, str) else None
-            if isinstance(obj, dict):
-                for key in obj.keys():
-                    patt["body_key_counts"][method][key] += 1
-        except json.JSONDecodeError:
-            pass
+            return json.loads(body)
+        except (json.JSONDecodeError, RecursionError):
+            return None
 
-        try:
-            obj = json.loads(body) if body and isinstance(body, str) else None
-            if isinstance(obj, dict):
-                for key, val in obj.items():
-                    patt["body_key_counts"][method][key] += 1
-                    # registrar valor (string, num ou bool)
-                    if isinstance(val, (str, bool, int, float)) or val is None:
-                        patt["body_value_counts"][method][key][str(val)] += 1
-        except json.JSONDecodeError:
-            pass
+    @staticmethod
+    def _path_kind(parent: str) -> str:
+        """Escopo do índice de chaves dos objetos em `parent` (JSON pointer)."""
+        return "body_path_counts" + parent
+
+    def _learn_body(self, patt: dict, base: str, method: str, obj, weight: float):
+        """
+        Percorre o body uma única vez, em largura, até MAX_BODY_DEPTH níveis
+        e MAX_BODY_NODES nós (no máximo MAX_ARRAY_ITEMS itens por array):
+
+          - chaves do primeiro nível: body_key_counts, valores pelo nome
+          - chaves aninhadas: body_path_counts, agrupadas pelo JSON pointer
+            do objeto ("/user", "/items/*"), valores pelo pointer completo
 
-        self.save()
+        Índices de array viram "*", então todos os itens contam juntos.
+        """
+        budget = self.MAX_BODY_NODES
+        pending = deque([("", obj, 1)])
+        while pending and budget > 0:
+            pointer, node, depth = pending.popleft()
+            if isinstance(node, dict):
+                children = ((f"{pointer}/{escape_pointer_token(k)}", k, v) for k, v in node.items())
+            else:
+                children = ((f"{pointer}/*", None, v) for v in node[:self.MAX_ARRAY_ITEMS])
+
+            for child, key, val in children:
+                budget -= 1
+                if budget < 0:
+                    break
+                if key is not None:
+                    if pointer:
+                        patt["body_path_counts"][method][pointer][key] += weight
+                        self._index_key(self._path_kind(pointer), base, method, key, weight)
+                    else:
+                        patt["body_key_counts"][method][key] += weight
+                        self._index_key("body_key_counts", base, method, key, weight)
+
+                if isinstance(val, (dict, list)):
+                    if depth < self.MAX_BODY_DEPTH:
+                        pending.append((child, val, depth + 1))
+                elif isinstance(val, (str, bool, int, float)) or val is None:
+                    # registrar valor (string, num ou bool)
+                    value_key = child if pointer or key is None else key
+                    patt["body_value_counts"][method][value_key].add(str(val), weight)
+                    self._global_values["body_value_counts"][value_key].add(str(val), weight)
+
+    def _key_index_for(self, scope: tuple) -> PrefixIndex:
+        index = self._key_index.get(scope)
+        if index is None:
+            index = self._key_index[scope] = PrefixIndex()
+        return index
+
+    def _index_key(self, kind: str, base: str, method: str, key: str, amount=1, aggregate: bool = True):
+        """Soma `amount` à chave no índice da base/método e, se aggregate, no índice global."""
+        if not amount:
+            return
+        self._key_index_for((kind, base, method)).add(key, amount)
+        if aggregate:
+            self._global_key_ranking.pop(kind, None)
+            self._key_index_for((kind, None, None)).add(key, amount)
+
+    def _global_keys(self, kind: str) -> list[str]:
+        """Chaves de todas as bases e métodos, das mais frequentes para as menos."""
+        with self._lock:
+            ranking = self._global_key_ranking.get(kind)
+            if ranking is None:
+                index = self._key_index.get((kind, None, None))
+                counts = index.counts if index else {}
+                ranking = sorted(counts, key=counts.get, reverse=True)
+                self._global_key_ranking[kind] = ranking
+            return list(ranking)
+
+    def _global_value_list(self, kind: str, key: str) -> list[str]:
+        with self._lock:
+            ctr = self._global_values[kind].get(key)
+            return [val for val, _ in ctr.most_common()] if ctr else []
+
+    def _suggest_keys(self, kind: str, method: str, url: str, prefix: str, count: int) -> list[str]:
+        """
+        Top-`count` chaves com o prefixo, por frequência: primeiro na base
+        mais parecida e no método; se nenhuma casar, entre todas as bases.
+        """
+        base = self.get_most_similar_base(url)
+        self._hydrate(base)
+        with self._lock:
+            for scope in ((kind, base, method), (kind, None, None)):
+                index = self._key_index.get(scope)
+                suggestions = index.top(prefix, count) if index else []
+                if suggestions:
+                    return suggestions
+        return []
 
     def suggest_headers(self, url: str, method: str) -> dict[str, str]:
         """
         Retorna para cada header_key o valor mais frequente já registrado
         para o método e base de URL fornecidos.
         """
-        base = self.get_most_similar_base(url)
-        method_counters = self.patterns[base]["hdr_counts"].get(method, {})
-        suggestions: dict[str, str] = {}
-        for header_key, counter in method_counters.items():
-            if counter:
-                # pega o valor mais comum
-                top_value, _ = counter.most_common(1)[0]
-                suggestions[header_key] = top_value
-        return suggestions
+        with self._lock:
+            base = self.get_most_similar_base(url)
+            method_counters = self._entry(base)["hdr_counts"].get(method, {})
+            suggestions: dict[str, str] = {}
+            for header_key, counter in method_counters.items():
+                if counter:
+                    # pega o valor mais comum
+                    top_value, _ = counter.most_common(1)[0]
+                    suggestions[header_key] = top_value
+            return suggestions
 
     def suggest_params(self, url: str, method: str) -> dict[str, str]:
         """
         Retorna para cada param_key o valor mais frequente já registrado
         para o método e base de URL fornecidos.
         """
-        base = self.get_most_similar_base(url)
-        # recupera o dict param_key → Counter(valor → contagem)
-        method_counters = self.patterns[base]["prm_counts"].get(method, {})
-        suggestions: dict[str, str] = {}
-        for param_key, counter in method_counters.items():
-            if counter:
-                top_value, _ = counter.most_common(1)[0]
-                suggestions[param_key] = top_value
-        return suggestions
+        with self._lock:
+            base = self.get_most_similar_base(url)
+            # recupera o dict param_key → Counter(valor → contagem)
+            method_counters = self._entry(base)["prm_counts"].get(method, {})
+            suggestions: dict[str, str] = {}
+            for param_key, counter in method_counters.items():
+                if counter:
+                    top_value, _ = counter.most_common(1)[0]
+                    suggestions[param_key] = top_value
+            return suggestions
 
     def extract_base_url(self, url):
         return url.split("?", 1)[0].rsplit("/", 1)[0]
 
     def get_most_similar_base(self, url: str) -> str:
-        target = self.extract_base_url(url)
-        best, score = target, 0.0
-        for known in self.patterns:
-            r = SequenceMatcher(None, known, target).ratio()
-            if r > score:
-                best, score = known, r
-        return best
+        return self._base_index.best_match(self.extract_base_url(url))
 
-    def get_header_keys(self, method, url):
-        base = self.get_most_similar_base(url)
-        method_keys = self.patterns[base]["hdr_counts"].get(method, {})
+    def _entry(self, base: str) -> dict:
+        """Padrões da base sem criar entradas vazias para bases desconhecidas."""
+        self._hydrate(base)
+        return self.patterns.get(base, _EMPTY_ENTRY)
 
-        if method_keys:
-            return list(method_keys.keys())
+    def get_header_keys(self, method, url):
+        with self._lock:
+            base = self.get_most_similar_base(url)
+            method_keys = self._entry(base)["hdr_counts"].get(method, {})
 
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["hdr_counts"].items():
-                for key in keys.keys():
-                    fallback_counter[key] += sum(keys[key].values())
+            if method_keys:
+                return list(method_keys.keys())
 
-        return [k for k, _ in fallback_counter.most_common()]
+            return self._global_keys("hdr_counts")
 
     def get_param_keys(self, method, url):
-        base = self.get_most_similar_base(url)
-        method_keys = self.patterns[base]["prm_counts"].get(method, {})
+        with self._lock:
+            base = self.get_most_similar_base(url)
+            method_keys = self._entry(base)["prm_counts"].get(method, {})
 
-        if method_keys:
-            return list(method_keys.keys())
+            if method_keys:
+                return list(method_keys.keys())
 
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["prm_counts"].items():
-                for key in keys.keys():
-                    fallback_counter[key] += sum(keys[key].values())
-
-        return [k for k, _ in fallback_counter.most_common()]
+            return self._global_keys("prm_counts")
 
     def get_header_values(self, method: str, url: str, key: str) -> list[str]:
-        base = self.get_most_similar_base(url)
-        ctr = self.patterns[base]["hdr_counts"].get(method, {}).get(key, Counter())
+        with self._lock:
+            base = self.get_most_similar_base(url)
+            ctr = self._entry(base)["hdr_counts"].get(method, {}).get(key, Counter())
 
-        if ctr and sum(ctr.values()) > 0:
-            return [val for val, _ in ctr.most_common()]
+            if ctr and sum(ctr.values()) > 0:
+                return [val for val, _ in ctr.most_common()]
 
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["hdr_counts"].items():
-                if key in keys:
-                    fallback_counter.update(keys[key])
-
-        return [val for val, _ in fallback_counter.most_common()] if fallback_counter else []
+            return self._global_value_list("hdr_counts", key)
 
     def get_param_values(self, method: str, url: str, key: str) -> list[str]:
-        base = self.get_most_similar_base(url)
-        ctr = self.patterns[base]["prm_counts"].get(method, {}).get(key, Counter())
+        with self._lock:
+            base = self.get_most_similar_base(url)
+            ctr = self._entry(base)["prm_counts"].get(method, {}).get(key, Counter())
 
-        if ctr and sum(ctr.values()) > 0:
-            return [val for val, _ in ctr.most_common()]
+            if ctr and sum(ctr.values()) > 0:
+                return [val for val, _ in ctr.most_common()]
 
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["prm_counts"].items():
-                if key in keys:
-                    fallback_counter.update(keys[key])
-
-        return [val for val, _ in fallback_counter.most_common()] if fallback_counter else []
+            return self._global_value_list("prm_counts", key)
 
     def get_body_keys(self, method: str, url: str) -> List[str]:
-        base = self.get_most_similar_base(url)
-        ctr = self.patterns[base]["body_key_counts"].get(method, Counter())
-        if ctr and sum(ctr.values()) > 0:
-            return [k for k, _ in sorted(ctr.items(), key=lambda kv: -kv[1])]
+        with self._lock:
+            base = self.get_most_similar_base(url)
+            ctr = self._entry(base)["body_key_counts"].get(method, Counter())
+            if ctr and sum(ctr.values()) > 0:
+                return [k for k, _ in sorted(ctr.items(), key=lambda kv: -kv[1])]
 
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["body_key_counts"].items():
-                fallback_counter.update(keys)
-
-        return [k for k, _ in fallback_counter.most_common()]
+            return self._global_keys("body_key_counts")
 
     def get_body_values(self, method: str, url: str, key: str) -> list[str]:
-        base = self.get_most_similar_base(url)
-        ctr = self.patterns[base]["body_value_counts"].get(method, {}).get(key, Counter())
-
-        if ctr and sum(ctr.values()) > 0:
-            return [v for v, _ in ctr.most_common()]
-
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["body_value_counts"].items():
-                if key in keys:
-                    fallback_counter.update(keys[key])
+        with self._lock:
+            base = self.get_most_similar_base(url)
+            ctr = self._entry(base)["body_value_counts"].get(method, {}).get(key, Counter())
 
-        if fallback_counter:
-            return [v for v, _ in fallback_counter.most_common()]
+            if ctr and sum(ctr.values()) > 0:
+                return [v for v, _ in ctr.most_common()]
 
-        return []
-
-    def suggest_body_keys(self, method: str, url: str, prefix: str, count: int = 1) -> list[str]:
-        base = self.get_most_similar_base(url)
-        method_keys = self.patterns[base]["body_key_counts"].get(method, Counter())
-
-        suggestions = [k for k in method_keys if k.startswith(prefix)]
-        if suggestions:
-            return sorted(suggestions, key=lambda k: -method_keys[k])[:count]
+            return self._global_value_list("body_value_counts", key)
 
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["body_key_counts"].items():
-                for key in keys:
-                    if key.startswith(prefix):
-                        fallback_counter[key] += keys[key]
-                        if len(fallback_counter) >= count:
-                            break
-            if len(fallback_counter) >= count:
-                break
-
-        return [k for k, _ in fallback_counter.most_common(count)]
+    def suggest_body_keys(self, method: str, url: str, prefix: str, count: int = 1,
+                          parent: str = "") -> list[str]:
+        """
+        Chaves do body que começam com `prefix`. `parent` é o JSON pointer do
+        objeto onde a chave está sendo digitada ("" = primeiro nível,
+        "/items/*" = objetos dentro do array items).
+        """
+        kind = self._path_kind(parent) if parent else "body_key_counts"
+        return self._suggest_keys(kind, method, url, prefix, count)
 
     def suggest_header_keys(self, method: str, url: str, prefix: str, count: int = 1) -> list[str]:
-        base = self.get_most_similar_base(url)
-        method_keys = self.patterns[base]["hdr_counts"].get(method, {})
-
-        suggestions = [key for key in method_keys if key.startswith(prefix)]
-        if suggestions:
-            return suggestions[:count]
-
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["hdr_counts"].items():
-                for key in keys:
-                    if key.startswith(prefix):
-                        fallback_counter[key] += sum(keys[key].values())
-                        if len(fallback_counter) >= count:
-                            break
-            if len(fallback_counter) >= count:
-                break
-
-        return [k for k, _ in fallback_counter.most_common(count)]
+        return self._suggest_keys("hdr_counts", method, url, prefix, count)
 
     def suggest_param_keys(self, method: str, url: str, prefix: str, count: int = 1) -> list[str]:
-        base = self.get_most_similar_base(url)
-        method_keys = self.patterns[base]["prm_counts"].get(method, {})
-
-        suggestions = [key for key in method_keys if key.startswith(prefix)]
-        if suggestions:
-            return suggestions[:count]
-
-        fallback_counter = Counter()
-        for other_base, entry in self.patterns.items():
-            for other_method, keys in entry["prm_counts"].items():
-                for key in keys:
-                    if key.startswith(prefix):
-                        fallback_counter[key] += sum(keys[key].values())
-                        if len(fallback_counter) >= count:
-                            break
-            if len(fallback_counter) >= count:
-                break
-
-        return [k for k, _ in fallback_counter.most_common(count)]
-
+        return self._suggest_keys("prm_counts", method, url, prefix, count)
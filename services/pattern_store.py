@@ -0,0 +1,171 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+_COMPACT = object()
+_STOP = object()
+
+
+class PatternEventLog:
+    """
+    Persistência do LocalRequestPatternLearner em duas partes:
+
+    - snapshot (.json.gz): estado completo no formato do learner,
+      reescrito apenas na compactação
+    - log de eventos (.jsonl): uma linha por requisição registrada desde o
+      último snapshot, apenas com append
+
+    Uma única thread por arquivo grava os eventos em lote e, a cada
+    COMPACT_EVERY eventos, pede ao learner um snapshot, grava-o de forma
+    atômica e trunca o log. Cada evento carrega um número de sequência; o
+    snapshot guarda o último incluído, então eventos já compactados são
+    ignorados tanto na gravação quanto no replay.
+    """
+    COMPACT_EVERY = 500
+    SNAPSHOT_VERSION = 4
+
+    _registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, snapshot_path: str, log_path: str):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self._queue = queue.Queue()
+        self._snapshot_provider = None
+        self._compacted_seq = 0
+        self._events_in_log = 0
+        self._thread = threading.Thread(target=self._run, name="pattern-event-log", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_files(cls, snapshot_path: str, log_path: str) -> "PatternEventLog":
+        """Escritor único do processo para o par de arquivos."""
+        key = os.path.abspath(snapshot_path)
+        with cls._registry_lock:
+            writer = cls._registry.get(key)
+            if writer is None:
+                writer = cls._registry[key] = cls(snapshot_path, log_path)
+            return writer
+
+    def attach(self, snapshot_provider, compacted_seq: int, events_in_log: int):
+        """
+        snapshot_provider() deve devolver (último seq incluído, dados
+        serializáveis) de forma consistente com os eventos já enviados a
+        append().
+        """
+        self._snapshot_provider = snapshot_provider
+        self._compacted_seq = compacted_seq
+        self._events_in_log = events_in_log
+
+    def append(self, event: dict):
+        self._queue.put(event)
+
+    def request_compaction(self):
+        self._queue.put(_COMPACT)
+
+    def flush(self):
+        """Bloqueia até que tudo o que foi enfileirado esteja em disco."""
+        self._queue.join()
+
+    def close(self, timeout: float = 5.0):
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # ---- leitura ------------------------------------------------------
+
+    def read_snapshot(self):
+        """Retorna (seq, versão, dados); o formato antigo sem versão é a versão 1."""
+        if not os.path.exists(self.snapshot_path):
+            return 0, self.SNAPSHOT_VERSION, None
+        with gzip.open(self.snapshot_path, "rt", encoding="utf-8") as f:
+            return self.parse_snapshot(json.load(f))
+
+    @staticmethod
+    def parse_snapshot(data):
+        if isinstance(data, dict) and isinstance(data.get("version"), int):
+            if data["version"] == 2:
+                return data.get("seq", 0), 2, data.get("patterns", {})
+            return data.get("seq", 0), data["version"], data.get("data")
+        return 0, 1, data
+
+    def read_events(self, after_seq: int = 0):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # última linha incompleta de uma gravação interrompida
+                    logger.warning(f"[PatternEventLog] Evento ilegível ignorado em {self.log_path}")
+                    continue
+                if event.get("seq", 0) > after_seq:
+                    yield event
+
+    # ---- thread de escrita --------------------------------------------
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            events = [i for i in items if isinstance(i, dict)]
+            try:
+                if events:
+                    self._write(events)
+                if _COMPACT in items or self._events_in_log >= self.COMPACT_EVERY:
+                    self._compact()
+            except Exception as e:
+                logger.error(f"[PatternEventLog] Falha ao persistir padrões: {e}", exc_info=True)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            if _STOP in items:
+                return
+
+    def _write(self, events):
+        lines = [
+            json.dumps(e, ensure_ascii=False, default=str)
+            for e in events
+            if e.get("seq", 0) > self._compacted_seq
+        ]
+        if not lines:
+            return
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self._events_in_log += len(lines)
+
+    def _compact(self):
+        if self._snapshot_provider is None:
+            return
+        seq, data = self._snapshot_provider()
+        tmp_path = self.snapshot_path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump({"version": self.SNAPSHOT_VERSION, "seq": seq, "data": data}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.snapshot_path)
+        with open(self.log_path, "w", encoding="utf-8"):
+            pass
+        self._compacted_seq = seq
+        self._events_in_log = 0
+
+
+@atexit.register
+def _close_event_logs():
+    with PatternEventLog._registry_lock:
+        writers = list(PatternEventLog._registry.values())
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,82 @@
+class _Node:
+    __slots__ = ("children", "top", "terminal")
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+        self.terminal = False
+
+
+class PrefixIndex:
+    """
+    Trie de chaves com contagem, onde cada nó guarda as TOP_K chaves mais
+    frequentes da sua subárvore, ordenadas por (-contagem, chave).
+
+    Como as contagens só crescem, basta atualizar os nós do caminho da
+    chave a cada incremento para manter o top-k de cada prefixo exato; a
+    consulta é proporcional ao tamanho do prefixo, não ao histórico.
+    """
+    TOP_K = 10
+
+    def __init__(self, top_k: int = None):
+        self.top_k = top_k or self.TOP_K
+        self.counts = {}
+        self._root = _Node()
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    def add(self, key: str, amount=1):
+        count = self.counts.get(key, 0) + amount
+        self.counts[key] = count
+        node = self._root
+        self._update(node, key, count)
+        for ch in key:
+            child = node.children.get(ch)
+            if child is None:
+                child = node.children[ch] = _Node()
+            node = child
+            self._update(node, key, count)
+        node.terminal = True
+
+    def _update(self, node: _Node, key: str, count):
+        top = node.top
+        for i, (_, k) in enumerate(top):
+            if k == key:
+                top[i] = (count, key)
+                break
+        else:
+            if len(top) >= self.top_k and (-count, key) >= (-top[-1][0], top[-1][1]):
+                return
+            top.append((count, key))
+        top.sort(key=_rank)
+        del top[self.top_k:]
+
+    def top(self, prefix: str = "", count: int = 1) -> list[str]:
+        """As `count` chaves mais frequentes que começam com `prefix`."""
+        node = self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        if count <= self.top_k:
+            return [k for _, k in node.top[:count]]
+
+        keys = []
+        stack = [(node, prefix)]
+        while stack:
+            current, text = stack.pop()
+            if current.terminal:
+                keys.append(text)
+            for ch, child in current.children.items():
+                stack.append((child, text + ch))
+        keys.sort(key=lambda k: _rank((self.counts[k], k)))
+        return keys[:count]
+
+
+def _rank(item):
+    count, key = item
+    return -count, key
@@ -0,0 +1,121 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from services.exporters import EndpointIR, generator, render
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def endpoint_ir(project: dict, controller: dict, endpoint: dict) -> EndpointIR:
+    return EndpointIR(
+        endpoint.get("tests", {}),
+        project.get("base_url", ""),
+        controller.get("path", ""),
+        endpoint.get("path", ""),
+    )
+
+
+def endpoint_code(project: dict, controller: dict, endpoint: dict, language: str) -> str:
+    """Código dos testes de um endpoint a partir dos dicts já carregados da sessão."""
+    return generator(language).render(endpoint_ir(project, controller, endpoint))
+
+
+def controller_codes(project: dict, controller: dict, languages) -> dict:
+    """
+    Um arquivo por linguagem com todos os endpoints+testes do controlador:
+    {linguagem: código}. A IR de cada endpoint é montada uma vez e
+    renderizada para todas as linguagens.
+    """
+    parts = {language: [] for language in languages if generator(language)}
+    for endpoint in controller.get("endpoints", {}).values():
+        for language, code in render(endpoint_ir(project, controller, endpoint), parts).items():
+            parts[language].append(code)
+    return {language: "\n\n".join(codes) for language, codes in parts.items()}
+
+
+def controller_code(project: dict, controller: dict, language: str) -> str:
+    """Um único arquivo com todos os endpoints+testes do controlador."""
+    return controller_codes(project, controller, [language])[language]
+
+
+class ProjectExporter:
+    """
+    Exporta todos os controladores de um projeto a partir de um único
+    snapshot da sessão: cada controlador é gerado em uma thread do pool e
+    gravado na pasta assim que fica pronto (arquivo temporário + rename),
+    sem acumular o código do projeto inteiro em memória. Com várias
+    linguagens, cada controlador é preparado uma vez e renderizado para
+    todas elas.
+
+    on_progress(concluídos, total, controlador) é chamado a cada
+    controlador gravado, na thread que chamou run().
+    """
+    MAX_WORKERS = 4
+
+    def __init__(self, project: dict, languages, folder: str, on_progress=None):
+        if isinstance(languages, str):
+            languages = [languages]
+        for language in languages:
+            generator(language)
+        self.project = project
+        self.languages = list(languages)
+        self.folder = folder
+        self.on_progress = on_progress
+
+    def _export_controller(self, name: str, controller: dict) -> list[str]:
+        paths = []
+        for language, code in controller_codes(self.project, controller, self.languages).items():
+            path = os.path.join(self.folder, f"{name}{generator(language).extension}")
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(code)
+            os.replace(tmp_path, path)
+            paths.append(path)
+        return paths
+
+    def run(self) -> list[str]:
+        """Gera os arquivos e retorna os caminhos gravados."""
+        controllers = list(self.project.get("controllers", {}).items())
+        total = len(controllers)
+        paths = []
+        done = 0
+        if not total:
+            return paths
+        os.makedirs(self.folder, exist_ok=True)
+        workers = min(self.MAX_WORKERS, total)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="project-export") as pool:
+            futures = {pool.submit(self._export_controller, name, ctrl): name for name, ctrl in controllers}
+            for future in as_completed(futures):
+                paths.extend(future.result())
+                done += 1
+                if self.on_progress:
+                    self.on_progress(done, total, futures[future])
+        return paths
+
+
+class ProjectExportWorker(QThread):
+    progress = pyqtSignal(int, int, str)  # args: concluídos, total, controlador
+    finished = pyqtSignal(list)
+    error = pyqtSignal(str)
+
+    def __init__(self, controller, project, languages, folder, parent=None):
+        super().__init__(parent)
+        self.controller = controller
+        self.project = project
+        self.languages = languages
+        self.folder = folder
+
+    def run(self):
+        try:
+            paths = self.controller.export_project_to_folder(
+                self.project, self.languages, self.folder, on_progress=self.progress.emit
+            )
+            logger.info(f"[ProjectExportWorker] Exportação concluída: {len(paths)} arquivos em {self.folder}")
+            self.finished.emit(paths)
+        except Exception as e:
+            logger.error(f"[ProjectExportWorker] Erro ao exportar projeto: {str(e)}", exc_info=True)
+            self.error.emit(str(e))
@@ -0,0 +1,238 @@
+import socket
+import statistics
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+_local = threading.local()
+
+PHASES = ("dns", "connect", "tls", "ttfb", "download")
+PHASE_LABELS = {
+    "dns": "DNS",
+    "connect": "Conexão",
+    "tls": "TLS",
+    "ttfb": "TTFB",
+    "download": "Download",
+    "total": "Total",
+}
+
+
+class RequestTimings:
+    """
+    Tempos por fase de uma requisição, medidos com relógio monotônico
+    (perf_counter) na thread que a executa.
+
+    - dns / connect / tls: zerados quando a conexão keep-alive é reaproveitada
+    - ttfb: do envio da requisição até o recebimento dos headers, sem o
+      tempo de dns/connect/tls de uma conexão aberta durante o envio
+    - download: dos headers até o fim da leitura do body
+    Com redirects, as fases de cada salto são somadas.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = 0.0
+        self.reused = True
+        self.headers_at = None
+        self.finished_at = None
+        self._sent_at = None
+        self._setup_at_send = 0.0
+
+    @property
+    def setup(self) -> float:
+        """Tempo gasto abrindo conexões (dns + connect + tls)."""
+        return self.dns + self.connect + self.tls
+
+    @property
+    def download(self) -> float:
+        if self.headers_at is None or self.finished_at is None:
+            return 0.0
+        return max(self.finished_at - self.headers_at, 0.0)
+
+    @property
+    def total(self) -> float:
+        end = self.finished_at if self.finished_at is not None else perf_counter()
+        return end - self.started
+
+    def finish(self):
+        if self.finished_at is None:
+            self.finished_at = perf_counter()
+
+    def to_dict(self) -> dict:
+        """Tempos em milissegundos, no formato enviado à UI."""
+        data = {f"{phase}_ms": getattr(self, phase) * 1000 for phase in PHASES}
+        data["total_ms"] = self.total * 1000
+        data["reused"] = self.reused
+        return data
+
+
+def current_timings():
+    return getattr(_local, "current", None)
+
+
+@contextmanager
+def measure():
+    """
+    Ativa a medição para as requisições feitas na thread atual por uma
+    sessão criada com timed_session(). O body deve ser lido dentro do
+    bloco para que o download seja contabilizado.
+    """
+    timings = RequestTimings()
+    previous = current_timings()
+    _local.current = timings
+    try:
+        yield timings
+    finally:
+        timings.finish()
+        _local.current = previous
+
+
+class _TimedConnectionMixin:
+    """Instrumenta a abertura da conexão e o ciclo request/response do urllib3."""
+
+    def _new_conn(self):
+        timings = current_timings()
+        if timings is None:
+            return super()._new_conn()
+
+        timings.reused = False
+        host = self._dns_host
+        start = perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            # o urllib3 refaz a resolução e gera o erro adequado
+            return super()._new_conn()
+        resolved = perf_counter()
+        timings.dns += resolved - start
+
+        try:
+            self._dns_host = addresses[0][4][0]
+            sock = super()._new_conn()
+        except Exception:
+            if len({a[4][0] for a in addresses}) < 2:
+                raise
+            # deixa o urllib3 tentar os demais endereços resolvidos
+            self._dns_host = host
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        timings.connect += perf_counter() - resolved
+        return sock
+
+    def request(self, *args, **kwargs):
+        timings = current_timings()
+        if timings is not None:
+            timings._sent_at = perf_counter()
+            # o urllib3 2.x abre a conexão só dentro de request()
+            timings._setup_at_send = timings.setup
+        return super().request(*args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        timings = current_timings()
+        if timings is not None and timings._sent_at is not None:
+            now = perf_counter()
+            setup = timings.setup - timings._setup_at_send
+            timings.ttfb += max(now - timings._sent_at - setup, 0.0)
+            timings.headers_at = now
+            timings._sent_at = None
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        timings = current_timings()
+        if timings is None:
+            return super().connect()
+        start = perf_counter()
+        before = timings.dns + timings.connect
+        try:
+            super().connect()
+        finally:
+            socket_time = (timings.dns + timings.connect) - before
+            timings.tls += max(perf_counter() - start - socket_time, 0.0)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+_TIMED_POOLS = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter cujos pools usam as conexões instrumentadas."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = dict(_TIMED_POOLS)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if not proxy.lower().startswith("socks"):
+            manager.pool_classes_by_scheme = dict(_TIMED_POOLS)
+        return manager
+
+
+def timed_session() -> requests.Session:
+    session = requests.Session()
+    adapter = TimedHTTPAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def format_timings(timings: dict) -> str:
+    """Linha única para o log: "DNS 1.2 ms | Conexão 0.8 ms | ..."."""
+    if not timings:
+        return ""
+    parts = []
+    for phase in PHASES + ("total",):
+        value = timings.get(f"{phase}_ms")
+        if value is None:
+            continue
+        parts.append(f"{PHASE_LABELS[phase]} {value:.1f} ms")
+    text = " | ".join(parts)
+    if timings.get("reused"):
+        text += " (conexão reaproveitada)"
+    return text
+
+
+def summarize_timings(samples: list) -> dict:
+    """
+    Agrega os tempos de várias requisições por fase:
+    {fase: {"avg": ms, "p50": ms, "p90": ms, "max": ms}}.
+    """
+    summary = {}
+    if not samples:
+        return summary
+    for phase in PHASES + ("total",):
+        values = sorted(s[f"{phase}_ms"] for s in samples if f"{phase}_ms" in s)
+        if not values:
+            continue
+        count = len(values)
+        summary[phase] = {
+            "avg": statistics.fmean(values),
+            "p50": values[count // 2],
+            "p90": values[min(int(count * 0.90), count - 1)],
+            "max": values[-1],
+        }
+    return summary
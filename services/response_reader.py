@@ -0,0 +1,183 @@
+import atexit
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_spill_lock = threading.Lock()
+# arquivos de bodies grandes: caminho -> liberado; os liberados em ordem de liberação
+_spill_files = OrderedDict()
+
+
+class ResponseBody:
+    """
+    Body de uma response consumido em streaming.
+
+    Até MEMORY_CAP bytes o conteúdo fica em memória; acima disso tudo é
+    despejado em um arquivo temporário e o restante do stream segue direto
+    para o disco. A UI recebe apenas o preview; as verificações leem o
+    conteúdo completo via text().
+
+    Depois de avaliado e registrado, o body deve ser liberado (release());
+    dos arquivos liberados só os MAX_SPILL_FILES mais recentes são mantidos
+    para consulta pelo log, os demais são apagados.
+    """
+    MEMORY_CAP = 8 * 1024 * 1024
+    MAX_SPILL_FILES = 20
+    PREVIEW_CHARS = 4000
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, encoding: str = None, memory_cap: int = None):
+        self.encoding = encoding or "utf-8"
+        self.memory_cap = self.MEMORY_CAP if memory_cap is None else memory_cap
+        self.size = 0
+        self._buffer = bytearray()
+        self._file = None
+        self.path = None
+        self._text = None
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    def write(self, chunk: bytes):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self._file is None and len(self._buffer) + len(chunk) > self.memory_cap:
+            self._spill()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.extend(chunk)
+
+    def _spill(self):
+        fd, path = tempfile.mkstemp(prefix="testai_body_", suffix=".bin")
+        self._file = os.fdopen(fd, "wb")
+        self.path = path
+        self._file.write(self._buffer)
+        self._buffer = bytearray(self._head_bytes())
+        with _spill_lock:
+            _spill_files[path] = False
+        logger.info(f"[ResponseBody] Body excedeu {self.memory_cap} bytes; gravando em {path}")
+
+    def _head_bytes(self) -> bytes:
+        # bytes suficientes para o preview mesmo com caracteres multibyte
+        return bytes(self._buffer[:self.PREVIEW_CHARS * 4])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def release(self):
+        """Marca o body como já avaliado, apagando os arquivos liberados mais antigos."""
+        self.close()
+        if self.path is None:
+            return
+        with _spill_lock:
+            if self.path in _spill_files:
+                _spill_files[self.path] = True
+                _spill_files.move_to_end(self.path)
+            released = [path for path, done in _spill_files.items() if done]
+            evicted = released[:max(len(released) - self.MAX_SPILL_FILES, 0)]
+            for path in evicted:
+                del _spill_files[path]
+        for path in evicted:
+            _remove_spill_file(path)
+
+    def discard(self):
+        """Apaga o arquivo do body, se houver (leitura abortada)."""
+        self.close()
+        if self.path is None:
+            return
+        with _spill_lock:
+            _spill_files.pop(self.path, None)
+        _remove_spill_file(self.path)
+
+    def read_bytes(self) -> bytes:
+        if self.path is None:
+            return bytes(self._buffer)
+        self.close()
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def text(self) -> str:
+        """Conteúdo completo decodificado (lido do disco quando necessário)."""
+        if self._text is None:
+            text = self.read_bytes().decode(self.encoding, errors="replace")
+            if self.spilled:
+                return text
+            self._text = text
+        return self._text
+
+    def preview(self, limit: int = None) -> str:
+        limit = self.PREVIEW_CHARS if limit is None else limit
+        head = bytes(self._buffer[:limit * 4])
+        text = head.decode(self.encoding, errors="replace")
+        return text[:limit]
+
+    def summary(self) -> dict:
+        """Dados compactos do body enviados à UI pelos sinais."""
+        preview = self.preview()
+        if self.spilled:
+            truncated = True
+        else:
+            truncated = len(preview) < len(self.text())
+        return {
+            "body_preview": preview,
+            "body_size": self.size,
+            "body_truncated": truncated,
+            "body_file": self.path,
+            "body": None if truncated else preview,
+        }
+
+
+def read_response(response, memory_cap: int = None) -> ResponseBody:
+    """
+    Consome o stream de uma response do requests (stream=True) em blocos,
+    respeitando o limite em memória.
+    """
+    body = ResponseBody(response.encoding, memory_cap)
+    try:
+        for chunk in response.iter_content(chunk_size=ResponseBody.CHUNK_SIZE):
+            body.write(chunk)
+    except BaseException:
+        # ninguém vai receber este body: o arquivo parcial não pode ficar
+        # retido como "em uso" até o fim do processo
+        body.discard()
+        raise
+    finally:
+        body.close()
+        response.close()
+    return body
+
+
+def format_body_for_log(data: dict) -> str:
+    preview = data.get("body_preview", data.get("body", "")) or ""
+    text = preview.strip()
+    if data.get("body_truncated"):
+        size = data.get("body_size", 0)
+        text += f"\n… [body truncado: exibindo {len(preview)} caracteres de {size} bytes]"
+        if data.get("body_file"):
+            text += f"\n… [body completo em {data['body_file']}]"
+    return text
+
+
+def _remove_spill_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@atexit.register
+def _cleanup_spill_files():
+    with _spill_lock:
+        paths = list(_spill_files)
+        _spill_files.clear()
+    for path in paths:
+        _remove_spill_file(path)
@@ -1,8 +1,11 @@
 import logging
+import time
 
 from PyQt5.QtCore import QRunnable, QObject, pyqtSignal
-import requests
 
+from services.assertion_evaluator import evaluate_test
+from services.request_timing import measure, timed_session
+from services.response_reader import read_response
 from utils.requests import join_url
 
 logging.basicConfig(
@@ -23,11 +26,12 @@ class TestRunnable(QRunnable):
     """
     QRunnable que executa um único teste HTTP e emite sinais com o Response.
     """
-    def __init__(self, project, controller, test_descriptor, on_success=None, on_error=None):
+    def __init__(self, project, controller, test_descriptor, on_success=None, on_error=None, memory_cap=None):
         super().__init__()
         self.project = project
         self.controller = controller
         self.test = test_descriptor
+        self.memory_cap = memory_cap
         self.signals = TestWorkerSignals()
 
         if on_success:
@@ -35,7 +39,23 @@ class TestRunnable(QRunnable):
         if on_error:
             self.signals.error.connect(on_error)
 
+    def _record_history(self, request, data=None, error=None):
+        history = getattr(self.controller, "history", None)
+        if history is None:
+            return
+        context = {
+            "project": self.project,
+            "controller": self.test.get("controller"),
+            "endpoint": self.test.get("endpoint"),
+            "name": self.test.get("name"),
+        }
+        duration_ms = (time.perf_counter() - self._started) * 1000 if self._started else None
+        history.record_result(context, request, data, error, self._started_at, duration_ms)
+
     def run(self):
+        self._started_at = time.time()
+        self._started = None
+        request_spec = {}
         try:
             logger.info(f"[TestRunnable] Iniciando teste '{self.test.get('name', '')}'")
         except Exception as e:
@@ -62,39 +82,64 @@ class TestRunnable(QRunnable):
             params = self.test.get("query_params", {})
             body = self.test.get("body", "")
 
+            request_spec = {"method": method, "url": url, "headers": headers, "params": params, "body": body}
             logger.info(f"[TestRunnable] Preparado: {method} {url} | params={params} | headers={headers}")
         except Exception as e:
             logger.error(f"[TestRunnable] Erro ao montar request: {e}", exc_info=True)
             self.signals.error.emit(self.test, str(e))
             return
 
-        try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                params=params,
-                data=body,
-                timeout=30
-            )
-            logger.info(f"[TestRunnable] Response recebido: {response.status_code}")
-        except Exception as e:
-            logger.error(f"[TestRunnable] Erro ao executar request: {e}", exc_info=True)
-            self.signals.error.emit(self.test, str(e))
-            return
+        self._started = time.perf_counter()
+        with measure() as timings, timed_session() as session:
+            try:
+                response = session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    data=body,
+                    timeout=30,
+                    stream=True
+                )
+                logger.info(f"[TestRunnable] Response recebido: {response.status_code}")
+            except Exception as e:
+                logger.error(f"[TestRunnable] Erro ao executar request: {e}", exc_info=True)
+                self._record_history(request_spec, error=str(e))
+                self.signals.error.emit(self.test, str(e))
+                return
 
-        try:
-            self.signals.result.emit(self.test, response)
-        except Exception as e:
-            logger.error(f"[TestRunnable] Erro no emit result: {e}", exc_info=True)
+            try:
+                self.signals.result.emit(self.test, response)
+            except Exception as e:
+                logger.error(f"[TestRunnable] Erro no emit result: {e}", exc_info=True)
+
+            try:
+                body_content = read_response(response, self.memory_cap)
+            except Exception as e:
+                logger.error(f"[TestRunnable] Erro ao ler response: {e}", exc_info=True)
+                self._record_history(request_spec, error=str(e))
+                self.signals.error.emit(self.test, str(e))
+                return
 
         try:
             data_out = {
                 "status": response.status_code,
-                "body": response.text,
                 "headers": dict(response.headers),
+                "timings": timings.to_dict(),
+                **body_content.summary(),
             }
-            self.signals.finished.emit(self.test, data_out)
-        except Exception as e:
-            logger.error(f"[TestRunnable] Erro no emit finished: {e}", exc_info=True)
+
+            try:
+                data_out["evaluation"] = evaluate_test(self.test, data_out, body_content)
+            except Exception as e:
+                logger.error(f"[TestRunnable] Erro ao avaliar verificações: {e}", exc_info=True)
+
+            self._record_history(request_spec, data_out)
+
+            try:
+                self.signals.finished.emit(self.test, data_out)
+            except Exception as e:
+                logger.error(f"[TestRunnable] Erro no emit finished: {e}", exc_info=True)
+        finally:
+            body_content.release()
 
@@ -0,0 +1,57 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from urllib3.util import connection
+
+from services.request_timing import measure, timed_session
+
+DELAY = 0.3
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{httpd.server_address[1]}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _slow(func):
+    def wrapper(*args, **kwargs):
+        time.sleep(DELAY)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def test_ttfb_excludes_slow_connect(server_url, monkeypatch):
+    monkeypatch.setattr(connection, "create_connection", _slow(connection.create_connection))
+    with measure() as timings:
+        timed_session().get(server_url).content
+    assert timings.connect >= DELAY
+    assert timings.ttfb < DELAY
+
+
+def test_ttfb_excludes_slow_dns(server_url, monkeypatch):
+    monkeypatch.setattr(socket, "getaddrinfo", _slow(socket.getaddrinfo))
+    with measure() as timings:
+        timed_session().get(server_url).content
+    assert timings.dns >= DELAY
+    assert timings.ttfb < DELAY
+    assert timings.total >= timings.dns + timings.ttfb